@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from metrics import CACHE_REQUESTS
+
+CachedBody = Tuple[bytes, str]
+
+
+class ResponseCache:
+    """
+    Готовые JSON-ответы API с ETag на короткое время.
+
+    Ключ - путь и параметры запроса. Одновременные запросы с одним
+    ключом ждут одной загрузки из БД, как страницы в VacancyPageLoader.
+    """
+
+    def __init__(self, ttl: float = 10, maxsize: int = 1000):
+        """
+        :param ttl: Сколько секунд ответ считается актуальным
+        :param maxsize: Максимум ответов в кеше
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, asyncio.Task]]" = OrderedDict()
+
+    async def get(self, key: str, load: Callable[[], Awaitable[BaseModel]]) -> CachedBody:
+        """
+        Тело ответа и его ETag: из кеша или из load()
+
+        :param key: Ключ запроса
+        :param load: Загрузка модели ответа из БД
+        """
+        task = self._lookup(key)
+        CACHE_REQUESTS.labels("api", "miss" if task is None else "hit").inc()
+        if task is None:
+            task = asyncio.create_task(self._render(load))
+            self._entries[key] = (time.monotonic() + self.ttl, task)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # Ошибку не кешируем: следующий запрос пойдёт в БД заново
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is task:
+                del self._entries[key]
+            raise
+
+    def _lookup(self, key: str) -> Optional[asyncio.Task]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, task = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return task
+
+    @staticmethod
+    async def _render(load: Callable[[], Awaitable[BaseModel]]) -> CachedBody:
+        body = (await load()).model_dump_json().encode()
+        return body, f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+
+async def cached_json(request: Request, load: Callable[[AsyncSession], Awaitable[BaseModel]]) -> Response:
+    """
+    JSON-ответ через кеш приложения с поддержкой If-None-Match
+
+    Если клиент прислал актуальный ETag, отвечаем 304 без тела.
+    Загрузка открывает свою сессию: её результат могут ждать и другие
+    запросы, даже если первый клиент уже отключился.
+
+    :param request: Текущий запрос (ключ кеша - путь и параметры)
+    :param load: Загрузка модели ответа из БД
+    """
+    session_maker = request.app.state.session_maker
+
+    async def load_with_session() -> BaseModel:
+        async with session_maker() as session:
+            return await load(session)
+
+    cache: ResponseCache = request.app.state.cache
+    key = f"{request.url.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.query_params.multi_items()))}"
+    body, etag = await cache.get(key, load_with_session)
+
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={int(cache.ttl)}"}
+    if_none_match = request.headers.get("if-none-match", "")
+    client_tags = {tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")}
+    if etag in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
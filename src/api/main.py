@@ -0,0 +1,188 @@
+"""
+REST API только для чтения: пользователи, подписки, сохранённые вакансии
+и отчёты циклов проверки.
+
+    python -m api.main
+
+Списки листаются курсором (?cursor= из next_cursor), ответы кешируются
+на API_CACHE_TTL_SECONDS и отдаются с ETag.
+"""
+import logging
+import secrets
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Optional
+
+import uvicorn
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from api.cache import ResponseCache, cached_json
+from api.pagination import keyset_page, split_page
+from api.schemas import CycleReportOut, CycleSummary, Page, SubscriptionOut, UserOut, VacancyOut
+from bot.config import settings
+from database.database import create_engine, engine_stats
+from database.models import CycleReport, Subscription, User, Vacancy
+from tasks.cycle_report import load_recent_reports, percentile
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 500
+
+
+async def check_token(authorization: Optional[str] = Header(None)):
+    """Bearer-токен API_TOKEN, если он задан"""
+    if not settings.API_TOKEN:
+        return
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.API_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid or missing API token")
+
+
+def create_app(session_maker: Optional[async_sessionmaker] = None) -> FastAPI:
+    """
+    Приложение API
+
+    :param session_maker: Фабрика сессий; по умолчанию API открывает
+        собственный пул (application_name hh-jobs-api, API_DB_POOL_SIZE)
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        engine = None
+        if session_maker is None:
+            engine = create_engine("hh-jobs-api", pool_size=settings.API_DB_POOL_SIZE)
+            app.state.session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        else:
+            app.state.session_maker = session_maker
+        app.state.cache = ResponseCache(ttl=settings.API_CACHE_TTL_SECONDS, maxsize=settings.API_CACHE_SIZE)
+        try:
+            yield
+        finally:
+            if engine is not None:
+                logger.info(f"API DB stats: {engine_stats(engine)}")
+                await engine.dispose()
+
+    app = FastAPI(title="HH Jobs Notifier API", lifespan=lifespan)
+    protected = [Depends(check_token)]
+
+    @app.get("/healthz")
+    async def healthcheck() -> Response:
+        return Response(content="ok", media_type="text/plain")
+
+    @app.get("/users", response_model=Page[UserOut], dependencies=protected)
+    async def list_users(
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        is_active: Optional[bool] = None
+    ) -> Response:
+        async def load(session: AsyncSession):
+            query = select(User)
+            if is_active is not None:
+                query = query.where(User.is_active == is_active)
+            columns = [User.id]
+            rows = (await session.execute(keyset_page(query, columns, cursor, limit))).scalars().all()
+            items, next_cursor = split_page(rows, columns, limit)
+            return Page[UserOut](items=items, next_cursor=next_cursor)
+
+        return await cached_json(request, load)
+
+    @app.get("/subscriptions", response_model=Page[SubscriptionOut], dependencies=protected)
+    async def list_subscriptions(
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        user_id: Optional[int] = None,
+        telegram_id: Optional[int] = None,
+        is_active: Optional[bool] = None
+    ) -> Response:
+        async def load(session: AsyncSession):
+            query = select(Subscription)
+            if user_id is not None:
+                query = query.where(Subscription.user_id == user_id)
+            if telegram_id is not None:
+                query = query.join(User, User.id == Subscription.user_id).where(User.telegram_id == telegram_id)
+            if is_active is not None:
+                query = query.where(Subscription.is_active == is_active)
+            columns = [Subscription.id]
+            rows = (await session.execute(keyset_page(query, columns, cursor, limit))).scalars().all()
+            items, next_cursor = split_page(rows, columns, limit)
+            return Page[SubscriptionOut](items=items, next_cursor=next_cursor)
+
+        return await cached_json(request, load)
+
+    @app.get("/vacancies", response_model=Page[VacancyOut], dependencies=protected)
+    async def list_vacancies(
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        published_after: Optional[datetime] = None
+    ) -> Response:
+        """Вакансии от новых к старым"""
+        async def load(session: AsyncSession):
+            query = select(Vacancy)
+            if published_after is not None:
+                query = query.where(Vacancy.published_at >= published_after)
+            columns = [Vacancy.published_at, Vacancy.id]
+            rows = (await session.execute(
+                keyset_page(query, columns, cursor, limit, descending=True)
+            )).scalars().all()
+            items, next_cursor = split_page(rows, columns, limit)
+            return Page[VacancyOut](items=items, next_cursor=next_cursor)
+
+        return await cached_json(request, load)
+
+    @app.get("/cycles", response_model=Page[CycleReportOut], dependencies=protected)
+    async def list_cycles(
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE)
+    ) -> Response:
+        """Отчёты циклов проверки от новых к старым"""
+        async def load(session: AsyncSession):
+            columns = [CycleReport.started_at, CycleReport.id]
+            rows = (await session.execute(
+                keyset_page(select(CycleReport), columns, cursor, limit, descending=True)
+            )).scalars().all()
+            items, next_cursor = split_page(rows, columns, limit)
+            return Page[CycleReportOut](items=items, next_cursor=next_cursor)
+
+        return await cached_json(request, load)
+
+    @app.get("/cycles/summary", response_model=CycleSummary, dependencies=protected)
+    async def cycles_summary(
+        request: Request,
+        hours: int = Query(24, ge=1, le=24 * 30)
+    ) -> Response:
+        """Перцентили длительности и суммы счётчиков циклов за последние hours часов"""
+        async def load(session: AsyncSession):
+            since = datetime.utcnow() - timedelta(hours=hours)
+            reports = await load_recent_reports(session, since)
+            durations = [report.duration_seconds for report in reports]
+            return CycleSummary(
+                since=since,
+                cycles=len(reports),
+                p50_seconds=percentile(durations, 0.5),
+                p95_seconds=percentile(durations, 0.95),
+                subscriptions=sum(report.subscriptions for report in reports),
+                hh_calls=sum(report.hh_calls for report in reports),
+                cache_hits=sum(report.cache_hits for report in reports),
+                new_vacancies=sum(report.new_vacancies for report in reports),
+                messages_sent=sum(report.messages_sent for report in reports),
+                failures=sum(report.failures for report in reports),
+            )
+
+        return await cached_json(request, load)
+
+    return app
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    uvicorn.run(create_app(), host=settings.API_HOST, port=settings.API_PORT)
+
+
+if __name__ == "__main__":
+    main()
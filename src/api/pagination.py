@@ -0,0 +1,73 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Непрозрачный курсор из значений ключа сортировки последней строки"""
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    """
+    Значения ключа сортировки из курсора
+
+    :param cursor: Курсор из next_cursor предыдущей страницы
+    :param types: Типы значений (datetime восстанавливается из ISO-строки)
+    :raises HTTPException: 400, если курсор повреждён
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if len(values) != len(types):
+            raise ValueError("wrong cursor length")
+        return [
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, values)
+        ]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def keyset_page(
+    query: Select,
+    columns: Sequence[Any],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False
+) -> Select:
+    """
+    Запрос страницы по ключу сортировки вместо OFFSET
+
+    Следующая страница начинается строго после последней строки
+    предыдущей, поэтому стоимость не растёт с номером страницы, а вставки
+    между запросами не сдвигают выдачу. Берётся limit + 1 строка, чтобы
+    понять, есть ли продолжение.
+
+    :param query: Базовый запрос с фильтрами
+    :param columns: Столбцы ключа сортировки; последний - уникальный (id)
+    :param cursor: Курсор предыдущей страницы
+    :param limit: Размер страницы
+    :param descending: Сортировка от новых к старым
+    """
+    if cursor:
+        values = decode_cursor(cursor, [column.type.python_type for column in columns])
+        key = tuple_(*columns)
+        query = query.where(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], columns: Sequence[Any], limit: int) -> Tuple[Sequence[Any], Optional[str]]:
+    """Строки страницы и курсор следующей (None, если это последняя)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor([getattr(last, column.key) for column in columns])
@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel, ConfigDict
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Страница выдачи; next_cursor передаётся в ?cursor= за следующей"""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    telegram_id: int
+    username: Optional[str] = None
+    is_active: bool
+
+
+class SubscriptionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int
+    keywords: str
+    city: Optional[str] = None
+    experience: Optional[str] = None
+    salary_from: Optional[int] = None
+    is_active: bool
+
+
+class VacancyOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    hh_id: str
+    title: str
+    company: Optional[str] = None
+    salary: Optional[str] = None
+    url: str
+    published_at: datetime
+
+
+class CycleReportOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    started_at: datetime
+    finished_at: datetime
+    duration_seconds: float
+    subscriptions: int
+    distinct_queries: int
+    hh_calls: int
+    cache_hits: int
+    new_vacancies: int
+    messages_sent: int
+    failures: int
+
+
+class CycleSummary(BaseModel):
+    """Сводка циклов проверки за период"""
+    since: datetime
+    cycles: int
+    p50_seconds: float
+    p95_seconds: float
+    subscriptions: int
+    hh_calls: int
+    cache_hits: int
+    new_vacancies: int
+    messages_sent: int
+    failures: int
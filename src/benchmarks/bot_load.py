@@ -0,0 +1,220 @@
+"""
+Нагрузочный тест обработчиков бота: синтетические апдейты подаются прямо
+в Dispatcher, Telegram Bot API и HH API заменены локальными заглушками.
+
+Каждый пользователь проходит сценарий: /start, мастер добавления подписки,
+список подписок, просмотр вакансий и две следующие страницы.
+
+    python -m benchmarks.bot_load --users 500 --think-ms 200
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter
+from typing import Dict, List
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from benchmarks.cycle_benchmark import (
+    BENCHMARK_BOT_TOKEN, DEFAULT_DATABASE_URL, create_benchmark_engine
+)
+from benchmarks.fake_servers import FakeHHServer, FakeTelegramServer, format_counter
+from benchmarks.fake_update_poster import build_callback_update, build_message_update
+from bot.config import settings
+from bot.main import create_dispatcher
+from database.database import engine_stats
+from database.models import Base, Subscription, User
+from tasks.backfill import drain_backfills, set_embedded_runtime
+from tasks.cycle_report import percentile
+from tasks.runtime import CheckerRuntime
+
+logger = logging.getLogger(__name__)
+
+FIRST_USER_ID = 200000
+
+
+class LoadStats:
+    """Задержки обработки по шагам сценария и насыщение пула БД"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Counter = Counter()
+        self.max_checked_out = 0
+        self.max_overflow = 0
+
+    def record(self, step: str, seconds: float):
+        self.latencies.setdefault(step, []).append(seconds)
+
+    def all_latencies(self) -> List[float]:
+        return [value for values in self.latencies.values() for value in values]
+
+
+async def sample_pool(engine: AsyncEngine, stats: LoadStats, stop: asyncio.Event, interval: float = 0.01):
+    """Периодически снимать занятость пула соединений"""
+    while not stop.is_set():
+        current = engine_stats(engine)
+        stats.max_checked_out = max(stats.max_checked_out, current.get("checked_out", 0))
+        stats.max_overflow = max(stats.max_overflow, current.get("overflow", 0))
+        await asyncio.sleep(interval)
+
+
+async def find_subscription_id(session_maker: async_sessionmaker, telegram_id: int) -> int:
+    async with session_maker() as session:
+        result = await session.execute(
+            select(Subscription.id)
+            .join(User, User.id == Subscription.user_id)
+            .where(User.telegram_id == telegram_id)
+            .order_by(Subscription.id.desc())
+            .limit(1)
+        )
+        return result.scalar_one()
+
+
+async def run_user(
+    dp,
+    bot: Bot,
+    session_maker: async_sessionmaker,
+    telegram_id: int,
+    stats: LoadStats,
+    think: float,
+    distinct_queries: int
+):
+    """Сценарий одного пользователя; шаги идут последовательно, как в чате"""
+
+    async def step(name: str, update: Dict):
+        started = time.perf_counter()
+        try:
+            await dp.feed_raw_update(bot, update)
+        except Exception as e:
+            stats.errors[f"{name}: {type(e).__name__}"] += 1
+        stats.record(name, time.perf_counter() - started)
+        if think:
+            await asyncio.sleep(think)
+
+    await step("start", build_message_update(telegram_id, "/start"))
+    await step("add_subscription", build_message_update(telegram_id, "➕ Добавить подписку"))
+    await step("keywords", build_message_update(telegram_id, f"python {telegram_id % distinct_queries}"))
+    await step("city", build_message_update(telegram_id, "Москва"))
+    await step("experience", build_message_update(telegram_id, "От 1 года"))
+    await step("salary", build_message_update(telegram_id, "100000"))
+    await step("list", build_message_update(telegram_id, "📋 Мои подписки"))
+    await step("choose_view", build_message_update(telegram_id, "🔍 Просмотр вакансий"))
+
+    subscription_id = await find_subscription_id(session_maker, telegram_id)
+    await step("view", build_callback_update(telegram_id, f"view_sub_{subscription_id}"))
+    await step("next_page", build_callback_update(telegram_id, f"next_page_{subscription_id}"))
+    await step("next_page", build_callback_update(telegram_id, f"next_page_{subscription_id}"))
+
+
+def print_report(stats: LoadStats, elapsed: float, dp, engine: AsyncEngine, hh: FakeHHServer, telegram: FakeTelegramServer):
+    updates = len(stats.all_latencies())
+    print(f"Апдейтов: {updates} за {elapsed:.2f} с ({updates / elapsed:.1f}/с)")
+    print()
+    print(f"{'шаг':<18} {'n':>6} {'p50 мс':>8} {'p95 мс':>8} {'p99 мс':>8}")
+    for name, values in list(stats.latencies.items()) + [("всего", stats.all_latencies())]:
+        print(
+            f"{name:<18} {len(values):>6} {percentile(values, 0.5) * 1000:>8.1f} "
+            f"{percentile(values, 0.95) * 1000:>8.1f} {percentile(values, 0.99) * 1000:>8.1f}"
+        )
+    print()
+
+    db = engine_stats(engine)
+    if "pool_size" in db:
+        print(
+            f"Пул БД: занято до {stats.max_checked_out} из {db['pool_size']} "
+            f"(+{settings.DB_MAX_OVERFLOW} overflow), overflow до {max(stats.max_overflow, 0)}"
+        )
+    print(f"Запросов к БД: {db['queries']}, среднее {db['avg_ms']} мс, максимум {db['max_ms']} мс")
+
+    sessions = dp["session_stats"]
+    throttling = dp["throttling_stats"]
+    print(f"Апдейтов с обращением к БД: {sessions.db_updates} ({sessions.db_ratio:.0%})")
+    print(f"Отброшено нажатий: throttled={throttling.throttled}, duplicates={throttling.duplicates}")
+    print(f"HH: {format_counter(hh.calls)}; Telegram: {format_counter(telegram.calls)}")
+    if stats.errors:
+        print(f"Ошибки: {format_counter(stats.errors)}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест обработчиков бота")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--think-ms", type=float, default=0, help="Пауза пользователя между шагами")
+    parser.add_argument(
+        "--distinct-queries", type=int, default=50,
+        help="Сколько разных ключевых слов на всех пользователей (влияет на кеш страниц)"
+    )
+    parser.add_argument(
+        "--database-url", default=DEFAULT_DATABASE_URL,
+        help="Отдельная база для теста: схема удаляется и создаётся заново"
+    )
+    parser.add_argument("--hh-latency-ms", type=float, default=50)
+    parser.add_argument("--tg-latency-ms", type=float, default=30)
+    parser.add_argument("--verbose", action="store_true", help="Показывать логи обработчиков")
+    args = parser.parse_args()
+
+    if args.database_url == settings.database_url:
+        parser.error("--database-url совпадает с рабочей базой; укажите отдельную")
+
+    logging.basicConfig(level=logging.WARNING if args.verbose else logging.CRITICAL)
+    logging.getLogger().setLevel(logging.WARNING if args.verbose else logging.CRITICAL)
+    settings.NOTIFICATION_DELAY_SECONDS = 0
+
+    hh = FakeHHServer(latency=args.hh_latency_ms / 1000)
+    telegram = FakeTelegramServer(latency=args.tg_latency_ms / 1000)
+    settings.HH_API_URL = await hh.start()
+    await telegram.start()
+
+    engine = create_benchmark_engine(args.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    bot = Bot(
+        token=BENCHMARK_BOT_TOKEN,
+        session=AiohttpSession(api=TelegramAPIServer.from_base(telegram.url))
+    )
+    dp = create_dispatcher(session_maker)
+    await dp.emit_startup(bot=bot, dispatcher=dp, **dp.workflow_data)
+
+    # Первичная загрузка новых подписок - в процессе, как при EMBEDDED_SCHEDULER
+    checker_runtime = CheckerRuntime(bot=bot, engine=engine, use_redis=False)
+    await checker_runtime.start()
+    set_embedded_runtime(checker_runtime)
+
+    stats = LoadStats()
+    stop_sampling = asyncio.Event()
+    sampler = asyncio.create_task(sample_pool(engine, stats, stop_sampling))
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            run_user(
+                dp, bot, session_maker, FIRST_USER_ID + i, stats,
+                args.think_ms / 1000, args.distinct_queries
+            )
+            for i in range(args.users)
+        ))
+        elapsed = time.perf_counter() - started
+        await drain_backfills()
+    finally:
+        stop_sampling.set()
+        await sampler
+        set_embedded_runtime(None)
+        await checker_runtime.close()
+        await dp.emit_shutdown(bot=bot, dispatcher=dp, **dp.workflow_data)
+        await bot.session.close()
+        await engine.dispose()
+        await hh.stop()
+        await telegram.stop()
+
+    print_report(stats, elapsed, dp, engine, hh, telegram)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
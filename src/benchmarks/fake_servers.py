@@ -0,0 +1,225 @@
+import asyncio
+import random
+from abc import ABC, abstractmethod
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from aiohttp import web
+
+
+class FakeServer(ABC):
+    """
+    Локальный HTTP-сервер с настраиваемой задержкой и долей ошибок
+
+    :param latency: Задержка ответа, секунд
+    :param error_rate: Доля ответов 500
+    :param rate_limit_rate: Доля ответов 429
+    :param seed: Зерно генератора случайных ошибок
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        seed: int = 0
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.calls: Counter = Counter()
+        self.responses: Counter = Counter()
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self.url: Optional[str] = None
+
+    @abstractmethod
+    def build_app(self) -> web.Application:
+        """Приложение aiohttp с маршрутами заглушки"""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Запустить сервер; при port=0 порт выбирается свободный"""
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def reset(self):
+        self.calls.clear()
+        self.responses.clear()
+
+    async def simulate(self, name: str) -> Optional[web.Response]:
+        """Задержка и случайная ошибка; None - отвечать как обычно"""
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            self.responses[429] += 1
+            return self.rate_limited()
+        if roll < self.rate_limit_rate + self.error_rate:
+            self.responses[500] += 1
+            return self.server_error()
+
+        self.responses[200] += 1
+        return None
+
+    def server_error(self) -> web.Response:
+        return web.json_response({"description": "Internal error"}, status=500)
+
+    def rate_limited(self) -> web.Response:
+        return web.json_response({"description": "Too many requests"}, status=429)
+
+
+class FakeHHServer(FakeServer):
+    """
+    Имитация HH API: /vacancies и /vacancies/{id}
+
+    Выдача детерминирована по тексту запроса и странице, поэтому повторный
+    цикл видит уже сохранённые вакансии, как и в реальной работе.
+    """
+
+    def __init__(self, *args, items_per_query: int = 20, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.items_per_query = items_per_query
+        self.started_at = datetime.utcnow()
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/vacancies", self.search)
+        app.router.add_get("/vacancies/{vacancy_id}", self.details)
+        return app
+
+    def build_item(self, vacancy_id: str, index: int, text: str) -> Dict:
+        published = self.started_at - timedelta(minutes=index)
+        return {
+            "id": vacancy_id,
+            "name": f"{text} developer #{index}",
+            "employer": {"name": f"Company {index % 50}"},
+            "salary": {"from": 100000 + index * 1000, "to": None, "currency": "RUR"},
+            "experience": {"id": "between1And3", "name": "От 1 года до 3 лет"},
+            "area": {"id": "1", "name": "Москва"},
+            "alternate_url": f"https://hh.ru/vacancy/{vacancy_id}",
+            "published_at": published.strftime("%Y-%m-%dT%H:%M:%S+0000"),
+        }
+
+    async def search(self, request: web.Request) -> web.Response:
+        error = await self.simulate("search")
+        if error is not None:
+            return error
+
+        text = request.query.get("text", "")
+        per_page = int(request.query.get("per_page", 20))
+        page = int(request.query.get("page", 0))
+        query_id = zlib.crc32(text.encode())
+
+        start = page * per_page
+        stop = min(start + per_page, self.items_per_query)
+        items = [
+            self.build_item(f"{query_id}{i:04d}", i, text)
+            for i in range(start, stop)
+        ]
+        return web.json_response({
+            "items": items,
+            "found": self.items_per_query,
+            "page": page,
+            "pages": (self.items_per_query + per_page - 1) // per_page,
+            "per_page": per_page,
+        })
+
+    async def details(self, request: web.Request) -> web.Response:
+        error = await self.simulate("vacancy")
+        if error is not None:
+            return error
+
+        vacancy_id = request.match_info["vacancy_id"]
+        item = self.build_item(vacancy_id, 0, "vacancy")
+        item["description"] = "<p>" + "Описание вакансии. " * 100 + "</p>"
+        item["key_skills"] = [{"name": "Python"}, {"name": "PostgreSQL"}]
+        return web.json_response(item)
+
+
+class FakeTelegramServer(FakeServer):
+    """
+    Имитация Bot API для aiogram (TELEGRAM_API_URL / TelegramAPIServer.from_base)
+
+    Отвечает на sendMessage, editMessageText и прочие методы, которые
+    использует бот; 429 возвращается с retry_after, как у Telegram.
+    """
+
+    def __init__(self, *args, retry_after: int = 1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+        self.sent_to: Counter = Counter()
+        self._message_ids = 0
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    def reset(self):
+        super().reset()
+        self.sent_to.clear()
+
+    def rate_limited(self) -> web.Response:
+        return web.json_response({
+            "ok": False,
+            "error_code": 429,
+            "description": f"Too Many Requests: retry after {self.retry_after}",
+            "parameters": {"retry_after": self.retry_after},
+        }, status=429)
+
+    def server_error(self) -> web.Response:
+        return web.json_response({
+            "ok": False,
+            "error_code": 500,
+            "description": "Internal Server Error",
+        }, status=500)
+
+    def build_message(self, chat_id: int, text: str) -> Dict:
+        self._message_ids += 1
+        return {
+            "message_id": self._message_ids,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": 1, "is_bot": True, "first_name": "Bot"},
+            "text": text,
+        }
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        error = await self.simulate(method)
+        if error is not None:
+            return error
+
+        form = await request.post()
+        chat_id = int(form.get("chat_id", 0) or 0)
+
+        if method in ("sendMessage", "editMessageText"):
+            self.sent_to[chat_id] += 1
+            result = self.build_message(chat_id, form.get("text", ""))
+        elif method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Bot", "username": "fake_bot"}
+        elif method == "getUpdates":
+            result = []
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result})
+
+
+def format_counter(counter: Counter) -> str:
+    return ", ".join(f"{key}={value}" for key, value in sorted(counter.items(), key=str)) or "-"
+
@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import itertools
+import time
+from typing import Dict, List
+
+import aiohttp
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+
+
+def build_message_update(user_id: int, text: str) -> Dict:
+    """Синтетический апдейт с текстовым сообщением от пользователя"""
+    user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+    return {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": next(_message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private", "first_name": user["first_name"]},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+def build_callback_update(user_id: int, data: str, message_id: int = 1) -> Dict:
+    """Синтетический апдейт с нажатием inline-кнопки"""
+    user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}", "username": f"user{user_id}"}
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_update_ids)),
+            "from": user,
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private", "first_name": user["first_name"]},
+                "from": {"id": 1, "is_bot": True, "first_name": "Bot"},
+                "text": "...",
+            },
+        },
+    }
+
+
+async def post_updates(url: str, secret: str, updates: List[Dict], concurrency: int) -> List[float]:
+    """
+    Отправка апдейтов на webhook так же, как это делает Telegram
+
+    :return: Время ответа на каждый запрос в секундах
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async with aiohttp.ClientSession() as session:
+        async def post(update: Dict):
+            async with semaphore:
+                started = time.perf_counter()
+                async with session.post(
+                    url,
+                    json=update,
+                    headers={"X-Telegram-Bot-Api-Secret-Token": secret}
+                ) as response:
+                    await response.read()
+                    if response.status != 200:
+                        print(f"update {update['update_id']}: HTTP {response.status}")
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(post(update) for update in updates))
+
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Отправка фейковых апдейтов Telegram на webhook бота")
+    parser.add_argument("--url", default="http://localhost:8080/webhook")
+    parser.add_argument("--secret", required=True)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    updates = []
+    for user_id in range(100000, 100000 + args.users):
+        updates.append(build_message_update(user_id, "/start"))
+        updates.append(build_message_update(user_id, "ℹ️ Помощь"))
+        updates.append(build_message_update(user_id, "📋 Мои подписки"))
+
+    started = time.perf_counter()
+    latencies = sorted(await post_updates(args.url, args.secret, updates, args.concurrency))
+    elapsed = time.perf_counter() - started
+
+    print(f"Отправлено апдейтов: {len(updates)} за {elapsed:.2f} с ({len(updates) / elapsed:.1f}/с)")
+    print(f"p50: {latencies[len(latencies) // 2] * 1000:.1f} мс, "
+          f"p95: {latencies[int(len(latencies) * 0.95)] * 1000:.1f} мс")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
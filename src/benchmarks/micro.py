@@ -0,0 +1,235 @@
+"""
+Микробенчмарки горячих путей обработки вакансий на записанном корпусе выдачи HH.
+
+Работает без сети и БД. Завершается с кодом 1, если скорость упала или память
+на элемент выросла больше порога относительно сохранённого baseline.
+
+Корпус - запись трафика HH (формат HHRecorder) в data/hh_corpus.jsonl; пока
+её нет, используется синтетический data/hh_items_synthetic.json.
+
+    python -m benchmarks.micro                  # сравнить с baseline
+    python -m benchmarks.micro --save-baseline  # записать новый baseline
+    python -m benchmarks.micro --record python  # записать корпус из живого API
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from parser.hh_client import HHClient
+from parser.hh_recording import HHRecorder, decode_body
+from parser.vacancy_service import VacancyService
+from tasks.vacancy_checker import subscription_query_key
+
+DATA_DIR = Path(__file__).parent / "data"
+CORPUS_PATH = DATA_DIR / "hh_corpus.jsonl"
+SYNTHETIC_CORPUS_PATH = DATA_DIR / "hh_items_synthetic.json"
+BASELINE_PATH = DATA_DIR / "micro_baseline.json"
+
+# Города в том виде, в каком их вводят пользователи
+CITY_INPUTS = ["Москва", " казань ", "СПб", "Тюмень", "Лондон", "санкт-петербург", "-", "Уфа"]
+
+SubscriptionRow = namedtuple("SubscriptionRow", "id user_id keywords city experience salary_from")
+
+
+def run_sync(coro) -> Any:
+    """Выполнить корутину, которая не ждёт ввода-вывода, без event loop"""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Coroutine suspended: benchmark must not do I/O")
+
+
+def build_cases(items: List[Dict]) -> Dict[str, Callable[[Dict], Any]]:
+    """Бенчмарк -> функция одного элемента корпуса"""
+    client = HHClient()
+    return {
+        "format_vacancy": HHClient.format_vacancy,
+        "build_vacancy": VacancyService.build_vacancy,
+        "parse_published_at": lambda item: VacancyService.parse_published_at(item["published_at"]),
+        "area_id": lambda item: run_sync(client._get_area_id(CITY_INPUTS[int(item["id"]) % len(CITY_INPUTS)])),
+        "query_key": lambda item: subscription_query_key(SubscriptionRow(
+            int(item["id"]), 1, item["name"], item["area"]["name"], item["experience"]["id"],
+            (item["salary"] or {}).get("from")
+        )),
+    }
+
+
+def reference_case(item: Dict) -> str:
+    """Эталонная нагрузка на чистом Python для поправки на скорость машины"""
+    return "; ".join(f"{key}={value}" for key, value in item.items() if isinstance(value, str))
+
+
+def calibrate_loops(case: Callable[[Dict], Any], items: List[Dict], min_time: float) -> int:
+    """Число проходов по корпусу, которое занимает не меньше min_time"""
+    loops = 1
+    while timed_run(case, items, loops) < min_time:
+        loops *= 2
+    return loops
+
+
+def timed_run(case: Callable[[Dict], Any], items: List[Dict], loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        for item in items:
+            case(item)
+    return time.perf_counter() - started
+
+
+def measure_speed(case: Callable[[Dict], Any], items: List[Dict], rounds: int, min_time: float) -> Tuple[float, float]:
+    """
+    Скорость бенчмарка: лучшая в операциях в секунду и медиана отношения к эталону
+
+    Раунды бенчмарка и эталонной нагрузки чередуются, так что колебания
+    частоты и соседняя нагрузка на машине влияют на оба замера одинаково.
+    """
+    loops = calibrate_loops(case, items, min_time)
+    reference_loops = calibrate_loops(reference_case, items, min_time)
+
+    best = float("inf")
+    ratios = []
+    for _ in range(rounds):
+        elapsed = timed_run(case, items, loops)
+        reference_elapsed = timed_run(reference_case, items, reference_loops)
+        best = min(best, elapsed)
+        ratios.append((reference_elapsed / reference_loops) / (elapsed / loops))
+    return loops * len(items) / best, statistics.median(ratios)
+
+
+def measure_memory(case: Callable[[Dict], Any], items: List[Dict]) -> float:
+    """Средний пик выделенной памяти на один элемент, байт"""
+    tracemalloc.start()
+    try:
+        total = 0
+        for item in items:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            case(item)
+            total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / len(items)
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """
+    Описание регрессий относительно baseline
+
+    Скорость сравнивается относительно эталонной нагрузки, замеренной
+    рядом с каждым бенчмарком, поэтому baseline переносим между машинами.
+    """
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        if result["relative_speed"] < expected["relative_speed"] * (1 - threshold):
+            regressions.append(
+                f"{name}: {result['relative_speed']:.3f} x reference < baseline {expected['relative_speed']:.3f}"
+            )
+        if result["bytes_per_item"] > expected["bytes_per_item"] * (1 + threshold):
+            regressions.append(
+                f"{name}: {result['bytes_per_item']:.0f} B/item > baseline {expected['bytes_per_item']:.0f}"
+            )
+    return regressions
+
+
+async def record_corpus(queries: List[str], pages: int):
+    """Записать корпус из живого HH API через HHRecorder (заменяет прежнюю запись)"""
+    CORPUS_PATH.unlink(missing_ok=True)
+    recorder = HHRecorder(str(CORPUS_PATH))
+    try:
+        async with HHClient(recorder=recorder) as client:
+            for query in queries:
+                for page in range(pages):
+                    await client.search_vacancies(text=query, per_page=100, page=page)
+    finally:
+        recorder.close()
+    if not recorder.records:
+        sys.exit("HH не ответил ни на один запрос, корпус не записан")
+    print(f"Записано {recorder.records} ответов HH в {CORPUS_PATH}, вакансий: {len(load_corpus()[0])}")
+
+
+def load_corpus() -> Tuple[List[Dict], Path]:
+    """
+    Вакансии корпуса: из записи трафика HH, а если её нет - синтетические
+
+    :return: Вакансии (без повторов) и файл, из которого они взяты
+    """
+    if not CORPUS_PATH.exists():
+        return json.loads(SYNTHETIC_CORPUS_PATH.read_text()), SYNTHETIC_CORPUS_PATH
+
+    items: Dict[str, Dict] = {}
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["status"] != 200 or record["path"] != "/vacancies":
+                continue
+            for item in (decode_body(record["body"]) or {}).get("items", []):
+                items.setdefault(item["id"], item)
+    return list(items.values()), CORPUS_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки обработки вакансий")
+    parser.add_argument("--threshold", type=float, default=0.3, help="Допустимое ухудшение (доля)")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Минимальная длительность раунда, с")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--record", metavar="QUERY", nargs="+",
+        help="Записать корпус из живого API по запросам (после записи обновите baseline)"
+    )
+    parser.add_argument("--record-pages", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record_corpus(args.record, args.record_pages))
+        return
+
+    items, corpus_path = load_corpus()
+    results = {}
+    print(f"Корпус: {len(items)} вакансий ({corpus_path.name})")
+    if corpus_path == SYNTHETIC_CORPUS_PATH:
+        print("Записи HH нет: корпус синтетический, форма и размер ответов могут отличаться от живых")
+    print(f"{'бенчмарк':<20} {'ops/s':>12} {'x эталон':>9} {'B/элемент':>10}")
+    for name, case in build_cases(items).items():
+        ops, relative_speed = measure_speed(case, items, args.rounds, args.min_time)
+        results[name] = {
+            "ops_per_sec": round(ops),
+            "relative_speed": round(relative_speed, 4),
+            "bytes_per_item": round(measure_memory(case, items)),
+        }
+        result = results[name]
+        print(
+            f"{name:<20} {result['ops_per_sec']:>12} {result['relative_speed']:>9.3f} "
+            f"{result['bytes_per_item']:>10}"
+        )
+
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Baseline сохранён в {BASELINE_PATH}")
+        return
+
+    if not BASELINE_PATH.exists():
+        print("Baseline не найден, сравнение пропущено (--save-baseline)")
+        return
+
+    regressions = compare(results, json.loads(BASELINE_PATH.read_text()), args.threshold)
+    if regressions:
+        print("\nРегрессии:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nРегрессий нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 import os
 from dotenv import load_dotenv
 
@@ -9,17 +10,128 @@ class Settings(BaseSettings):
     
     BOT_TOKEN: str = os.getenv("BOT_TOKEN")
     ADMIN_ID: int = os.getenv("ADMIN_ID")
+    # Адрес локального Bot API сервера или заглушки Telegram
+    TELEGRAM_API_URL: Optional[str] = None
+    
+    # polling или webhook
+    BOT_MODE: str = "polling"
+    WEBHOOK_BASE_URL: Optional[str] = None
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: Optional[str] = None
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    # Сколько соединений Telegram открывает к webhook одновременно
+    WEBHOOK_MAX_CONNECTIONS: int = 40
+    # Сколько апдейтов реплика обрабатывает одновременно
+    WEBHOOK_CONCURRENCY: int = 100
+    WEBHOOK_SET_ON_STARTUP: bool = True
     
     DB_HOST: str = os.getenv("DB_HOST")
     DB_PORT: int = os.getenv("DB_PORT")
     DB_NAME: str = os.getenv("DB_NAME")
     DB_USER: str = os.getenv("DB_USER")
     DB_PASSWORD: str = os.getenv("DB_PASSWORD")
+    # Пул соединений общий для всех обработчиков процесса
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 3600
+    # Воркеру Celery достаточно пары соединений на процесс
+    DB_WORKER_POOL_SIZE: int = 2
+    DB_STATEMENT_TIMEOUT_MS: int = 30000
+    # 0 отключает кеш подготовленных выражений asyncpg (нужно за pgbouncer)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_SLOW_QUERY_MS: int = 500
+    DB_ECHO: bool = False
+    
+    # Порт эндпоинта /metrics для Prometheus; не задан - метрики не публикуются
+    METRICS_PORT: Optional[int] = None
+    # Спаны по этапам обработки подписок в логе hh_jobs.spans
+    TRACE_SPANS: bool = False
+    # Профилировать каждый цикл проверки (иначе - только по /profile_cycle)
+    PROFILE_CYCLES: bool = False
+    PROFILE_DIR: str = "profiles"
     
-    REDIS_HOST: str = os.getenv("REDIS_HOST")
-    REDIS_PORT: int = os.getenv("REDIS_PORT")
+    # Не задан - одиночный процесс без Redis (EMBEDDED_SCHEDULER или tasks.scheduler)
+    REDIS_HOST: Optional[str] = os.getenv("REDIS_HOST")
+    REDIS_PORT: int = os.getenv("REDIS_PORT", 6379)
+    
+    # memory или redis (нужно для webhook с несколькими репликами)
+    FSM_STORAGE: str = "memory"
+    FSM_REDIS_DB: int = 1
+    # Незавершённые диалоги (мастер подписки, просмотр) живут сутки
+    FSM_STATE_TTL_SECONDS: int = 86400
     
     HH_API_URL: str = "https://api.hh.ru"
+    # Запись ответов HH в JSONL (для офлайн-бенчмарков) и воспроизведение записи вместо сети
+    HH_RECORD_PATH: Optional[str] = None
+    HH_REPLAY_PATH: Optional[str] = None
+    # Во сколько раз быстрее записи отвечать при воспроизведении (0 - без задержек)
+    HH_REPLAY_SPEED: float = 1.0
+    # Одновременные запросы к HH: лимит растёт на 1 за окно быстрых ответов и умножается
+    # на HH_CONCURRENCY_BACKOFF при 429/5xx, сетевой ошибке или ответе дольше HH_LATENCY_TARGET_SECONDS
+    HH_CONCURRENCY_INITIAL: int = 4
+    HH_CONCURRENCY_MIN: int = 1
+    HH_CONCURRENCY_MAX: int = 16
+    HH_LATENCY_TARGET_SECONDS: float = 2.0
+    HH_CONCURRENCY_BACKOFF: float = 0.5
+    # Сколько живут загруженные страницы в режиме просмотра вакансий
+    BROWSE_PAGE_TTL_SECONDS: int = 300
+    # Просмотр из локальной базы, если подписку проверяли не раньше, чем столько минут назад (0 - всегда HH)
+    BROWSE_LOCAL_MAX_AGE_MINUTES: int = 30
+    
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 300
+    # Общий уровень кеша пользователей в Redis (для нескольких реплик бота)
+    USER_CACHE_REDIS: bool = False
+    
+    # Нажатий inline-кнопок в секунду на пользователя и допустимая серия подряд
+    CALLBACK_RATE_PER_SECOND: float = 1.0
+    CALLBACK_BURST: int = 5
+    
+    CHECK_INTERVAL_MINUTES: int = 15
+    CHECK_LOCK_TTL_SECONDS: int = 60
+    CHECK_JITTER_SECONDS: int = 30
+    # Пауза между уведомлениями, чтобы не упираться в лимиты Telegram
+    NOTIFICATION_DELAY_SECONDS: float = 0.5
+    SUBSCRIPTION_CHUNK_SIZE: int = 500
+    # Сколько поисков следующих подписок цикл запускает заранее (0 - строго по одной)
+    CHECK_PREFETCH_SEARCHES: int = 32
+    # Перекрытие водяного знака на случай запоздалой индексации вакансий в HH
+    WATERMARK_OVERLAP_MINUTES: int = 60
+    
+    # Детали (описание, навыки) вакансий грузятся по кнопке «📄 Подробнее». DETAILS_ENRICH включает
+    # загрузку заранее: отдельной задачей после отправки, вне цикла проверки; ниже - лимиты запросов к HH
+    DETAILS_ENRICH: bool = False
+    DETAILS_CONCURRENCY: int = 4
+    DETAILS_RATE_PER_SECOND: float = 5.0
+    # Очередь Celery для загрузки деталей (задачи идут с низшим приоритетом, после первичных загрузок)
+    DETAILS_QUEUE: str = "backfill"
+    
+    # REST API только для чтения (python -m api.main)
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    # Bearer-токен для API; без него API открыт всем, кто видит порт
+    API_TOKEN: Optional[str] = None
+    API_DB_POOL_SIZE: int = 5
+    # Сколько секунд отдавать ответ API из кеша
+    API_CACHE_TTL_SECONDS: int = 10
+    API_CACHE_SIZE: int = 1000
+    
+    # Запуск цикла проверки внутри процесса бота вместо Celery
+    EMBEDDED_SCHEDULER: bool = False
+    # Первичная загрузка новых подписок в процессе бота, без очереди backfill
+    # (для python -m tasks.scheduler, где воркеров Celery нет)
+    BACKFILL_IN_PROCESS: bool = False
+    SCHEDULER_SHUTDOWN_TIMEOUT: int = 30
+    
+    @property
+    def redis_url(self) -> str:
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/0"
+    
+    @property
+    def fsm_redis_url(self) -> str:
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}/{self.FSM_REDIS_DB}"
     
     @property
     def database_url(self) -> str:
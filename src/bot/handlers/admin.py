@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from aiogram import Router, F
+from aiogram.filters import Command
+from aiogram.types import Message
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bot.config import settings
+from profiling import request_cycle_profile
+from tasks.cycle_report import load_recent_reports, percentile
+
+router = Router()
+# Команды администратора доступны только ADMIN_ID
+router.message.filter(F.from_user.id == settings.ADMIN_ID)
+
+
+@router.message(Command("profile_cycle"))
+async def cmd_profile_cycle(message: Message):
+    """Профилировать следующий цикл проверки вакансий"""
+    redis = Redis.from_url(settings.redis_url)
+    try:
+        await request_cycle_profile(redis)
+    except Exception as e:
+        await message.answer(f"❌ Не удалось записать запрос в Redis: {e}")
+        return
+    finally:
+        await redis.aclose()
+    
+    await message.answer(
+        "🔬 Следующий цикл проверки будет профилирован.\n"
+        f"Отчёт появится в каталоге <code>{settings.PROFILE_DIR}</code> воркера."
+    )
+
+
+@router.message(Command("admin_stats"))
+async def cmd_admin_stats(message: Message, session: AsyncSession):
+    """Сводка по последним циклам проверки из cycle_reports"""
+    now = datetime.utcnow()
+    reports = await load_recent_reports(session, since=now - timedelta(days=7))
+    
+    if not reports:
+        await message.answer("📊 Отчётов о циклах проверки пока нет")
+        return
+    
+    day = [report for report in reports if report.started_at >= now - timedelta(days=1)]
+    
+    lines = ["📊 <b>Циклы проверки</b>\n"]
+    for title, period in (("24 ч", day), ("7 дней", reports)):
+        durations = [report.duration_seconds for report in period]
+        lines.append(
+            f"За {title}: {len(period)} циклов, "
+            f"p50 {percentile(durations, 0.5):.1f} с, p95 {percentile(durations, 0.95):.1f} с"
+        )
+    
+    hh_calls = sum(report.hh_calls for report in day)
+    cache_hits = sum(report.cache_hits for report in day)
+    searches = hh_calls + cache_hits
+    hit_share = f" ({cache_hits / searches:.0%})" if searches else ""
+    lines.append(
+        f"\nЗа 24 ч: новых вакансий {sum(report.new_vacancies for report in day)}, "
+        f"отправлено {sum(report.messages_sent for report in day)}, "
+        f"ошибок {sum(report.failures for report in day)}\n"
+        f"Запросов к HH {hh_calls}, из кеша {cache_hits}{hit_share}"
+    )
+    
+    lines.append("\n<b>Последние циклы</b>")
+    rows = ["дата (UTC)    сек   подп  запр   HH   нов  отпр ошиб"]
+    for report in reports[:10]:
+        rows.append(
+            f"{report.started_at:%d.%m %H:%M} {report.duration_seconds:>5.0f} {report.subscriptions:>6} "
+            f"{report.distinct_queries:>5} {report.hh_calls:>5} {report.new_vacancies:>5} "
+            f"{report.messages_sent:>5} {report.failures:>4}"
+        )
+    lines.append("<pre>" + "\n".join(rows) + "</pre>")
+    
+    await message.answer("\n".join(lines))
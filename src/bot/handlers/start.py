@@ -1,31 +1,35 @@
 from aiogram import Router, F
 from aiogram.filters import CommandStart, Command
 from aiogram.types import Message
-from sqlalchemy import select
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import User
 from bot.keyboards.main_kb import get_main_keyboard
+from bot.middlewares.user_identity import UserIdentity, UserIdentityCache
 
 router = Router()
 
 
 @router.message(CommandStart())
-async def cmd_start(message: Message, session: AsyncSession):
+async def cmd_start(
+    message: Message,
+    session: AsyncSession,
+    user: Optional[UserIdentity],
+    user_cache: UserIdentityCache
+):
     """Обработчик команды /start"""
     
-    result = await session.execute(
-        select(User).where(User.telegram_id == message.from_user.id)
-    )
-    user = result.scalar_one_or_none()
-    
     if not user:
-        user = User(
+        new_user = User(
             telegram_id=message.from_user.id,
-            username=message.from_user.username
+            username=message.from_user.username,
+            is_active=True
         )
-        session.add(user)
+        session.add(new_user)
         await session.commit()
+        await user_cache.set(UserIdentity.from_model(new_user))
     
     await message.answer(
         f"👋 Привет, {message.from_user.first_name}!\n\n"
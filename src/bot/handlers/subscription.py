@@ -1,19 +1,58 @@
+import html
+
 from aiogram import Router, F
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
-from sqlalchemy import select
+from aiogram.exceptions import TelegramBadRequest
+from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
-import asyncio
 from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
-from database.models import User, Subscription, Vacancy
-from bot.keyboards.main_kb import get_main_keyboard, get_cancel_keyboard, get_subscription_actions
+from database.models import Subscription, SubscriptionWatermark, Vacancy
+from bot.keyboards.main_kb import get_main_keyboard, get_cancel_keyboard, get_subscriptions_list_keyboard
+from bot.middlewares.user_identity import UserIdentity
 from bot.states.subscription_states import SubscriptionStates
+from bot.config import settings
+from metrics import CACHE_REQUESTS
 from parser.hh_client import HHClient
+from parser.vacancy_pages import VacancyPageLoader
+from parser.vacancy_service import VacancyService
 from bot.states.vacancy_view_states import VacancyViewStates
+from tasks.backfill import enqueue_backfill
 
 router = Router()
 
+SUBSCRIPTIONS_PAGE_SIZE = 5
+VACANCIES_PAGE_SIZE = 5
+VACANCY_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+MESSAGE_MAX_LENGTH = 4096
+
+
+def truncate_vacancy(vacancy: dict, max_length: int) -> str:
+    """
+    Вакансия, отформатированная не длиннее max_length
+    
+    Укорачиваются название и компания, а не готовый HTML, чтобы не разорвать разметку.
+    """
+    vacancy = dict(vacancy, employer=dict(vacancy.get("employer") or {}))
+    formatted = HHClient.format_vacancy(vacancy)
+    while len(formatted) > max_length:
+        name = vacancy.get("name") or ""
+        company = vacancy["employer"].get("name") or ""
+        longest = name if len(name) >= len(company) else company
+        # Лишнее считается в экранированном тексте: & занимает пять символов
+        excess = (len(formatted) - max_length) * len(longest) // len(html.escape(longest)) + 1
+        shortened = longest[:max(1, len(longest) - excess - 1)] + "…"
+        if len(shortened) >= len(longest):
+            break
+        if longest is name:
+            vacancy["name"] = shortened
+        else:
+            vacancy["employer"]["name"] = shortened
+        formatted = HHClient.format_vacancy(vacancy)
+    return formatted
+
 
 @router.message(F.text == "➕ Добавить подписку")
 async def start_subscription(message: Message, state: FSMContext):
@@ -120,7 +159,12 @@ async def process_experience(message: Message, state: FSMContext):
 
 
 @router.message(SubscriptionStates.waiting_for_salary)
-async def process_salary(message: Message, state: FSMContext, session: AsyncSession):
+async def process_salary(
+    message: Message,
+    state: FSMContext,
+    session: AsyncSession,
+    user: Optional[UserIdentity]
+):
     """Обработка зарплаты и сохранение подписки"""
     if message.text == "❌ Отменить":
         await state.clear()
@@ -147,10 +191,10 @@ async def process_salary(message: Message, state: FSMContext, session: AsyncSess
     
     data = await state.get_data()
     
-    result = await session.execute(
-        select(User).where(User.telegram_id == message.from_user.id)
-    )
-    user = result.scalar_one()
+    if not user:
+        await state.clear()
+        await message.answer("❌ Пользователь не найден. Отправьте /start")
+        return
     
     subscription = Subscription(
         user_id=user.id,
@@ -164,15 +208,17 @@ async def process_salary(message: Message, state: FSMContext, session: AsyncSess
     session.add(subscription)
     await session.commit()
     
+    await enqueue_backfill(subscription.id)
+    
     await state.clear()
     
     confirmation = (
         "✅ <b>Подписка успешно создана!</b>\n\n"
-        f"🔍 Ключевые слова: <code>{data['keywords']}</code>\n"
+        f"🔍 Ключевые слова: <code>{html.escape(data['keywords'])}</code>\n"
     )
     
     if data.get('city'):
-        confirmation += f"🏙 Город: <code>{data['city']}</code>\n"
+        confirmation += f"🏙 Город: <code>{html.escape(data['city'])}</code>\n"
     
     experience_text = {
         "noExperience": "Без опыта",
@@ -195,27 +241,16 @@ async def process_salary(message: Message, state: FSMContext, session: AsyncSess
 
 
 @router.message(F.text == "📋 Мои подписки")
-async def show_subscriptions(message: Message, session: AsyncSession):
-    """Показать все подписки пользователя"""
-    
-    result = await session.execute(
-        select(User).where(User.telegram_id == message.from_user.id)
-    )
-    user = result.scalar_one_or_none()
+async def show_subscriptions(message: Message, session: AsyncSession, user: Optional[UserIdentity]):
+    """Показать подписки пользователя одним сообщением со страницами"""
     
     if not user:
         await message.answer("❌ Пользователь не найден")
         return
     
-    result = await session.execute(
-        select(Subscription).where(
-            Subscription.user_id == user.id,
-            Subscription.is_active == True
-        )
-    )
-    subscriptions = result.scalars().all()
+    page = await render_subscriptions_page(session, user.id, 0)
     
-    if not subscriptions:
+    if page is None:
         await message.answer(
             "📭 У вас пока нет активных подписок.\n\n"
             "Нажмите <b>➕ Добавить подписку</b> чтобы создать первую!",
@@ -223,6 +258,47 @@ async def show_subscriptions(message: Message, session: AsyncSession):
         )
         return
     
+    text, keyboard = page
+    await message.answer(text, reply_markup=keyboard)
+
+
+async def render_subscriptions_page(
+    session: AsyncSession,
+    user_id: int,
+    page: int
+) -> Optional[Tuple[str, InlineKeyboardMarkup]]:
+    """
+    Текст и клавиатура одной страницы списка подписок
+    
+    :param session: Сессия БД
+    :param user_id: ID пользователя в БД
+    :param page: Номер страницы (если страниц меньше, показывается последняя)
+    :return: Текст и клавиатура или None, если подписок нет
+    """
+    total = await session.scalar(
+        select(func.count(Subscription.id)).where(
+            Subscription.user_id == user_id,
+            Subscription.is_active == True
+        )
+    )
+    
+    if not total:
+        return None
+    
+    total_pages = (total + SUBSCRIPTIONS_PAGE_SIZE - 1) // SUBSCRIPTIONS_PAGE_SIZE
+    page = max(0, min(page, total_pages - 1))
+    
+    result = await session.execute(
+        select(Subscription).where(
+            Subscription.user_id == user_id,
+            Subscription.is_active == True
+        )
+        .order_by(Subscription.id)
+        .offset(page * SUBSCRIPTIONS_PAGE_SIZE)
+        .limit(SUBSCRIPTIONS_PAGE_SIZE)
+    )
+    subscriptions = result.scalars().all()
+    
     experience_text = {
         "noExperience": "Без опыта",
         "between1And3": "1-3 года",
@@ -230,11 +306,14 @@ async def show_subscriptions(message: Message, session: AsyncSession):
         "moreThan6": "Более 6 лет"
     }
     
-    for i, sub in enumerate(subscriptions, 1):
-        response = f"<b>{i}.</b> 🔍 <code>{sub.keywords}</code>\n"
+    first_number = page * SUBSCRIPTIONS_PAGE_SIZE + 1
+    response = f"📋 <b>Ваши подписки</b> ({total}):\n\n"
+    
+    for i, sub in enumerate(subscriptions, first_number):
+        response += f"<b>{i}.</b> 🔍 <code>{html.escape(sub.keywords)}</code>\n"
         
         if sub.city:
-            response += f"   🏙 {sub.city}\n"
+            response += f"   🏙 {html.escape(sub.city)}\n"
         
         if sub.experience:
             response += f"   💼 {experience_text.get(sub.experience, sub.experience)}\n"
@@ -242,21 +321,66 @@ async def show_subscriptions(message: Message, session: AsyncSession):
         if sub.salary_from:
             response += f"   💰 От {sub.salary_from:,} руб.\n"
         
-        await message.answer(
-            response,
-            reply_markup=get_subscription_actions(sub.id)
-        )
+        response += "\n"
+    
+    response += "🗑 - удалить, ⏸ - приостановить подписку с указанным номером"
+    
+    keyboard = get_subscriptions_list_keyboard(
+        [sub.id for sub in subscriptions], page, total_pages, first_number
+    )
+    return response, keyboard
+
+
+async def edit_subscriptions_list(callback: CallbackQuery, session: AsyncSession, user_id: int, page: int):
+    """Перерисовать список подписок в том же сообщении"""
+    rendered = await render_subscriptions_page(session, user_id, page)
+    
+    if rendered is None:
+        text, keyboard = "📭 Активных подписок не осталось.", None
+    else:
+        text, keyboard = rendered
+    
+    try:
+        await callback.message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        # Повторное нажатие на ту же страницу: содержимое не изменилось
+        if "message is not modified" not in str(e):
+            raise
+
+
+def parse_subscription_action(data: str) -> Tuple[int, int]:
+    """
+    ID подписки и страница списка из callback_data вида delete_sub_<id>_<page>
+    
+    Кнопки старого формата без страницы (delete_sub_<id>) тоже поддерживаются.
+    """
+    parts = data.split("_")
+    if len(parts) == 4:
+        return int(parts[2]), int(parts[3])
+    return int(parts[2]), 0
+
+
+@router.callback_query(F.data.startswith("subs_page_"))
+async def show_subscriptions_page(callback: CallbackQuery, session: AsyncSession, user: Optional[UserIdentity]):
+    """Переключение страницы списка подписок"""
+    if not user:
+        await callback.answer("❌ Пользователь не найден")
+        return
+    
+    page = int(callback.data.split("_")[-1])
+    await edit_subscriptions_list(callback, session, user.id, page)
+    await callback.answer()
 
 
 @router.message(F.text == "🔍 Просмотр вакансий")
-async def choose_subscription_for_view(message: Message, session: AsyncSession, state: FSMContext):
+async def choose_subscription_for_view(
+    message: Message,
+    session: AsyncSession,
+    state: FSMContext,
+    user: Optional[UserIdentity]
+):
     """Выбор подписки для просмотра вакансий"""
     
-    result = await session.execute(
-        select(User).where(User.telegram_id == message.from_user.id)
-    )
-    user = result.scalar_one_or_none()
-    
     if not user:
         await message.answer("❌ Пользователь не найден")
         return
@@ -292,7 +416,12 @@ async def choose_subscription_for_view(message: Message, session: AsyncSession,
 
 
 @router.callback_query(F.data.startswith("view_sub_"))
-async def view_subscription_vacancies(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
+async def view_subscription_vacancies(
+    callback: CallbackQuery,
+    session: AsyncSession,
+    state: FSMContext,
+    vacancy_pages: VacancyPageLoader
+):
     """Просмотр вакансий по выбранной подписке"""
     
     subscription_id = int(callback.data.split("_")[-1])
@@ -309,66 +438,130 @@ async def view_subscription_vacancies(callback: CallbackQuery, session: AsyncSes
     # Сохраняем ID подписки и текущую страницу в состояние
     await state.update_data(
         subscription_id=subscription_id,
-        current_page=0
+        current_page=0,
+        source=None
     )
     await state.set_state(VacancyViewStates.viewing_vacancies)
     
     await callback.message.edit_text(
-        f"🔄 Ищу вакансии по запросу:\n<code>{subscription.keywords}</code>",
+        f"🔄 Ищу вакансии по запросу:\n<code>{html.escape(subscription.keywords)}</code>",
         parse_mode="HTML"
     )
+    await callback.answer()
     
     # Показываем первые 5 вакансий
-    await show_vacancies_page(callback.message, session, state, subscription)
+    await show_vacancies_page(callback.message, session, state, subscription, vacancy_pages)
 
 
-async def show_vacancies_page(message, session: AsyncSession, state: FSMContext, subscription: Subscription):
-    """Показать страницу с 5 вакансиями"""
+async def is_stored_data_fresh(session: AsyncSession, subscription_id: int) -> bool:
+    """Проверялась ли подписка недавно (тогда её вакансии уже есть в базе)"""
+    if not settings.BROWSE_LOCAL_MAX_AGE_MINUTES:
+        return False
+    watermark = await session.get(SubscriptionWatermark, subscription_id)
+    return bool(
+        watermark and watermark.checked_at
+        and watermark.checked_at >= datetime.utcnow() - timedelta(minutes=settings.BROWSE_LOCAL_MAX_AGE_MINUTES)
+    )
+
+
+async def load_stored_page(
+    session: AsyncSession,
+    state: FSMContext,
+    subscription: Subscription,
+    current_page: int
+) -> Optional[Tuple[List[dict], int, bool]]:
+    """
+    Страница просмотра из сохранённых вакансий
+    
+    Листание идёт курсором (published_at, id) последней показанной
+    вакансии, который хранится в состоянии диалога.
+    
+    :return: Вакансии, всего найдено и есть ли ещё страницы;
+        None, если первая страница пуста и нужно идти в HH
+    """
+    data = await state.get_data()
+    after = None
+    if current_page > 0 and data.get('stored_cursor'):
+        published_at, vacancy_id = data['stored_cursor']
+        after = (datetime.fromisoformat(published_at), vacancy_id)
+    
+    rows = await VacancyService.search_stored(session, subscription, VACANCIES_PAGE_SIZE + 1, after)
+    if not rows and current_page == 0:
+        return None
+    
+    has_more = len(rows) > VACANCIES_PAGE_SIZE
+    rows = rows[:VACANCIES_PAGE_SIZE]
+    total_found = data.get('total_found') if current_page > 0 else None
+    if total_found is None:
+        total_found = await VacancyService.count_stored(session, subscription)
+    
+    cursor = [rows[-1].published_at.isoformat(), rows[-1].id] if rows else None
+    await state.update_data(source="stored", stored_cursor=cursor, total_found=total_found)
+    return [VacancyService.to_hh_item(row) for row in rows], total_found, has_more
+
+
+async def show_vacancies_page(
+    message: Message,
+    session: AsyncSession,
+    state: FSMContext,
+    subscription: Subscription,
+    vacancy_pages: VacancyPageLoader
+):
+    """
+    Показать страницу с 5 вакансиями одним сообщением, редактируя его на месте
+    
+    Если подписку недавно проверял цикл, вакансии берутся из базы
+    (полнотекстовый поиск), иначе - из HH API.
+    """
     
     data = await state.get_data()
     current_page = data.get('current_page', 0)
     
-    # Получаем вакансии из HH API
-    async with HHClient() as client:
-        vacancies_data = await client.search_vacancies(
-            text=subscription.keywords,
-            area=subscription.city,
-            experience=subscription.experience,
-            salary=subscription.salary_from,
-            per_page=5,
-            page=current_page
-        )
-    
-    items = vacancies_data.get('items', [])
-    total_found = vacancies_data.get('found', 0)
+    stored = None
+    if current_page > 0:
+        use_stored = data.get('source') == 'stored'
+    else:
+        use_stored = await is_stored_data_fresh(session, subscription.id)
+    if use_stored:
+        stored = await load_stored_page(session, state, subscription, current_page)
+    CACHE_REQUESTS.labels("browse_stored", "miss" if stored is None else "hit").inc()
+    
+    if stored is not None:
+        items, total_found, pages_available = stored
+    else:
+        await state.update_data(source="hh")
+        vacancies_data = await vacancy_pages.get_page(subscription, current_page)
+        items = vacancies_data.get('items', [])
+        total_found = vacancies_data.get('found', 0)
+        # Проверяем, есть ли ещё страницы
+        pages_available = (current_page + 1) * VACANCIES_PAGE_SIZE < total_found
     
     if not items:
-        await message.answer(
-            "😔 Вакансий не найдено или закончились результаты.",
-            reply_markup=get_main_keyboard()
-        )
+        await message.edit_text("😔 Вакансий не найдено или закончились результаты.")
         await state.clear()
         return
     
-    # Отправляем информацию о количестве
-    await message.answer(
+    if pages_available and stored is None:
+        # Пока пользователь читает, загружаем следующую страницу
+        vacancy_pages.prefetch(subscription, current_page + 1)
+    
+    text = (
         f"📊 Найдено: <b>{total_found}</b> вакансий\n"
-        f"Страница {current_page + 1}, показываю {len(items)} вакансий:",
-        parse_mode="HTML"
+        f"Страница {current_page + 1}, показываю {len(items)} вакансий:"
     )
-    
-    # Отправляем каждую вакансию
-    for vacancy in items:
+    for index, vacancy in enumerate(items):
         formatted = HHClient.format_vacancy(vacancy)
-        await message.answer(formatted, disable_web_page_preview=True)
-        await asyncio.sleep(0.3)
+        room = MESSAGE_MAX_LENGTH - len(text) - len(VACANCY_SEPARATOR)
+        if len(formatted) > room:
+            if index:
+                break
+            # Первая вакансия попадает на страницу всегда, иначе страница была бы пустой
+            formatted = truncate_vacancy(vacancy, room)
+        text += VACANCY_SEPARATOR + formatted
     
     # Кнопки для навигации
     buttons = []
     
-    # Проверяем, есть ли ещё страницы
-    pages_available = (current_page + 1) * 5 < total_found
-    
     if pages_available:
         buttons.append([
             InlineKeyboardButton(
@@ -386,14 +579,20 @@ async def show_vacancies_page(message, session: AsyncSession, state: FSMContext,
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=buttons)
     
-    await message.answer(
-        "Выберите действие:",
-        reply_markup=keyboard
+    await message.edit_text(
+        text,
+        reply_markup=keyboard,
+        disable_web_page_preview=True
     )
 
 
 @router.callback_query(F.data.startswith("next_page_"))
-async def show_next_page(callback: CallbackQuery, session: AsyncSession, state: FSMContext):
+async def show_next_page(
+    callback: CallbackQuery,
+    session: AsyncSession,
+    state: FSMContext,
+    vacancy_pages: VacancyPageLoader
+):
     """Показать следующие 5 вакансий"""
     
     subscription_id = int(callback.data.split("_")[-1])
@@ -413,10 +612,10 @@ async def show_next_page(callback: CallbackQuery, session: AsyncSession, state:
     current_page = data.get('current_page', 0) + 1
     await state.update_data(current_page=current_page)
     
-    await callback.answer("🔄 Загружаю следующие вакансии...")
+    await callback.answer()
     
-    # Показываем следующую страницу
-    await show_vacancies_page(callback.message, session, state, subscription)
+    # Показываем следующую страницу в том же сообщении
+    await show_vacancies_page(callback.message, session, state, subscription, vacancy_pages)
 
 
 @router.callback_query(F.data == "finish_viewing")
@@ -431,9 +630,9 @@ async def finish_viewing(callback: CallbackQuery, state: FSMContext):
 
 
 @router.callback_query(F.data.startswith("delete_sub_"))
-async def delete_subscription(callback: CallbackQuery, session: AsyncSession):
+async def delete_subscription(callback: CallbackQuery, session: AsyncSession, user: Optional[UserIdentity]):
     """Удаление подписки"""
-    subscription_id = int(callback.data.split("_")[-1])
+    subscription_id, page = parse_subscription_action(callback.data)
     
     # Получаем подписку
     result = await session.execute(
@@ -441,55 +640,44 @@ async def delete_subscription(callback: CallbackQuery, session: AsyncSession):
     )
     subscription = result.scalar_one_or_none()
     
-    if not subscription:
+    if not subscription or not user or subscription.user_id != user.id:
         await callback.answer("❌ Подписка не найдена")
         return
     
-    # Помечаем как неактивную
     await session.delete(subscription)
+    await session.execute(
+        delete(SubscriptionWatermark).where(SubscriptionWatermark.subscription_id == subscription_id)
+    )
     await session.commit()
     
-    await callback.message.edit_text(
-        f"🗑 Подписка удалена:\n\n"
-        f"🔍 <code>{subscription.keywords}</code>",
-        parse_mode="HTML"
-    )
+    await edit_subscriptions_list(callback, session, user.id, page)
     await callback.answer("✅ Подписка удалена")
 
 
 @router.callback_query(F.data.startswith("pause_sub_"))
-async def pause_subscription(callback: CallbackQuery, session: AsyncSession):
+async def pause_subscription(callback: CallbackQuery, session: AsyncSession, user: Optional[UserIdentity]):
     """Приостановка подписки"""
-    subscription_id = int(callback.data.split("_")[-1])
+    subscription_id, page = parse_subscription_action(callback.data)
     
     result = await session.execute(
         select(Subscription).where(Subscription.id == subscription_id)
     )
     subscription = result.scalar_one_or_none()
     
-    if not subscription:
+    if not subscription or not user or subscription.user_id != user.id:
         await callback.answer("❌ Подписка не найдена")
         return
     
     subscription.is_active = False
     await session.commit()
     
-    await callback.message.edit_text(
-        f"⏸ Подписка приостановлена:\n\n"
-        f"🔍 <code>{subscription.keywords}</code>",
-        parse_mode="HTML"
-    )
+    await edit_subscriptions_list(callback, session, user.id, page)
     await callback.answer("✅ Подписка приостановлена")
 
 @router.message(F.text == "📊 Статистика")
-async def show_statistics(message: Message, session: AsyncSession):
+async def show_statistics(message: Message, session: AsyncSession, user: Optional[UserIdentity]):
     """Показать статистику по вакансиям"""
     
-    result = await session.execute(
-        select(User).where(User.telegram_id == message.from_user.id)
-    )
-    user = result.scalar_one_or_none()
-    
     if not user:
         await message.answer("❌ Пользователь не найден")
         return
@@ -502,7 +690,6 @@ async def show_statistics(message: Message, session: AsyncSession):
     )
     active_subs = len(result.scalars().all())
     
-    from sqlalchemy import func
     result = await session.execute(
         select(func.count(Vacancy.id))
     )
@@ -0,0 +1,26 @@
+from aiogram import Router, F
+from aiogram.types import CallbackQuery
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from parser.vacancy_details import VacancyDetailsEnricher, format_details
+
+router = Router()
+
+
+@router.callback_query(F.data.startswith("details_"))
+async def show_vacancy_details(
+    callback: CallbackQuery,
+    session: AsyncSession,
+    vacancy_details: VacancyDetailsEnricher
+):
+    """Описание и навыки вакансии ответом на уведомление"""
+    
+    hh_id = callback.data.split("_", 1)[1]
+    details = await vacancy_details.get(session, hh_id)
+    
+    if details is None:
+        await callback.answer("😔 Не удалось загрузить детали, попробуйте позже", show_alert=True)
+        return
+    
+    await callback.answer()
+    await callback.message.reply(format_details(details), parse_mode="HTML")
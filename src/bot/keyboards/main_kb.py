@@ -1,3 +1,5 @@
+from typing import List
+
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
 
@@ -26,10 +28,36 @@ def get_cancel_keyboard() -> ReplyKeyboardMarkup:
     )
 
 
-def get_subscription_actions(subscription_id: int) -> InlineKeyboardMarkup:
-    """Inline клавиатура для управления подпиской"""
-    buttons = [
-        [InlineKeyboardButton(text="🗑 Удалить", callback_data=f"delete_sub_{subscription_id}")],
-        [InlineKeyboardButton(text="⏸ Приостановить", callback_data=f"pause_sub_{subscription_id}")]
-    ]
+def get_subscriptions_list_keyboard(
+    subscription_ids: List[int],
+    page: int,
+    total_pages: int,
+    first_number: int = 1
+) -> InlineKeyboardMarkup:
+    """Inline клавиатура списка подписок: действия по номерам и навигация по страницам"""
+    buttons = []
+    for number, subscription_id in enumerate(subscription_ids, first_number):
+        buttons.append([
+            InlineKeyboardButton(text=f"🗑 {number}", callback_data=f"delete_sub_{subscription_id}_{page}"),
+            InlineKeyboardButton(text=f"⏸ {number}", callback_data=f"pause_sub_{subscription_id}_{page}")
+        ])
+    
+    if total_pages > 1:
+        navigation = []
+        if page > 0:
+            navigation.append(InlineKeyboardButton(text="⬅️", callback_data=f"subs_page_{page - 1}"))
+        navigation.append(
+            InlineKeyboardButton(text=f"{page + 1}/{total_pages}", callback_data=f"subs_page_{page}")
+        )
+        if page < total_pages - 1:
+            navigation.append(InlineKeyboardButton(text="➡️", callback_data=f"subs_page_{page + 1}"))
+        buttons.append(navigation)
+    
     return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
+def get_vacancy_details_keyboard(hh_id: str) -> InlineKeyboardMarkup:
+    """Inline кнопка деталей под уведомлением о вакансии"""
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text="📄 Подробнее", callback_data=f"details_{hh_id}")
+    ]])
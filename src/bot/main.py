@@ -1,35 +1,174 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
-from aiogram.client.default import DefaultBotProperties
-from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage, SimpleEventIsolation
+from aiogram.fsm.storage.redis import RedisStorage
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
+from bot.client import create_bot
 from bot.config import settings
-from bot.handlers import start, subscription
-from database.database import create_tables, async_session_maker
+from bot.handlers import admin, start, subscription, vacancy_details
+from bot.middlewares.db_session import LazySessionMiddleware
+from bot.middlewares.throttling import CallbackThrottlingMiddleware
+from bot.middlewares.user_identity import UserIdentityCache, UserIdentityMiddleware
+from parser.hh_client import HHClient
+from parser.vacancy_details import VacancyDetailsEnricher
+from parser.vacancy_pages import VacancyPageLoader
+from metrics import start_metrics_server
+from database.database import create_tables, async_session_maker, engine, engine_stats
+from tasks.backfill import check_queue_consumers, drain_backfills, set_embedded_runtime
+from tasks.runtime import CheckerRuntime
+from tasks.scheduler import CheckScheduler
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def main():
-    await create_tables()
-    
-    bot = Bot(
-        token=settings.BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
-    )
-    dp = Dispatcher()
-    
+def create_fsm_storage() -> BaseStorage:
+    """
+    Хранилище состояний FSM.
+
+    В Redis состояния переживают перезапуск и видны всем репликам бота,
+    а устаревшие диалоги удаляются по TTL.
+    """
+    if settings.FSM_STORAGE == "redis":
+        return RedisStorage.from_url(
+            settings.fsm_redis_url,
+            state_ttl=settings.FSM_STATE_TTL_SECONDS,
+            data_ttl=settings.FSM_STATE_TTL_SECONDS
+        )
+    return MemoryStorage()
+
+
+def create_dispatcher(session_maker: async_sessionmaker = async_session_maker) -> Dispatcher:
+    """
+    Диспетчер со всеми роутерами, middleware и хуками запуска
+
+    :param session_maker: Фабрика сессий БД для обработчиков (по умолчанию - основная база)
+    """
+    storage = create_fsm_storage()
+    # Апдейты одного пользователя обрабатываются по очереди, даже если
+    # пришли одновременно (webhook, параллельная обработка, несколько реплик)
+    if isinstance(storage, RedisStorage):
+        events_isolation = storage.create_isolation()
+    else:
+        events_isolation = SimpleEventIsolation()
+    dp = Dispatcher(storage=storage, events_isolation=events_isolation)
+
+    dp.include_router(admin.router)
     dp.include_router(start.router)
     dp.include_router(subscription.router)
-    
-    @dp.update.outer_middleware()
-    async def db_session_middleware(handler, event, data):
-        async with async_session_maker() as session:
-            data['session'] = session
-            return await handler(event, data)
-    
+    dp.include_router(vacancy_details.router)
+
+    # Троттлинг ставится перед FSM middleware, который берёт блокировку
+    # изоляции: дубликаты нажатий отбрасываются, не вставая в очередь
+    throttling = CallbackThrottlingMiddleware(
+        rate=settings.CALLBACK_RATE_PER_SECOND,
+        burst=settings.CALLBACK_BURST
+    )
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(throttling)
+    dp.update.outer_middleware(dp.fsm)
+    dp["throttling_stats"] = throttling.stats
+
+    session_middleware = LazySessionMiddleware(session_maker)
+    dp.update.outer_middleware(session_middleware)
+    dp["session_stats"] = session_middleware.stats
+    dp["session_maker"] = session_maker
+
+    user_cache = UserIdentityCache(
+        maxsize=settings.USER_CACHE_SIZE,
+        ttl=settings.USER_CACHE_TTL_SECONDS,
+        redis=Redis.from_url(settings.redis_url) if settings.USER_CACHE_REDIS else None
+    )
+    dp["user_cache"] = user_cache
+    dp.message.middleware(UserIdentityMiddleware(user_cache))
+    dp.callback_query.middleware(UserIdentityMiddleware(user_cache))
+
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
+    return dp
+
+
+def create_embedded_runtime(bot: Bot) -> CheckerRuntime:
+    """
+    Ресурсы проверки для встроенного планировщика: общие с ботом пул БД
+    и экземпляр бота; без REDIS_HOST циклы идут без блокировки
+    """
+    return CheckerRuntime(bot=bot, engine=engine, use_redis=bool(settings.REDIS_HOST))
+
+
+async def on_startup(dispatcher: Dispatcher, bot: Bot):
+    """
+    Общий HH-клиент для обработчиков; встроенный планировщик и первичные
+    загрузки в процессе бота, если они включены
+    """
+    hh_client = HHClient()
+    await hh_client.__aenter__()
+    dispatcher["hh_client"] = hh_client
+    dispatcher["vacancy_pages"] = VacancyPageLoader(hh_client, ttl=settings.BROWSE_PAGE_TTL_SECONDS)
+    dispatcher["vacancy_details"] = VacancyDetailsEnricher(hh_client, dispatcher["session_maker"])
+
+    if not settings.EMBEDDED_SCHEDULER and not settings.BACKFILL_IN_PROCESS:
+        # Первичные загрузки уходят в очередь backfill: проверить, что её разбирают
+        dispatcher["queue_check"] = asyncio.create_task(check_queue_consumers())
+        return
+
+    checker_runtime = create_embedded_runtime(bot)
+    await checker_runtime.start()
+    set_embedded_runtime(checker_runtime)
+    dispatcher["checker_runtime"] = checker_runtime
+
+    if settings.EMBEDDED_SCHEDULER:
+        scheduler = CheckScheduler(checker_runtime)
+        scheduler.start()
+        dispatcher["scheduler"] = scheduler
+
+
+async def on_shutdown(dispatcher: Dispatcher):
+    """Остановка планировщика и освобождение общих ресурсов"""
+    await dispatcher["hh_client"].__aexit__(None, None, None)
+
+    checker_runtime = dispatcher.workflow_data.get("checker_runtime")
+    if checker_runtime:
+        set_embedded_runtime(None)
+        await drain_backfills()
+        scheduler = dispatcher.workflow_data.get("scheduler")
+        if scheduler:
+            await scheduler.shutdown()
+        await checker_runtime.close()
+
+    user_cache = dispatcher["user_cache"]
+    if user_cache.redis:
+        await user_cache.redis.aclose()
+
+    stats = dispatcher["session_stats"]
+    logger.info(f"Updates: {stats.updates}, needed DB: {stats.db_updates} ({stats.db_ratio:.0%})")
+    logger.info(f"DB stats: {engine_stats(engine)}")
+    throttling = dispatcher["throttling_stats"]
+    logger.info(
+        f"Callbacks: {throttling.callbacks}, throttled: {throttling.throttled}, "
+        f"duplicates: {throttling.duplicates}"
+    )
+
+
+async def main():
+    if settings.METRICS_PORT:
+        start_metrics_server(settings.METRICS_PORT)
+
+    await create_tables()
+
+    bot = create_bot()
+    dp = create_dispatcher()
+
+    if settings.BOT_MODE == "webhook":
+        from bot.webhook import run_webhook
+        await run_webhook(bot, dp)
+        return
+
     logger.info("Бот запущен!")
     await dp.start_polling(bot)
 
@@ -0,0 +1,118 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class LazySession:
+    """
+    Прокси AsyncSession для обработчиков.
+
+    Сессия создаётся при первом обращении, а после каждого чтения без
+    несохранённых изменений транзакция завершается, и соединение сразу
+    возвращается в пул, не дожидаясь ответов Telegram.
+
+    Транзакция, в которой уже были запись или текстовый запрос, так не
+    завершается: её фиксирует или откатывает сам обработчик, иначе
+    половина связанных изменений могла бы сохраниться без второй.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker):
+        self._session_maker = session_maker
+        self._session: Optional[AsyncSession] = None
+        self._writes = False
+
+    @property
+    def used(self) -> bool:
+        """Обращался ли обработчик к БД"""
+        return self._session is not None
+
+    def _get_session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._session_maker()
+        return self._session
+
+    def _track(self, statement: Any):
+        if not getattr(statement, "is_select", False):
+            self._writes = True
+
+    async def _release_if_idle(self):
+        session = self._session
+        if self._writes or not session.in_transaction():
+            return
+        if not (session.new or session.dirty or session.deleted):
+            # expire_on_commit=False: загруженные объекты остаются доступными
+            await session.commit()
+
+    async def execute(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        self._track(statement)
+        result = await self._get_session().execute(statement, *args, **kwargs)
+        await self._release_if_idle()
+        return result
+
+    async def scalar(self, statement: Any, *args: Any, **kwargs: Any) -> Any:
+        self._track(statement)
+        result = await self._get_session().scalar(statement, *args, **kwargs)
+        await self._release_if_idle()
+        return result
+
+    async def get(self, *args: Any, **kwargs: Any) -> Any:
+        result = await self._get_session().get(*args, **kwargs)
+        await self._release_if_idle()
+        return result
+
+    async def commit(self):
+        await self._get_session().commit()
+        self._writes = False
+
+    async def rollback(self):
+        await self._get_session().rollback()
+        self._writes = False
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    def __getattr__(self, name: str) -> Any:
+        # add, delete, commit, rollback, refresh и прочее - как у AsyncSession
+        return getattr(self._get_session(), name)
+
+
+@dataclass
+class SessionUsageStats:
+    """Сколько апдейтов реально обращались к БД"""
+    updates: int = 0
+    db_updates: int = 0
+
+    @property
+    def db_ratio(self) -> float:
+        return self.db_updates / self.updates if self.updates else 0.0
+
+
+class LazySessionMiddleware(BaseMiddleware):
+    """Передаёт обработчикам ленивую сессию БД как аргумент session"""
+
+    def __init__(self, session_maker: async_sessionmaker):
+        self.session_maker = session_maker
+        self.stats = SessionUsageStats()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        session = LazySession(self.session_maker)
+        data["session"] = session
+        self.stats.updates += 1
+        try:
+            return await handler(event, data)
+        finally:
+            if session.used:
+                self.stats.db_updates += 1
+            await session.close()
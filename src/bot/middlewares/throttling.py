@@ -0,0 +1,87 @@
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ThrottlingStats:
+    """Сколько нажатий кнопок было отброшено"""
+    callbacks: int = 0
+    throttled: int = 0
+    duplicates: int = 0
+
+
+class CallbackThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничение частоты нажатий inline-кнопок.
+
+    Для каждого пользователя действует token bucket: rate нажатий в секунду
+    с запасом burst. Повторное нажатие той же кнопки, пока предыдущее ещё
+    обрабатывается, сразу получает ответ и не доходит до обработчика.
+
+    Регистрируется на уровне update перед FSM middleware: иначе дубликаты
+    ждали бы блокировку изоляции событий и выполнялись бы после оригинала.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, maxsize: int = 10000):
+        """
+        :param rate: Сколько нажатий в секунду восстанавливается
+        :param burst: Максимальный запас нажатий подряд
+        :param maxsize: Максимум пользователей, для которых хранится состояние
+        """
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.stats = ThrottlingStats()
+        self._buckets: "OrderedDict[int, Tuple[float, float]]" = OrderedDict()
+        self._in_flight: Set[Tuple[int, str]] = set()
+
+    def _take_token(self, user_id: int) -> bool:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(user_id, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated_at) * self.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self._buckets[user_id] = (tokens, now)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return allowed
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        callback = event.callback_query if isinstance(event, Update) else None
+        if callback is None:
+            return await handler(event, data)
+
+        self.stats.callbacks += 1
+        key = (callback.from_user.id, callback.data or "")
+
+        if key in self._in_flight:
+            self.stats.duplicates += 1
+            await callback.answer("⏳ Уже загружаю, подождите...")
+            return None
+
+        if not self._take_token(callback.from_user.id):
+            self.stats.throttled += 1
+            await callback.answer("🐢 Слишком часто, попробуйте через пару секунд")
+            return None
+
+        self._in_flight.add(key)
+        try:
+            return await handler(event, data)
+        finally:
+            self._in_flight.discard(key)
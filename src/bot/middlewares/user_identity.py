@@ -0,0 +1,167 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import User
+from metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def user_identity_key(telegram_id: int) -> str:
+    """Ключ Redis для кешированного пользователя"""
+    return f"hh_jobs:user:{telegram_id}"
+
+
+@dataclass(frozen=True)
+class UserIdentity:
+    """
+    Лёгкое представление пользователя для обработчиков.
+
+    Только соответствие telegram_id → id: строки пользователей не удаляются
+    и не меняют telegram_id, поэтому запись не нужно сбрасывать, а
+    изменчивые поля (is_active) читаются из БД.
+    """
+    id: int
+    telegram_id: int
+
+    @classmethod
+    def from_model(cls, user: User) -> "UserIdentity":
+        return cls(id=user.id, telegram_id=user.telegram_id)
+
+
+class UserIdentityCache:
+    """
+    Кеш telegram_id → пользователь.
+
+    В процессе хранится LRU с TTL; при наличии Redis он служит общим
+    вторым уровнем для реплик бота.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: float = 300,
+        redis: Optional[Redis] = None,
+        redis_ttl: int = 3600
+    ):
+        """
+        :param maxsize: Максимум записей в процессе
+        :param ttl: Время жизни записи в процессе, секунд
+        :param redis: Клиент Redis для общего уровня кеша
+        :param redis_ttl: Время жизни записи в Redis, секунд
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis = redis
+        self.redis_ttl = redis_ttl
+        self._local: "OrderedDict[int, Tuple[float, UserIdentity]]" = OrderedDict()
+
+    async def get(self, telegram_id: int) -> Optional[UserIdentity]:
+        """Пользователь из кеша или None"""
+        entry = self._local.get(telegram_id)
+        if entry is not None:
+            expires_at, identity = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(telegram_id)
+                CACHE_REQUESTS.labels("user_identity", "hit").inc()
+                return identity
+            del self._local[telegram_id]
+
+        if self.redis is None:
+            CACHE_REQUESTS.labels("user_identity", "miss").inc()
+            return None
+
+        try:
+            raw = await self.redis.get(user_identity_key(telegram_id))
+        except Exception as e:
+            logger.error(f"Error reading user cache: {e}")
+            return None
+
+        if raw is None:
+            CACHE_REQUESTS.labels("user_identity", "miss").inc()
+            return None
+
+        CACHE_REQUESTS.labels("user_identity", "redis_hit").inc()
+        identity = UserIdentity(**json.loads(raw))
+        self._remember(identity)
+        return identity
+
+    async def set(self, identity: UserIdentity):
+        """Положить пользователя в кеш"""
+        self._remember(identity)
+        if self.redis is not None:
+            try:
+                await self.redis.set(
+                    user_identity_key(identity.telegram_id),
+                    json.dumps(asdict(identity)),
+                    ex=self.redis_ttl
+                )
+            except Exception as e:
+                logger.error(f"Error writing user cache: {e}")
+
+    async def load(self, session: AsyncSession, telegram_id: int) -> Optional[UserIdentity]:
+        """
+        Пользователь из кеша, а при промахе - из БД
+
+        :param session: Сессия БД
+        :param telegram_id: Telegram ID пользователя
+        :return: Пользователь или None, если он ещё не зарегистрирован
+        """
+        identity = await self.get(telegram_id)
+        if identity is not None:
+            return identity
+
+        result = await session.execute(
+            select(User).where(User.telegram_id == telegram_id)
+        )
+        user = result.scalar_one_or_none()
+        if user is None:
+            return None
+
+        identity = UserIdentity.from_model(user)
+        await self.set(identity)
+        return identity
+
+    def _remember(self, identity: UserIdentity):
+        self._local[identity.telegram_id] = (time.monotonic() + self.ttl, identity)
+        self._local.move_to_end(identity.telegram_id)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+
+class UserIdentityMiddleware(BaseMiddleware):
+    """
+    Передаёт обработчикам пользователя из кеша как аргумент user.
+
+    Регистрируется как inner middleware: пользователь загружается только
+    для обработчиков, которые объявили аргумент user.
+    """
+
+    def __init__(self, cache: UserIdentityCache):
+        self.cache = cache
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        if handler_object is not None and "user" not in handler_object.params:
+            return await handler(event, data)
+        
+        from_user = data.get("event_from_user")
+        data["user"] = None
+        if from_user is not None:
+            data["user"] = await self.cache.load(data["session"], from_user.id)
+        return await handler(event, data)
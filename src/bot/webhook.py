@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import signal
+from typing import Any, Dict
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from bot.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LimitedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик webhook, который сразу отвечает Telegram и обрабатывает
+    апдейты в фоне, но не больше concurrency одновременно
+    """
+
+    def __init__(self, *args: Any, concurrency: int = 100, **kwargs: Any):
+        super().__init__(*args, handle_in_background=True, **kwargs)
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            await super()._background_feed_update(bot, update)
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """
+    aiohttp-приложение с эндпоинтом webhook и проверкой секрета
+
+    :param bot: Экземпляр бота
+    :param dp: Диспетчер
+    :return: Приложение aiohttp
+    """
+    if not settings.WEBHOOK_SECRET:
+        raise RuntimeError("WEBHOOK_SECRET must be set in webhook mode")
+
+    app = web.Application()
+
+    handler = LimitedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.WEBHOOK_SECRET,
+        concurrency=settings.WEBHOOK_CONCURRENCY
+    )
+    handler.register(app, path=settings.WEBHOOK_PATH)
+
+    async def healthcheck(request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    app.router.add_get("/healthz", healthcheck)
+
+    if settings.WEBHOOK_SET_ON_STARTUP:
+        dp.startup.register(set_webhook)
+
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def set_webhook(bot: Bot, dispatcher: Dispatcher):
+    """Регистрация webhook в Telegram (идемпотентно, можно с любой реплики)"""
+    await bot.set_webhook(
+        url=f"{settings.WEBHOOK_BASE_URL.rstrip('/')}{settings.WEBHOOK_PATH}",
+        secret_token=settings.WEBHOOK_SECRET,
+        max_connections=settings.WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=dispatcher.resolve_used_update_types(),
+    )
+    logger.info("Webhook registered")
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher):
+    """Запуск HTTP-сервера webhook до получения SIGINT/SIGTERM"""
+    app = create_webhook_app(bot, dp)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBHOOK_HOST, settings.WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"Бот запущен в режиме webhook на {settings.WEBHOOK_HOST}:{settings.WEBHOOK_PORT}")
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    try:
+        await stop_event.wait()
+    finally:
+        await runner.cleanup()
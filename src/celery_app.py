@@ -1,11 +1,12 @@
+from datetime import timedelta
+
 from celery import Celery
-from celery.schedules import crontab
 from bot.config import settings
 
 celery_app = Celery(
     'hh_jobs_bot',
-    broker=f'redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0',
-    backend=f'redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0',
+    broker=settings.redis_url,
+    backend=settings.redis_url,
     include=['tasks.vacancy_checker']
 )
 
@@ -16,11 +17,21 @@ celery_app.conf.update(
     timezone='Europe/Moscow',
     enable_utc=True,
     broker_connection_retry_on_startup=True,
+    # Первичная загрузка новых подписок идёт отдельной очередью,
+    # чтобы не ждать за периодическим циклом
+    task_routes={
+        'tasks.vacancy_checker.backfill_subscription': {'queue': 'backfill'},
+    },
+    broker_transport_options={'queue_order_strategy': 'priority'},
 )
 
 celery_app.conf.beat_schedule = {
     'check-new-vacancies': {
         'task': 'tasks.vacancy_checker.check_new_vacancies',
-        'schedule': crontab(minute='*/15'),
+        # Ровный интервал: crontab(*/N) даёт неравные промежутки, если N не делит 60
+        'schedule': timedelta(minutes=settings.CHECK_INTERVAL_MINUTES),
+        # Запуск, не взятый воркером до следующего тика, устаревает,
+        # а не копится в очереди поверх нового
+        'options': {'expires': settings.CHECK_INTERVAL_MINUTES * 60},
     },
 }
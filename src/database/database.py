@@ -1,13 +1,115 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import logging
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, Optional
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
+
 from bot.config import settings
 from database.models import Base
-from typing import AsyncGenerator
 
+logger = logging.getLogger(__name__)
 
-engine = create_async_engine(
-    settings.database_url,
-    echo=True,
-)
+
+@dataclass
+class QueryStats:
+    """Счётчики запросов к БД одного engine"""
+    queries: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    slow_queries: int = 0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_seconds / self.queries * 1000 if self.queries else 0.0
+
+
+_query_stats: "WeakKeyDictionary[Engine, QueryStats]" = WeakKeyDictionary()
+
+
+def track_queries(engine: AsyncEngine) -> QueryStats:
+    """Подсчёт числа и времени запросов через события SQLAlchemy"""
+    stats = QueryStats()
+    sync_engine = engine.sync_engine
+    _query_stats[sync_engine] = stats
+    slow_seconds = settings.DB_SLOW_QUERY_MS / 1000
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        stats.queries += 1
+        stats.total_seconds += elapsed
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+        if elapsed >= slow_seconds:
+            stats.slow_queries += 1
+            logger.warning(f"Slow query ({elapsed * 1000:.0f} ms): {statement[:200]}")
+
+    return stats
+
+
+def create_engine(
+    application_name: str,
+    pool_size: Optional[int] = None,
+    database_url: Optional[str] = None
+) -> AsyncEngine:
+    """
+    Engine БД с общими для бота и воркера настройками
+
+    :param application_name: Имя подключения в pg_stat_activity
+    :param pool_size: Размер пула, если отличается от DB_POOL_SIZE
+        (например, воркеру с одной задачей на процесс хватает меньшего)
+    :param database_url: Другая база PostgreSQL (например, для бенчмарка)
+    :return: Engine с подключённым подсчётом запросов
+    """
+    engine = create_async_engine(
+        database_url or settings.database_url,
+        echo=settings.DB_ECHO,
+        pool_size=pool_size or settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=True,
+        connect_args={
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": {
+                "application_name": application_name,
+                "statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS),
+            },
+        },
+    )
+    track_queries(engine)
+    return engine
+
+
+def engine_stats(engine: AsyncEngine) -> Dict:
+    """Состояние пула соединений и статистика запросов"""
+    pool = engine.pool
+    stats = _query_stats.get(engine.sync_engine) or QueryStats()
+    result = {
+        "queries": stats.queries,
+        "avg_ms": round(stats.avg_ms, 2),
+        "max_ms": round(stats.max_seconds * 1000, 2),
+        "slow_queries": stats.slow_queries,
+    }
+    if isinstance(pool, QueuePool):
+        result.update(
+            pool_size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            checked_in=pool.checkedin(),
+        )
+    return result
+
+
+engine = create_engine("hh-jobs-bot")
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -17,10 +119,16 @@ async_session_maker = async_sessionmaker(
 
 
 async def create_tables():
+    """
+    Создать недостающие таблицы
+
+    Уже существующие таблицы не меняются: новые столбцы и индексы к ним
+    добавляют миграции (alembic -c src/alembic.ini upgrade head).
+    """
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
-        yield session  
\ No newline at end of file
+        yield session
@@ -1,8 +1,13 @@
 from datetime import datetime
-from sqlalchemy import BigInteger, String, DateTime, Boolean, Integer, Text
+from sqlalchemy import BigInteger, String, DateTime, Boolean, Integer, Text, Float, Index, LargeBinary, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
+# Полнотекстовый документ вакансии (название и компания, русская конфигурация).
+# Поиск должен использовать ровно это выражение, иначе PostgreSQL не применит GIN-индекс
+VACANCY_SEARCH_DOCUMENT = "to_tsvector('russian', title || ' ' || coalesce(company, ''))"
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -28,6 +33,11 @@ class Subscription(Base):
     salary_from: Mapped[int] = mapped_column(Integer, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
+    __table_args__ = (
+        # Цикл проверки читает подписки пользователя подряд: курсор (user_id, id)
+        Index("ix_subscriptions_user_id_id", "user_id", "id"),
+    )
+
 
 class Vacancy(Base):
     __tablename__ = "vacancies"
@@ -38,4 +48,57 @@ class Vacancy(Base):
     company: Mapped[str] = mapped_column(String(255), nullable=True)
     salary: Mapped[str] = mapped_column(String(255), nullable=True)
     url: Mapped[str] = mapped_column(Text, nullable=False)
-    published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
\ No newline at end of file
+    published_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Структурированные поля выдачи HH для локального поиска в режиме просмотра
+    area_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    area_name: Mapped[str] = mapped_column(String(255), nullable=True)
+    experience: Mapped[str] = mapped_column(String(50), nullable=True)
+    experience_name: Mapped[str] = mapped_column(String(100), nullable=True)
+    salary_from: Mapped[int] = mapped_column(Integer, nullable=True)
+    salary_to: Mapped[int] = mapped_column(Integer, nullable=True)
+    currency: Mapped[str] = mapped_column(String(10), nullable=True)
+    
+    __table_args__ = (
+        # Листание ленты вакансий в API курсором (published_at, id)
+        Index("ix_vacancies_published_at_id", "published_at", "id"),
+        Index(
+            "ix_vacancies_search",
+            text(VACANCY_SEARCH_DOCUMENT),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
+
+
+
+class VacancyDetails(Base):
+    __tablename__ = "vacancy_details"
+    
+    hh_id: Mapped[str] = mapped_column(String(50), primary_key=True)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # Полезная часть ответа /vacancies/{id} (описание, навыки, график), JSON под zlib
+    payload: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+
+class SubscriptionWatermark(Base):
+    __tablename__ = "subscription_watermarks"
+    
+    subscription_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # Самая свежая дата публикации, до которой выдача подписки полностью обработана
+    last_published_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+    checked_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
+
+
+class CycleReport(Base):
+    __tablename__ = "cycle_reports"
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    finished_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    duration_seconds: Mapped[float] = mapped_column(Float, nullable=False)
+    subscriptions: Mapped[int] = mapped_column(Integer, default=0)
+    distinct_queries: Mapped[int] = mapped_column(Integer, default=0)
+    hh_calls: Mapped[int] = mapped_column(Integer, default=0)
+    cache_hits: Mapped[int] = mapped_column(Integer, default=0)
+    new_vacancies: Mapped[int] = mapped_column(Integer, default=0)
+    messages_sent: Mapped[int] = mapped_column(Integer, default=0)
+    failures: Mapped[int] = mapped_column(Integer, default=0)
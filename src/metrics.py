@@ -0,0 +1,92 @@
+import logging
+import os
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+from prometheus_client import multiprocess
+
+logger = logging.getLogger(__name__)
+
+HH_REQUEST_SECONDS = Histogram(
+    "hh_request_seconds",
+    "Время запроса к HH API",
+    ["endpoint"],
+)
+HH_API_CALLS = Counter(
+    "hh_api_calls_total",
+    "Запросы к HH API по результату",
+    ["endpoint", "status"],
+)
+HH_CONCURRENCY_LIMIT = Gauge(
+    "hh_concurrency_limit",
+    "Текущий лимит одновременных запросов к HH API (AIMD)",
+    multiprocess_mode="liveall",
+)
+HH_IN_FLIGHT = Gauge(
+    "hh_in_flight_requests",
+    "Запросы к HH API, выполняющиеся сейчас",
+    multiprocess_mode="liveall",
+)
+HH_LIMIT_CHANGES = Counter(
+    "hh_concurrency_limit_changes_total",
+    "Изменения лимита одновременных запросов к HH API",
+    ["direction"],
+)
+DB_SAVE_SECONDS = Histogram(
+    "db_save_seconds",
+    "Время сохранения вакансий в БД",
+    ["operation"],
+)
+RENDER_SECONDS = Histogram(
+    "render_seconds",
+    "Время форматирования вакансии в сообщение",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+)
+TELEGRAM_SEND_SECONDS = Histogram(
+    "telegram_send_seconds",
+    "Время отправки уведомления в Telegram",
+)
+CHECK_CYCLE_SECONDS = Histogram(
+    "check_cycle_seconds",
+    "Длительность полного цикла проверки подписок",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 900, 1800),
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Обращения к кешам по результату (hit/miss)",
+    ["cache", "result"],
+)
+NEW_VACANCIES = Counter(
+    "new_vacancies_total",
+    "Новые вакансии, найденные по подпискам",
+)
+NOTIFICATIONS_SENT = Counter(
+    "notifications_sent_total",
+    "Отправленные уведомления о вакансиях",
+)
+SEND_FAILURES = Counter(
+    "send_failures_total",
+    "Ошибки отправки уведомлений по типу",
+    ["reason"],
+)
+
+
+def start_metrics_server(port: int):
+    """
+    HTTP-эндпоинт /metrics для Prometheus
+
+    Если задан PROMETHEUS_MULTIPROC_DIR (воркер Celery с prefork), метрики
+    собираются со всех дочерних процессов, иначе - с текущего процесса.
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+    logger.info(f"Metrics available on :{port}/metrics")
+
+
+def mark_process_dead(pid: int):
+    """Убрать метрики завершившегося дочернего процесса воркера"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,66 @@
+"""Структурные поля вакансий и индексы для просмотра и полнотекстового поиска
+
+Таблицы целиком создаёт create_all при старте бота; миграции только
+доводят уже существующие таблицы до моделей, поэтому каждый шаг
+пропускает то, что уже есть. Индексы строятся CONCURRENTLY и не
+блокируют запись в vacancies на время построения.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from database.models import VACANCY_SEARCH_DOCUMENT
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+VACANCY_COLUMNS = (
+    sa.Column('area_id', sa.Integer(), nullable=True),
+    sa.Column('area_name', sa.String(255), nullable=True),
+    sa.Column('experience', sa.String(50), nullable=True),
+    sa.Column('experience_name', sa.String(100), nullable=True),
+    sa.Column('salary_from', sa.Integer(), nullable=True),
+    sa.Column('salary_to', sa.Integer(), nullable=True),
+    sa.Column('currency', sa.String(10), nullable=True),
+)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('vacancies'):
+        return
+
+    existing = {column['name'] for column in inspector.get_columns('vacancies')}
+    for column in VACANCY_COLUMNS:
+        if column.name not in existing:
+            op.add_column('vacancies', column)
+
+    indexes = {index['name'] for index in inspector.get_indexes('vacancies')}
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    with op.get_context().autocommit_block():
+        if 'ix_vacancies_published_at_id' not in indexes:
+            op.create_index(
+                'ix_vacancies_published_at_id', 'vacancies', ['published_at', 'id'],
+                postgresql_concurrently=True
+            )
+        if postgresql and 'ix_vacancies_search' not in indexes:
+            op.create_index(
+                'ix_vacancies_search', 'vacancies', [sa.text(VACANCY_SEARCH_DOCUMENT)],
+                postgresql_using='gin', postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    postgresql = op.get_bind().dialect.name == 'postgresql'
+    with op.get_context().autocommit_block():
+        if postgresql:
+            op.drop_index('ix_vacancies_search', 'vacancies', postgresql_concurrently=True)
+        op.drop_index('ix_vacancies_published_at_id', 'vacancies', postgresql_concurrently=True)
+    for column in reversed(VACANCY_COLUMNS):
+        op.drop_column('vacancies', column.name)
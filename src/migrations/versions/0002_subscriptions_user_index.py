@@ -0,0 +1,31 @@
+"""Индекс (user_id, id) для выборки подписок по пользователям
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('subscriptions'):
+        return
+    if 'ix_subscriptions_user_id_id' in {index['name'] for index in inspector.get_indexes('subscriptions')}:
+        return
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_subscriptions_user_id_id', 'subscriptions', ['user_id', 'id'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_subscriptions_user_id_id', 'subscriptions', postgresql_concurrently=True)
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Optional
+
+from bot.config import settings
+from metrics import HH_CONCURRENCY_LIMIT, HH_IN_FLIGHT, HH_LIMIT_CHANGES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Slot:
+    """Место под один запрос; overloaded - ответ говорит о перегрузке сервера"""
+    overloaded: bool = False
+
+
+class AIMDLimiter:
+    """
+    Лимит одновременных запросов к HH, подстраивающийся под ответы (AIMD).
+
+    Быстрый успешный ответ, пока лимит используется полностью, добавляет
+    к нему 1/limit (в сумме +1 за «окно» из limit запросов). 429, 5xx,
+    сетевая ошибка или ответ дольше latency_target умножают лимит на
+    backoff. Ответы на запросы, начатые до последнего снижения, его не
+    повторяют: одна волна ошибок уменьшает лимит один раз.
+    """
+
+    def __init__(
+        self,
+        initial: int = settings.HH_CONCURRENCY_INITIAL,
+        min_limit: int = settings.HH_CONCURRENCY_MIN,
+        max_limit: int = settings.HH_CONCURRENCY_MAX,
+        latency_target: float = settings.HH_LATENCY_TARGET_SECONDS,
+        backoff: float = settings.HH_CONCURRENCY_BACKOFF
+    ):
+        """
+        :param initial: Начальный лимит
+        :param min_limit: Ниже этого лимит не опускается
+        :param max_limit: Выше этого лимит не поднимается
+        :param latency_target: Ответ дольше этого (сек) считается признаком перегрузки
+        :param backoff: Множитель лимита при перегрузке (0..1)
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._decreased_at = 0.0
+        HH_CONCURRENCY_LIMIT.set(self.slots)
+
+    @property
+    def slots(self) -> int:
+        """Сколько запросов можно держать одновременно сейчас"""
+        return int(self.limit)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Slot]:
+        """
+        Дождаться свободного места и выполнить запрос
+
+        Исключение внутри блока считается перегрузкой, отмена - нет.
+        """
+        await self._acquire()
+        started = time.monotonic()
+        slot = Slot()
+        try:
+            yield slot
+        except asyncio.CancelledError:
+            self._release()
+            raise
+        except Exception:
+            self._release(started, overloaded=True)
+            raise
+        else:
+            self._release(started, overloaded=slot.overloaded)
+
+    async def _acquire(self):
+        while self.in_flight >= self.slots:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                # Освободившееся место могло достаться этому ожидающему
+                self._wake()
+                raise
+        self.in_flight += 1
+        HH_IN_FLIGHT.set(self.in_flight)
+
+    def _release(self, started: Optional[float] = None, overloaded: bool = False):
+        demand = self.in_flight + len(self._waiters)
+        self.in_flight -= 1
+        HH_IN_FLIGHT.set(self.in_flight)
+
+        if started is not None:
+            latency = time.monotonic() - started
+            if overloaded or latency > self.latency_target:
+                if started >= self._decreased_at:
+                    reason = "error" if overloaded else f"latency {latency:.2f}s"
+                    self._decrease(reason)
+            elif demand >= self.slots:
+                # Лимит растёт, только если в него упираются
+                self._increase()
+
+        self._wake()
+
+    def _increase(self):
+        before = self.slots
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        if self.slots != before:
+            HH_LIMIT_CHANGES.labels("increase").inc()
+            HH_CONCURRENCY_LIMIT.set(self.slots)
+            logger.debug(f"HH concurrency limit raised to {self.slots}")
+
+    def _decrease(self, reason: str):
+        self._decreased_at = time.monotonic()
+        before = self.slots
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        if self.slots != before:
+            HH_LIMIT_CHANGES.labels("decrease").inc()
+            HH_CONCURRENCY_LIMIT.set(self.slots)
+            logger.info(f"HH concurrency limit lowered {before} -> {self.slots} ({reason})")
+
+    def _wake(self):
+        free = self.slots - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+_shared: Optional[AIMDLimiter] = None
+
+
+def get_limiter() -> AIMDLimiter:
+    """
+    Общий на процесс лимит запросов к HH
+
+    Все клиенты процесса (обработчики бота и встроенный планировщик)
+    делят один бюджет, а метрики HH_CONCURRENCY_LIMIT и HH_IN_FLIGHT
+    отражают его, а не клиента, обновившего их последним.
+    """
+    global _shared
+    if _shared is None:
+        _shared = AIMDLimiter()
+    return _shared
@@ -1,18 +1,86 @@
+import html
 import aiohttp
-from typing import Optional, List, Dict
+import time
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
 import logging
 from dateutil import parser as date_parser
 
+from bot.config import settings
+from metrics import HH_API_CALLS, HH_REQUEST_SECONDS, RENDER_SECONDS
+from parser.aimd import AIMDLimiter, get_limiter
+from parser.hh_recording import HHRecorder, HHReplayTransport, get_recorder, get_replay_transport
+
 logger = logging.getLogger(__name__)
 
+AREA_IDS = {
+    "москва": 1,
+    "санкт-петербург": 2,
+    "петербург": 2,
+    "спб": 2,
+    "новосибирск": 4,
+    "екатеринбург": 3,
+    "казань": 88,
+    "нижний новгород": 66,
+    "челябинск": 96,
+    "самара": 78,
+    "омск": 68,
+    "ростов-на-дону": 76,
+    "уфа": 99,
+    "красноярск": 54,
+    "воронеж": 26,
+    "пермь": 70,
+    "волгоград": 24,
+    "краснодар": 53,
+    "саратов": 79,
+    "тюмень": 97
+}
+
+CURRENCY_SYMBOLS = {
+    "RUR": "₽",
+    "RUB": "₽",
+    "USD": "$",
+    "EUR": "€",
+    "KZT": "₸",
+    "UAH": "₴",
+    "BYR": "Br",
+    "AZN": "₼",
+    "UZS": "сўм",
+    "GEL": "₾"
+}
+
+MONTHS_GENITIVE = {
+    1: "января", 2: "февраля", 3: "марта", 4: "апреля",
+    5: "мая", 6: "июня", 7: "июля", 8: "августа",
+    9: "сентября", 10: "октября", 11: "ноября", 12: "декабря"
+}
+
 
 class HHClient:
     """Клиент для работы с API HeadHunter"""
     
-    BASE_URL = "https://api.hh.ru"
-    
-    def __init__(self):
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        recorder: Optional[HHRecorder] = None,
+        transport: Optional[HHReplayTransport] = None,
+        limiter: Optional[AIMDLimiter] = None
+    ):
+        """
+        :param base_url: Адрес API (по умолчанию HH_API_URL из настроек)
+        :param recorder: Куда записывать ответы (по умолчанию HH_RECORD_PATH)
+        :param transport: Воспроизведение записи вместо сети (по умолчанию HH_REPLAY_PATH)
+        :param limiter: Лимит одновременных запросов (по умолчанию общий на процесс, см. get_limiter)
+        """
+        self.base_url = (base_url or settings.HH_API_URL).rstrip("/")
         self.session: Optional[aiohttp.ClientSession] = None
+        if recorder is None and settings.HH_RECORD_PATH:
+            recorder = get_recorder(settings.HH_RECORD_PATH)
+        if transport is None and settings.HH_REPLAY_PATH:
+            transport = get_replay_transport(settings.HH_REPLAY_PATH, settings.HH_REPLAY_SPEED)
+        self.recorder = recorder
+        self.transport = transport
+        self.limiter = limiter or get_limiter()
     
     async def __aenter__(self):
         """Создание сессии при входе в контекст"""
@@ -31,7 +99,8 @@ class HHClient:
         experience: Optional[str] = None,
         salary: Optional[int] = None,
         per_page: int = 20,
-        page: int = 0
+        page: int = 0,
+        date_from: Optional[datetime] = None
     ) -> Dict:
         """
         Поиск вакансий по заданным параметрам
@@ -42,6 +111,7 @@ class HHClient:
         :param salary: Минимальная зарплата
         :param per_page: Количество результатов на странице (макс 100)
         :param page: Номер страницы
+        :param date_from: Искать только вакансии, опубликованные не раньше (UTC)
         :return: Словарь с результатами поиска
         """
         if not self.session:
@@ -66,24 +136,56 @@ class HHClient:
             params["salary"] = salary
             params["only_with_salary"] = "true"
         
+        if date_from:
+            params["date_from"] = date_from.strftime("%Y-%m-%dT%H:%M:%S+0000")
+            params["order_by"] = "publication_time"
+        
         try:
-            async with self.session.get(
-                f"{self.BASE_URL}/vacancies",
-                params=params,
-                headers={"User-Agent": "HH Jobs Bot/1.0"}
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    logger.info(f"Found {data.get('found', 0)} vacancies for query: {text}")
-                    return data
-                else:
-                    logger.error(f"HH API error: {response.status}")
-                    return {"items": [], "found": 0}
+            status, data = await self._get("search", "/vacancies", params)
+            if status == 200:
+                logger.info(f"Found {data.get('found', 0)} vacancies for query: {text}")
+                return data
+            else:
+                logger.error(f"HH API error: {status}")
+                return {"items": [], "found": 0}
         
         except Exception as e:
+            HH_API_CALLS.labels("search", "error").inc()
             logger.error(f"Error fetching vacancies: {e}")
             return {"items": [], "found": 0}
     
+    async def _get(self, endpoint: str, path: str, params: Optional[Dict] = None) -> Tuple[int, Optional[Dict]]:
+        """
+        GET-запрос к API: по сети или из записи, с метриками и записью ответа
+
+        Запрос ждёт места в лимите одновременных запросов; 429 и 5xx
+        уменьшают лимит.
+
+        :param endpoint: Метка для метрик (search, vacancy)
+        :param path: Путь относительно адреса API
+        :param params: Параметры запроса
+        :return: HTTP-статус и тело ответа (только для 200)
+        """
+        async with self.limiter.slot() as slot:
+            started = time.perf_counter()
+            with HH_REQUEST_SECONDS.labels(endpoint).time():
+                if self.transport is not None:
+                    status, data = await self.transport.get(path, params)
+                else:
+                    async with self.session.get(
+                        f"{self.base_url}{path}",
+                        params=params,
+                        headers={"User-Agent": "HH Jobs Bot/1.0"}
+                    ) as response:
+                        status = response.status
+                        data = await response.json() if status == 200 else None
+            slot.overloaded = status == 429 or status >= 500
+        HH_API_CALLS.labels(endpoint, status).inc()
+
+        if self.recorder is not None:
+            self.recorder.record(path, params, status, data, time.perf_counter() - started)
+        return status, data
+    
     async def _get_area_id(self, city_name: str) -> Optional[int]:
         """
         Получить ID города по названию
@@ -91,31 +193,9 @@ class HHClient:
         :param city_name: Название города
         :return: ID города или None
         """
-        cities_map = {
-            "москва": 1,
-            "санкт-петербург": 2,
-            "петербург": 2,
-            "спб": 2,
-            "новосибирск": 4,
-            "екатеринбург": 3,
-            "казань": 88,
-            "нижний новгород": 66,
-            "челябинск": 96,
-            "самара": 78,
-            "омск": 68,
-            "ростов-на-дону": 76,
-            "уфа": 99,
-            "красноярск": 54,
-            "воронеж": 26,
-            "пермь": 70,
-            "волгоград": 24,
-            "краснодар": 53,
-            "саратов": 79,
-            "тюмень": 97
-        }
         
         city_lower = city_name.lower().strip()
-        return cities_map.get(city_lower)
+        return AREA_IDS.get(city_lower)
     
     async def get_vacancy_details(self, vacancy_id: str) -> Optional[Dict]:
         """
@@ -128,17 +208,15 @@ class HHClient:
             raise RuntimeError("Session is not initialized.")
         
         try:
-            async with self.session.get(
-                f"{self.BASE_URL}/vacancies/{vacancy_id}",
-                headers={"User-Agent": "HH Jobs Bot/1.0"}
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    logger.error(f"Error getting vacancy {vacancy_id}: {response.status}")
-                    return None
+            status, data = await self._get("vacancy", f"/vacancies/{vacancy_id}")
+            if status == 200:
+                return data
+            else:
+                logger.error(f"Error getting vacancy {vacancy_id}: {status}")
+                return None
         
         except Exception as e:
+            HH_API_CALLS.labels("vacancy", "error").inc()
             logger.error(f"Error fetching vacancy details: {e}")
             return None
     
@@ -150,8 +228,13 @@ class HHClient:
         :param vacancy: Словарь с данными вакансии
         :return: Отформатированная строка
         """
-        name = vacancy.get("name", "Без названия")
-        company = vacancy.get("employer", {}).get("name", "Не указано")
+        with RENDER_SECONDS.time():
+            return HHClient._format_vacancy(vacancy)
+    
+    @staticmethod
+    def _format_vacancy(vacancy: Dict) -> str:
+        name = vacancy.get("name") or "Без названия"
+        company = (vacancy.get("employer") or {}).get("name") or "Не указано"
         
 
         salary = vacancy.get("salary")
@@ -160,20 +243,7 @@ class HHClient:
             salary_to = salary.get("to")
             currency = salary.get("currency", "RUR")
             
-            currency_map = {
-                "RUR": "₽",
-                "RUB": "₽",
-                "USD": "$",
-                "EUR": "€",
-                "KZT": "₸",
-                "UAH": "₴",
-                "BYR": "Br",
-                "AZN": "₼",
-                "UZS": "сўм",
-                "GEL": "₾"
-            }
-            
-            currency_symbol = currency_map.get(currency, currency)
+            currency_symbol = CURRENCY_SYMBOLS.get(currency, currency)
             
             if salary_from and salary_to:
                 salary_text = f"{salary_from:,} - {salary_to:,} {currency_symbol}"
@@ -186,25 +256,19 @@ class HHClient:
         else:
             salary_text = "Не указана"
         
-        experience = vacancy.get("experience", {}).get("name", "Не указан")
+        experience = (vacancy.get("experience") or {}).get("name") or "Не указан"
         
-        area = vacancy.get("area", {}).get("name", "Не указан")
+        area = (vacancy.get("area") or {}).get("name") or "Не указан"
         
-        url = vacancy.get("alternate_url", "")
+        url = vacancy.get("alternate_url") or ""
         
         published = vacancy.get("published_at", "")
         if published:
             try:
                 dt = date_parser.parse(published)
                 
-                months = {
-                    1: "января", 2: "февраля", 3: "марта", 4: "апреля",
-                    5: "мая", 6: "июня", 7: "июля", 8: "августа",
-                    9: "сентября", 10: "октября", 11: "ноября", 12: "декабря"
-                }
-                
                 day = dt.day
-                month = months[dt.month]
+                month = MONTHS_GENITIVE[dt.month]
                 year = dt.year
                 
                 published_text = f"{day} {month} {year}г."
@@ -213,14 +277,15 @@ class HHClient:
         else:
             published_text = "Неизвестно"
         
+        # Текст HH может содержать < и &: без экранирования Telegram отклонит всё сообщение
         message = (
-            f"💼 <b>{name}</b>\n\n"
-            f"🏢 Компания: <b>{company}</b>\n"
-            f"💰 Зарплата: <code>{salary_text}</code>\n"
-            f"🏙 Город: <code>{area}</code>\n"
-            f"📊 Опыт: <code>{experience}</code>\n"
+            f"💼 <b>{html.escape(name)}</b>\n\n"
+            f"🏢 Компания: <b>{html.escape(company)}</b>\n"
+            f"💰 Зарплата: <code>{html.escape(salary_text)}</code>\n"
+            f"🏙 Город: <code>{html.escape(area)}</code>\n"
+            f"📊 Опыт: <code>{html.escape(experience)}</code>\n"
             f"📅 Опубликовано: <code>{published_text}</code>\n\n"
-            f"🔗 <a href='{url}'>Открыть вакансию</a>"
+            f"🔗 <a href='{html.escape(url)}'>Открыть вакансию</a>"
         )
         
         return message
@@ -0,0 +1,184 @@
+import asyncio
+import base64
+import json
+import logging
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Параметры, которые зависят от момента запуска (водяной знак подписки),
+# при воспроизведении не участвуют в сопоставлении запросов
+VOLATILE_PARAMS = frozenset({"date_from"})
+
+RequestKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def request_key(path: str, params: Optional[Dict]) -> RequestKey:
+    """Ключ запроса для сопоставления записи: путь и параметры без изменчивых"""
+    return path, tuple(sorted(
+        (name, str(value)) for name, value in (params or {}).items()
+        if name not in VOLATILE_PARAMS
+    ))
+
+
+def encode_body(data: Optional[Dict]) -> Optional[str]:
+    if data is None:
+        return None
+    raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+    return base64.b64encode(zlib.compress(raw, 6)).decode()
+
+
+def decode_body(body: Optional[str]) -> Optional[Dict]:
+    if body is None:
+        return None
+    return json.loads(zlib.decompress(base64.b64decode(body)))
+
+
+class HHRecorder:
+    """
+    Запись трафика HH API в JSONL-файл, только дописыванием.
+
+    Одна строка - один запрос: путь, параметры, статус, время ответа
+    и тело ответа (JSON, сжатый zlib, в base64).
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Файл записи; создаётся при первой записи
+        """
+        self.path = Path(path)
+        self.records = 0
+        self._file = None
+
+    def record(self, path: str, params: Optional[Dict], status: int, data: Optional[Dict], elapsed: float):
+        """
+        Дописать один ответ
+
+        :param path: Путь запроса относительно адреса API (/vacancies)
+        :param params: Параметры запроса
+        :param status: HTTP-статус
+        :param data: Разобранное тело ответа (None, если не JSON или ошибка)
+        :param elapsed: Время ответа, секунд
+        """
+        line = json.dumps({
+            "recorded_at": datetime.utcnow().isoformat(),
+            "path": path,
+            "params": {name: str(value) for name, value in (params or {}).items()},
+            "status": status,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "body": encode_body(data),
+        }, ensure_ascii=False)
+
+        try:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            # Одна запись за вызов: строки разных процессов не перемешиваются
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.records += 1
+        except OSError as e:
+            logger.error(f"Error writing HH recording {self.path}: {e}")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class HHReplayTransport:
+    """
+    Воспроизведение записанного трафика HH API без сети.
+
+    Ответы на одинаковый запрос отдаются в порядке записи, после
+    последнего повторяется последний - так повторные циклы проверки
+    видят ту же выдачу, что и при записи. Запросы, которых нет в записи,
+    получают 404. Задержка - записанное время ответа, делённое на speed
+    (speed=0 - без задержек).
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        """
+        :param path: Файл, записанный HHRecorder
+        :param speed: Во сколько раз быстрее записи отвечать
+        """
+        self.path = Path(path)
+        self.speed = speed
+        self.served = 0
+        self.misses = 0
+        self._responses: Dict[RequestKey, List[Dict]] = defaultdict(list)
+        self._positions: Dict[RequestKey, int] = defaultdict(int)
+
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._responses[request_key(entry["path"], entry["params"])].append(entry)
+        logger.info(
+            f"Loaded {sum(map(len, self._responses.values()))} HH responses "
+            f"for {len(self._responses)} requests from {self.path}"
+        )
+
+    async def get(self, path: str, params: Optional[Dict] = None) -> Tuple[int, Optional[Dict]]:
+        """
+        Ответ на запрос из записи
+
+        :param path: Путь запроса относительно адреса API
+        :param params: Параметры запроса
+        :return: HTTP-статус и тело ответа
+        """
+        key = request_key(path, params)
+        entries = self._responses.get(key)
+        if not entries:
+            self.misses += 1
+            return 404, None
+
+        position = self._positions[key]
+        self._positions[key] = position + 1
+        entry = entries[min(position, len(entries) - 1)]
+        self.served += 1
+
+        if self.speed > 0 and entry["elapsed_ms"]:
+            await asyncio.sleep(entry["elapsed_ms"] / 1000 / self.speed)
+        return entry["status"], decode_body(entry["body"])
+
+    def searches(self) -> Iterator[Dict[str, str]]:
+        """Параметры записанных поисков первой страницы, без повторов"""
+        for path, params in self._responses:
+            params = dict(params)
+            if path == "/vacancies" and params.get("page", "0") == "0":
+                yield params
+
+    def rewind(self):
+        """Начать воспроизведение сначала"""
+        self._positions.clear()
+        self.served = 0
+        self.misses = 0
+
+
+_recorders: Dict[str, HHRecorder] = {}
+_transports: Dict[Tuple[str, float], HHReplayTransport] = {}
+
+
+def get_recorder(path: str) -> HHRecorder:
+    """Общий на процесс рекордер для файла"""
+    if path not in _recorders:
+        _recorders[path] = HHRecorder(path)
+    return _recorders[path]
+
+
+def get_replay_transport(path: str, speed: float = 1.0) -> HHReplayTransport:
+    """
+    Общий на процесс транспорт воспроизведения
+
+    Позиции воспроизведения сохраняются между клиентами, поэтому
+    последовательные циклы проверки получают ответы в порядке записи.
+    """
+    key = (path, speed)
+    if key not in _transports:
+        _transports[key] = HHReplayTransport(path, speed)
+    return _transports[key]
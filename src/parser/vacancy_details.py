@@ -0,0 +1,200 @@
+import asyncio
+import html
+import json
+import logging
+import re
+import time
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.config import settings
+from database.models import VacancyDetails
+from metrics import CACHE_REQUESTS, DB_SAVE_SECONDS
+from parser.hh_client import HHClient
+
+logger = logging.getLogger(__name__)
+
+# Поля ответа /vacancies/{id}, которых нет в выдаче поиска и которые показываем пользователю
+DETAIL_FIELDS = ("description", "key_skills", "schedule", "employment", "professional_roles", "address")
+
+DESCRIPTION_MAX_LENGTH = 2500
+
+_BLOCK_TAGS = re.compile(r"<\s*(br|/p|/li|/ul|/ol|/h\d)\s*/?>", re.IGNORECASE)
+_LIST_ITEM = re.compile(r"<\s*li[^>]*>", re.IGNORECASE)
+_ANY_TAG = re.compile(r"<[^>]+>")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def compress_details(data: Dict) -> bytes:
+    """Оставить полезные поля деталей вакансии и сжать их"""
+    trimmed = {field: data[field] for field in DETAIL_FIELDS if data.get(field)}
+    raw = json.dumps(trimmed, ensure_ascii=False, separators=(",", ":")).encode()
+    return zlib.compress(raw, 6)
+
+
+def decompress_details(payload: bytes) -> Dict:
+    return json.loads(zlib.decompress(payload))
+
+
+def html_to_text(value: str) -> str:
+    """Описание HH (HTML) в простой текст с абзацами и пунктами списков"""
+    value = _LIST_ITEM.sub("\n• ", value)
+    value = _BLOCK_TAGS.sub("\n", value)
+    value = html.unescape(_ANY_TAG.sub("", value))
+    return _BLANK_LINES.sub("\n\n", value).strip()
+
+
+def format_details(details: Dict) -> str:
+    """
+    Детали вакансии для сообщения Telegram (HTML)
+
+    :param details: Распакованные детали (DETAIL_FIELDS)
+    :return: Текст сообщения
+    """
+    lines = []
+
+    skills = [skill.get("name") for skill in details.get("key_skills") or [] if skill.get("name")]
+    if skills:
+        lines.append(f"🧠 Навыки: <code>{html.escape(', '.join(skills))}</code>")
+
+    for field, title in (("schedule", "🕒 График"), ("employment", "📝 Занятость")):
+        name = (details.get(field) or {}).get("name")
+        if name:
+            lines.append(f"{title}: <code>{html.escape(name)}</code>")
+
+    address = (details.get("address") or {}).get("raw")
+    if address:
+        lines.append(f"📍 Адрес: <code>{html.escape(address)}</code>")
+
+    description = html_to_text(details.get("description") or "")
+    if description:
+        if len(description) > DESCRIPTION_MAX_LENGTH:
+            description = description[:DESCRIPTION_MAX_LENGTH].rsplit(" ", 1)[0] + "…"
+        lines.append("")
+        lines.append(html.escape(description))
+
+    return "\n".join(lines) if lines else "Подробностей нет"
+
+
+class RateGate:
+    """Не чаще rate вызовов в секунду на весь процесс (равномерно)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class VacancyDetailsEnricher:
+    """
+    Детали вакансий из HH с хранением в сжатом виде в vacancy_details.
+
+    Детали загружаются только для доставленных пользователям вакансий:
+    пачкой, параллельно и с ограничением частоты запросов к HH. Повторные
+    просмотры («📄 Подробнее») читают их из базы без обращения к HH.
+    """
+
+    def __init__(
+        self,
+        hh_client: HHClient,
+        session_maker: async_sessionmaker,
+        concurrency: int = settings.DETAILS_CONCURRENCY,
+        rate: float = settings.DETAILS_RATE_PER_SECOND
+    ):
+        """
+        :param hh_client: Открытый клиент HH API
+        :param session_maker: Фабрика сессий
+        :param concurrency: Одновременных запросов деталей
+        :param rate: Запросов деталей в секунду
+        """
+        self.hh_client = hh_client
+        self.session_maker = session_maker
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._gate = RateGate(rate)
+        # Вакансия могла уйти нескольким пользователям: грузим её один раз
+        self._in_flight: Set[str] = set()
+
+    async def enrich(self, hh_ids: Iterable[str]) -> int:
+        """
+        Загрузить и сохранить детали вакансий, которых ещё нет в базе
+
+        :param hh_ids: ID вакансий HH
+        :return: Сколько деталей сохранено
+        """
+        wanted = list(dict.fromkeys(hh_ids))
+        if not wanted:
+            return 0
+
+        async with self.session_maker() as session:
+            result = await session.execute(
+                select(VacancyDetails.hh_id).where(VacancyDetails.hh_id.in_(wanted))
+            )
+            stored = set(result.scalars().all())
+
+        missing = [hh_id for hh_id in wanted if hh_id not in stored and hh_id not in self._in_flight]
+        if not missing:
+            return 0
+
+        self._in_flight.update(missing)
+        try:
+            fetched = await asyncio.gather(*(self._fetch(hh_id) for hh_id in missing))
+            rows = [row for row in fetched if row is not None]
+            if rows:
+                async with self.session_maker() as session:
+                    await self._store(session, rows)
+        finally:
+            self._in_flight.difference_update(missing)
+
+        logger.info(f"Enriched {len(rows)} of {len(missing)} delivered vacancies")
+        return len(rows)
+
+    async def get(self, session: AsyncSession, hh_id: str) -> Optional[Dict]:
+        """
+        Детали вакансии: из базы, а если их там нет - из HH с сохранением
+
+        :param session: Сессия БД
+        :param hh_id: ID вакансии HH
+        :return: Распакованные детали или None, если HH их не отдал
+        """
+        row = await session.get(VacancyDetails, hh_id)
+        CACHE_REQUESTS.labels("vacancy_details", "miss" if row is None else "hit").inc()
+        if row is None:
+            row = await self._fetch(hh_id)
+            if row is None:
+                return None
+            await self._store(session, [row])
+        return decompress_details(row.payload)
+
+    async def _fetch(self, hh_id: str) -> Optional[VacancyDetails]:
+        async with self._semaphore:
+            await self._gate.wait()
+            data = await self.hh_client.get_vacancy_details(hh_id)
+        if not data:
+            return None
+        return VacancyDetails(hh_id=hh_id, fetched_at=datetime.utcnow(), payload=compress_details(data))
+
+    @staticmethod
+    async def _store(session: AsyncSession, rows: List[VacancyDetails]):
+        try:
+            with DB_SAVE_SECONDS.labels("details").time():
+                for row in rows:
+                    # merge: детали могла сохранить параллельная загрузка
+                    await session.merge(row)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error saving vacancy details: {e}", exc_info=True)
+            await session.rollback()
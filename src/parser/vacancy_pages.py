@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from parser.hh_client import HHClient
+from metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+PageKey = Tuple[str, Optional[str], Optional[str], Optional[int], int]
+
+
+class VacancyPageLoader:
+    """
+    Страницы выдачи HH для режима просмотра с предзагрузкой следующей.
+
+    Страницы кешируются по параметрам поиска, поэтому пользователи
+    с одинаковыми запросами разделяют одни и те же загрузки.
+    """
+
+    def __init__(self, hh_client: HHClient, per_page: int = 5, ttl: float = 300, maxsize: int = 1000):
+        """
+        :param hh_client: Открытый клиент HH API
+        :param per_page: Вакансий на странице
+        :param ttl: Сколько секунд страница считается актуальной
+        :param maxsize: Максимум страниц в кеше
+        """
+        self.hh_client = hh_client
+        self.per_page = per_page
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._pages: "OrderedDict[PageKey, Tuple[float, asyncio.Task]]" = OrderedDict()
+
+    @staticmethod
+    def page_key(subscription, page: int) -> PageKey:
+        return (
+            subscription.keywords,
+            subscription.city,
+            subscription.experience,
+            subscription.salary_from,
+            page,
+        )
+
+    async def get_page(self, subscription, page: int) -> Dict:
+        """
+        Страница выдачи: из кеша, из уже идущей предзагрузки или из HH
+
+        :param subscription: Подписка (нужны keywords, city, experience, salary_from)
+        :param page: Номер страницы
+        :return: Ответ HH API с items и found
+        """
+        key = self.page_key(subscription, page)
+        task = self._lookup(key)
+        CACHE_REQUESTS.labels("vacancy_pages", "miss" if task is None else "hit").inc()
+        if task is None:
+            task = self._start(key)
+        data = await asyncio.shield(task)
+
+        if not data.get("items"):
+            # Пустой ответ может быть ошибкой HH - не держим его в кеше
+            self._pages.pop(key, None)
+        return data
+
+    def prefetch(self, subscription, page: int):
+        """Начать фоновую загрузку страницы, если её ещё нет в кеше"""
+        key = self.page_key(subscription, page)
+        if self._lookup(key) is None:
+            self._start(key)
+
+    def _lookup(self, key: PageKey) -> Optional[asyncio.Task]:
+        entry = self._pages.get(key)
+        if entry is None:
+            return None
+
+        expires_at, task = entry
+        if expires_at <= time.monotonic():
+            del self._pages[key]
+            return None
+
+        self._pages.move_to_end(key)
+        return task
+
+    def _start(self, key: PageKey) -> asyncio.Task:
+        keywords, city, experience, salary_from, page = key
+        task = asyncio.create_task(self.hh_client.search_vacancies(
+            text=keywords,
+            area=city,
+            experience=experience,
+            salary=salary_from,
+            per_page=self.per_page,
+            page=page
+        ))
+        self._pages[key] = (time.monotonic() + self.ttl, task)
+        while len(self._pages) > self.maxsize:
+            self._pages.popitem(last=False)
+        return task
@@ -1,36 +1,67 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone
-from sqlalchemy import select
+from sqlalchemy import func, literal_column, or_, select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.models import Vacancy
-from parser.hh_client import HHClient
+from database.models import VACANCY_SEARCH_DOCUMENT, Vacancy
+from parser.hh_client import AREA_IDS, HHClient
+from metrics import DB_SAVE_SECONDS
 import logging
 
 logger = logging.getLogger(__name__)
 
+SALARY_CURRENCIES = {"RUR": "руб.", "RUB": "руб.", "USD": "$", "EUR": "€"}
+
 
 class VacancyService:
     """Сервис для работы с вакансиями"""
     
     @staticmethod
-    async def save_vacancy(session: AsyncSession, vacancy_data: dict) -> Optional[Vacancy]:
+    async def save_vacancy(session: AsyncSession, vacancy_data: dict) -> Tuple[Optional[Vacancy], bool]:
+        """
+        Сохранить вакансию, если её ещё нет в БД
+        
+        :param session: Сессия БД
+        :param vacancy_data: Данные вакансии
+        :return: Вакансия (новая или уже сохранённая; None при ошибке записи)
+            и признак того, что она сохранена этим вызовом
+        """
         hh_id = str(vacancy_data.get('id'))
 
-        result = await session.execute(
-            select(Vacancy).where(Vacancy.hh_id == hh_id)
-        )
-        existing = result.scalar_one_or_none()
-        if existing:
-            return None
+        with DB_SAVE_SECONDS.labels("save").time():
+            result = await session.execute(
+                select(Vacancy).where(Vacancy.hh_id == hh_id)
+            )
+            existing = result.scalar_one_or_none()
+            if existing:
+                return existing, False
+
+            vacancy = VacancyService.build_vacancy(vacancy_data)
 
+            try:
+                session.add(vacancy)
+                await session.commit()
+                await session.refresh(vacancy)
+                return vacancy, True
+            except Exception as e:
+                logger.error(f"Error saving vacancy: {e}", exc_info=True)
+                await session.rollback()
+                return None, False
+    
+    @staticmethod
+    def build_vacancy(vacancy_data: dict) -> Vacancy:
+        """
+        Построить ORM-объект вакансии из элемента выдачи HH
+        
+        :param vacancy_data: Данные вакансии
+        :return: Несохранённый объект Vacancy
+        """
         salary_data = vacancy_data.get('salary')
         if salary_data:
             salary_from = salary_data.get('from')
             salary_to = salary_data.get('to')
             currency = salary_data.get('currency', 'RUR')
-            currency_map = {"RUR": "руб.", "RUB": "руб.", "USD": "$", "EUR": "€"}
-            cur = currency_map.get(currency, currency)
+            cur = SALARY_CURRENCIES.get(currency, currency)
 
             if salary_from and salary_to:
                 salary = f"{salary_from:,} - {salary_to:,} {cur}"
@@ -43,8 +74,117 @@ class VacancyService:
         else:
             salary = "Не указана"
 
-        published_at_str = vacancy_data.get('published_at', '')
-        published_at = datetime.utcnow()
+        published_at = VacancyService.parse_published_at(vacancy_data.get('published_at', ''))
+        area = vacancy_data.get('area') or {}
+        experience = vacancy_data.get('experience') or {}
+
+        return Vacancy(
+            hh_id=str(vacancy_data.get('id')),
+            title=vacancy_data.get('name', 'Без названия'),
+            company=(vacancy_data.get('employer') or {}).get('name') or 'Не указано',
+            salary=salary,
+            url=vacancy_data.get('alternate_url', ''),
+            published_at=published_at,
+            area_id=int(area['id']) if str(area.get('id', '')).isdigit() else None,
+            area_name=area.get('name'),
+            experience=experience.get('id'),
+            experience_name=experience.get('name'),
+            salary_from=salary_data.get('from') if salary_data else None,
+            salary_to=salary_data.get('to') if salary_data else None,
+            currency=salary_data.get('currency') if salary_data else None
+        )
+    
+    @staticmethod
+    def to_hh_item(vacancy: Vacancy) -> dict:
+        """
+        Сохранённая вакансия в формате элемента выдачи HH (для format_vacancy)
+        
+        :param vacancy: Вакансия из БД
+        :return: Словарь с полями, которые использует форматирование
+        """
+        salary = None
+        if vacancy.salary_from or vacancy.salary_to:
+            salary = {"from": vacancy.salary_from, "to": vacancy.salary_to, "currency": vacancy.currency or "RUR"}
+        return {
+            "id": vacancy.hh_id,
+            "name": vacancy.title,
+            "employer": {"name": vacancy.company or "Не указано"},
+            "salary": salary,
+            "area": {"id": vacancy.area_id, "name": vacancy.area_name or "Не указан"},
+            "experience": {"id": vacancy.experience, "name": vacancy.experience_name or "Не указан"},
+            "alternate_url": vacancy.url,
+            "published_at": vacancy.published_at.isoformat() + "+00:00",
+        }
+    
+    @staticmethod
+    def _stored_search_query(session: AsyncSession, subscription, columns):
+        """Запрос сохранённых вакансий по параметрам подписки"""
+        query = select(*columns)
+        
+        words = subscription.keywords.replace(',', ' ').split()
+        if session.bind.dialect.name == "postgresql":
+            query = query.where(
+                literal_column(VACANCY_SEARCH_DOCUMENT).op("@@")(
+                    func.plainto_tsquery(literal_column("'russian'"), " ".join(words))
+                )
+            )
+        else:
+            # Без PostgreSQL (SQLite в бенчмарках) - подстрока каждого слова
+            for word in words:
+                query = query.where(or_(Vacancy.title.ilike(f"%{word}%"), Vacancy.company.ilike(f"%{word}%")))
+        
+        if subscription.city:
+            area_id = AREA_IDS.get(subscription.city.lower().strip())
+            if area_id:
+                query = query.where(Vacancy.area_id == area_id)
+        if subscription.experience:
+            query = query.where(Vacancy.experience == subscription.experience)
+        if subscription.salary_from:
+            query = query.where(func.coalesce(Vacancy.salary_to, Vacancy.salary_from) >= subscription.salary_from)
+        return query
+    
+    @staticmethod
+    async def search_stored(
+        session: AsyncSession,
+        subscription,
+        limit: int,
+        after: Optional[Tuple[datetime, int]] = None
+    ) -> List[Vacancy]:
+        """
+        Локальный поиск по сохранённым вакансиям, от новых к старым
+        
+        На PostgreSQL - полнотекстовый поиск по названию и компании
+        (GIN-индекс ix_vacancies_search) и фильтры по городу, опыту и зарплате.
+        
+        :param session: Сессия БД
+        :param subscription: Подписка (keywords, city, experience, salary_from)
+        :param limit: Сколько вакансий вернуть
+        :param after: (published_at, id) последней показанной вакансии
+        :return: Вакансии страницы
+        """
+        query = VacancyService._stored_search_query(session, subscription, [Vacancy])
+        if after:
+            query = query.where(tuple_(Vacancy.published_at, Vacancy.id) < tuple_(*after))
+        result = await session.execute(
+            query.order_by(Vacancy.published_at.desc(), Vacancy.id.desc()).limit(limit)
+        )
+        return list(result.scalars().all())
+    
+    @staticmethod
+    async def count_stored(session: AsyncSession, subscription) -> int:
+        """Сколько сохранённых вакансий подходит под подписку"""
+        query = VacancyService._stored_search_query(session, subscription, [func.count(Vacancy.id)])
+        result = await session.execute(query)
+        return result.scalar() or 0
+    
+    @staticmethod
+    def parse_published_at(published_at_str: str) -> datetime:
+        """
+        Разбор даты публикации HH в naive UTC datetime
+        
+        :param published_at_str: Дата в формате ISO 8601 (например, 2024-01-01T10:00:00+0300)
+        :return: Дата в UTC без tzinfo или текущее время, если разобрать не удалось
+        """
         try:
             iso = published_at_str
             if iso.endswith('Z'):
@@ -55,28 +195,46 @@ class VacancyService:
                 dt = datetime.fromisoformat(iso)
             if dt.tzinfo is not None:
                 dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
-            published_at = dt
+            return dt
         except Exception:
-            published_at = datetime.utcnow()
-
-        vacancy = Vacancy(
-            hh_id=hh_id,
-            title=vacancy_data.get('name', 'Без названия'),
-            company=vacancy_data.get('employer', {}).get('name', 'Не указано'),
-            salary=salary,
-            url=vacancy_data.get('alternate_url', ''),
-            published_at=published_at
+            return datetime.utcnow()
+    
+    @staticmethod
+    async def seed_vacancies(session: AsyncSession, items: List[dict]) -> int:
+        """
+        Сохранить вакансии как уже известные одним запросом и одним коммитом
+        
+        Используется при первичной загрузке подписки, чтобы следующий
+        цикл проверки не считал старую выдачу новой.
+        
+        :param session: Сессия БД
+        :param items: Вакансии из выдачи HH
+        :return: Количество добавленных вакансий
+        """
+        by_id = {str(item.get('id')): item for item in items if item.get('id')}
+        if not by_id:
+            return 0
+        
+        result = await session.execute(
+            select(Vacancy.hh_id).where(Vacancy.hh_id.in_(list(by_id)))
         )
-
+        existing = set(result.scalars().all())
+        
+        added = 0
+        for hh_id, item in by_id.items():
+            if hh_id in existing:
+                continue
+            session.add(VacancyService.build_vacancy(item))
+            added += 1
+        
         try:
-            session.add(vacancy)
-            await session.commit()
-            await session.refresh(vacancy)
-            return vacancy
-        except Exception:
-            logger.error(f"Error saving vacancy: {e}", exc_info=True)
+            with DB_SAVE_SECONDS.labels("seed").time():
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Error seeding vacancies: {e}", exc_info=True)
             await session.rollback()
-            return None
+            return 0
+        return added
     
     @staticmethod
     async def get_new_vacancies_count(session: AsyncSession, since: datetime) -> int:
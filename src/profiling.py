@@ -0,0 +1,159 @@
+import cProfile
+import heapq
+import io
+import json
+import logging
+import pstats
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Awaitable, Dict, List, Optional, Tuple, TypeVar
+
+from redis.asyncio import Redis
+
+from bot.config import settings
+
+logger = logging.getLogger(__name__)
+span_logger = logging.getLogger("hh_jobs.spans")
+
+PROFILE_NEXT_CYCLE_KEY = "hh_jobs:profile:next_cycle"
+
+T = TypeVar("T")
+
+
+class SpanRecorder:
+    """
+    Самые медленные корневые спаны цикла.
+
+    Хранит только top-N, поэтому в конце цикла одной строкой видно,
+    какие подписки (и какие запросы) заняли больше всего времени.
+    """
+
+    def __init__(self, limit: int = 10):
+        self.limit = limit
+        self.count = 0
+        self._heap: List[Tuple[float, int, Dict[str, Any]]] = []
+
+    def add(self, record: Dict[str, Any]):
+        self.count += 1
+        item = (record["ms"], self.count, record)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, item)
+        else:
+            heapq.heappushpop(self._heap, item)
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        return [record for _, _, record in sorted(self._heap, reverse=True)]
+
+
+_current_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("span_stages", default=None)
+_current_recorder: ContextVar[Optional[SpanRecorder]] = ContextVar("span_recorder", default=None)
+
+
+@contextmanager
+def span(name: str, **fields: Any):
+    """
+    Замер времени участка кода
+
+    Вложенный спан добавляет своё время к этапам родителя; корневой
+    спан пишет одну структурированную строку с разбивкой по этапам.
+    При TRACE_SPANS=False ничего не замеряется.
+
+    :param name: Название спана или этапа
+    :param fields: Поля для лога корневого спана (id подписки, ключ запроса)
+    """
+    if not settings.TRACE_SPANS:
+        yield
+        return
+
+    parent_stages = _current_stages.get()
+    stages: Dict[str, float] = {}
+    token = _current_stages.set(stages)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _current_stages.reset(token)
+
+        if parent_stages is not None:
+            parent_stages[name] = parent_stages.get(name, 0.0) + elapsed
+        else:
+            record = {
+                "span": name,
+                "ms": round(elapsed * 1000, 1),
+                **fields,
+                "stages": {stage: round(seconds * 1000, 1) for stage, seconds in stages.items()},
+            }
+            span_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+            recorder = _current_recorder.get()
+            if recorder is not None:
+                recorder.add(record)
+
+
+@contextmanager
+def record_slowest_spans(limit: int = 10):
+    """Собрать самые медленные корневые спаны и записать их в лог по выходу"""
+    recorder = SpanRecorder(limit)
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
+        if recorder.count:
+            span_logger.info(json.dumps(
+                {"span": "slowest", "total": recorder.count, "top": recorder.slowest()},
+                ensure_ascii=False,
+                default=str
+            ))
+
+
+async def request_cycle_profile(redis: Redis):
+    """Попросить воркер профилировать следующий цикл проверки"""
+    await redis.set(PROFILE_NEXT_CYCLE_KEY, "1", ex=settings.CHECK_INTERVAL_MINUTES * 60 * 2)
+
+
+async def take_profile_request(redis: Optional[Redis]) -> bool:
+    """Нужно ли профилировать текущий цикл; запрос из Redis снимается"""
+    if settings.PROFILE_CYCLES:
+        return True
+    if redis is None:
+        return False
+    try:
+        return bool(await redis.getdel(PROFILE_NEXT_CYCLE_KEY))
+    except Exception as e:
+        logger.error(f"Error reading profile request: {e}")
+        return False
+
+
+async def run_profiled(coro: Awaitable[T], name: str = "cycle") -> T:
+    """
+    Выполнить корутину под cProfile и сохранить отчёт в PROFILE_DIR
+
+    Профилируется весь event loop на время выполнения, поэтому в отчёт
+    попадают и HTTP-клиенты, и драйвер БД.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return await coro
+    finally:
+        profiler.disable()
+        save_profile(profiler, name)
+
+
+def save_profile(profiler: cProfile.Profile, name: str) -> Path:
+    """Сохранить .prof (для snakeviz/pstats) и текстовую сводку рядом"""
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.prof"
+    profiler.dump_stats(path)
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+    path.with_suffix(".txt").write_text(summary.getvalue())
+
+    logger.info(f"Profile saved to {path}")
+    return path
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from typing import Optional, Set
+
+from celery_app import celery_app
+from tasks.runtime import CheckerRuntime
+from tasks.vacancy_checker import BACKFILL_QUEUE, BACKFILL_TASK_NAME, run_backfill
+
+logger = logging.getLogger(__name__)
+
+_embedded_runtime: Optional[CheckerRuntime] = None
+_background_tasks: Set[asyncio.Task] = set()
+# Сколько воркеров слушают очередь backfill (None - ещё не проверяли)
+_queue_consumers: Optional[int] = None
+
+
+def set_embedded_runtime(runtime: Optional[CheckerRuntime]):
+    """
+    Зарегистрировать runtime встроенного планировщика.
+
+    Пока он задан, первичная загрузка выполняется прямо в процессе бота,
+    без брокера Celery.
+    """
+    global _embedded_runtime
+    _embedded_runtime = runtime
+
+
+async def enqueue_backfill(subscription_id: int):
+    """
+    Запустить первичную загрузку новой подписки
+
+    :param subscription_id: ID созданной подписки
+    """
+    if _embedded_runtime is not None:
+        task = asyncio.create_task(run_backfill(_embedded_runtime, subscription_id))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        return
+
+    if _queue_consumers == 0:
+        logger.warning(
+            f"Backfill of subscription {subscription_id} is queued, but no worker consumes "
+            f"the {BACKFILL_QUEUE} queue: it waits for the next check cycle"
+        )
+    try:
+        await asyncio.to_thread(
+            celery_app.send_task,
+            BACKFILL_TASK_NAME,
+            args=[subscription_id],
+            queue=BACKFILL_QUEUE,
+            priority=0,
+        )
+    except Exception as e:
+        # Подписка уже сохранена: её подхватит ближайший периодический цикл
+        logger.error(f"Error enqueuing backfill for subscription {subscription_id}: {e}")
+
+
+def count_queue_consumers(timeout: float = 2.0) -> int:
+    """Сколько воркеров Celery отвечают, что слушают очередь backfill (блокирующий вызов)"""
+    replies = celery_app.control.inspect(timeout=timeout).active_queues() or {}
+    return sum(
+        1 for queues in replies.values()
+        if any(queue.get("name") == BACKFILL_QUEUE for queue in queues)
+    )
+
+
+async def check_queue_consumers():
+    """
+    Проверить при старте бота, что очередь backfill кто-то разбирает
+
+    Без воркера (например, при python -m tasks.scheduler) задачи
+    первичной загрузки копятся в брокере, а новая подписка получает
+    вакансии только со следующим циклом проверки.
+    """
+    global _queue_consumers
+    try:
+        _queue_consumers = await asyncio.to_thread(count_queue_consumers)
+    except Exception as e:
+        logger.warning(f"Could not check consumers of the {BACKFILL_QUEUE} queue: {e}")
+        return
+    if not _queue_consumers:
+        logger.warning(
+            f"No Celery worker consumes the {BACKFILL_QUEUE} queue; "
+            f"set BACKFILL_IN_PROCESS=true when checks run via tasks.scheduler"
+        )
+
+
+async def drain_backfills():
+    """Дождаться первичных загрузок, запущенных в процессе бота"""
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.models import CycleReport
+from parser.hh_client import HHClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CycleStats:
+    """
+    Счётчики одного цикла проверки и общий для порции подписок кеш поиска.
+
+    Подписки с одинаковыми параметрами (и одинаковым водяным знаком)
+    получают одну выдачу HH на всех; кеш живёт в пределах порции и хранит
+    ответ только пока его ещё ждут другие подписки этой порции. Поиски
+    следующих подписок можно начать заранее (prefetch): они идут
+    параллельно, сколько позволяет лимит HHClient.
+    """
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    subscriptions: int = 0
+    hh_calls: int = 0
+    cache_hits: int = 0
+    new_vacancies: int = 0
+    messages_sent: int = 0
+    failures: int = 0
+    # Повторные совпадения вакансии у одного пользователя, не ставшие сообщениями
+    deduplicated: int = 0
+    queries: Set[Hashable] = field(default_factory=set)
+    # id вакансий, сохранённых самим этим циклом: новые для всех его подписок
+    saved: Set[int] = field(default_factory=set)
+    _started: float = field(default_factory=time.perf_counter)
+    _pending: Counter = field(default_factory=Counter)
+    _searches: Dict[Hashable, asyncio.Task] = field(default_factory=dict)
+    _claimed: Set[Hashable] = field(default_factory=set)
+
+    @staticmethod
+    def search_key(query_key: Hashable, params: Dict) -> Tuple[Hashable, Any]:
+        """Ключ выдачи: параметры подписки и водяной знак (date_from)"""
+        return query_key, params.get("date_from")
+
+    def plan_chunk(self, searches: Iterable[Tuple[Hashable, Dict]]):
+        """
+        Начать новую порцию: сколько раз в ней понадобится каждая выдача
+
+        :param searches: Параметры подписки и аргументы поиска каждой подписки порции
+        """
+        self.finish_chunk()
+        self._pending = Counter(self.search_key(query_key, params) for query_key, params in searches)
+        self.queries.update(query_key for query_key, _ in self._pending)
+
+    def finish_chunk(self):
+        """Отменить начатые заранее поиски, которые так и не понадобились"""
+        for task in self._searches.values():
+            task.cancel()
+        self._searches.clear()
+        self._claimed.clear()
+
+    def prefetch(self, hh_client: HHClient, query_key: Hashable, **params):
+        """
+        Начать поиск подписки заранее, не дожидаясь ответа
+
+        :param hh_client: Открытый клиент HH API
+        :param query_key: Параметры подписки (без водяного знака)
+        :param params: Аргументы HHClient.search_vacancies
+        """
+        cache_key = self.search_key(query_key, params)
+        if cache_key not in self._searches:
+            self._start_search(hh_client, cache_key, params)
+
+    async def search_vacancies(self, hh_client: HHClient, query_key: Hashable, **params) -> Dict:
+        """
+        Поиск через HH-клиент с переиспользованием выдачи внутри порции
+
+        :param hh_client: Открытый клиент HH API
+        :param query_key: Параметры подписки (без водяного знака)
+        :param params: Аргументы HHClient.search_vacancies
+        """
+        cache_key = self.search_key(query_key, params)
+        self._pending[cache_key] -= 1
+
+        task = self._searches.get(cache_key)
+        if task is None:
+            task = self._start_search(hh_client, cache_key, params)
+        elif cache_key in self._claimed:
+            self.cache_hits += 1
+        self._claimed.add(cache_key)
+        data = await task
+
+        # Пустую выдачу (или ошибку HH) не переиспользуем: следующая подписка спросит заново
+        if self._pending[cache_key] <= 0 or not data.get("items"):
+            if self._searches.get(cache_key) is task:
+                del self._searches[cache_key]
+                self._claimed.discard(cache_key)
+        return data
+
+    def _start_search(self, hh_client: HHClient, cache_key: Hashable, params: Dict) -> asyncio.Task:
+        self.hh_calls += 1
+        task = asyncio.create_task(hh_client.search_vacancies(**params))
+        self._searches[cache_key] = task
+        return task
+
+    def to_report(self) -> CycleReport:
+        duration = time.perf_counter() - self._started
+        return CycleReport(
+            started_at=self.started_at,
+            finished_at=self.started_at + timedelta(seconds=duration),
+            duration_seconds=duration,
+            subscriptions=self.subscriptions,
+            distinct_queries=len(self.queries),
+            hh_calls=self.hh_calls,
+            cache_hits=self.cache_hits,
+            new_vacancies=self.new_vacancies,
+            messages_sent=self.messages_sent,
+            failures=self.failures,
+        )
+
+
+async def save_cycle_report(session_maker: async_sessionmaker, stats: CycleStats) -> Optional[CycleReport]:
+    """Сохранить итоги цикла; ошибка записи не должна ронять цикл"""
+    report = stats.to_report()
+    try:
+        async with session_maker() as session:
+            session.add(report)
+            await session.commit()
+    except Exception as e:
+        logger.error(f"Error saving cycle report: {e}", exc_info=True)
+        return None
+    return report
+
+
+async def load_recent_reports(session: AsyncSession, since: datetime, limit: int = 5000) -> Sequence[CycleReport]:
+    """Отчёты циклов начиная с since, новые первыми (по индексу started_at)"""
+    result = await session.execute(
+        select(CycleReport)
+        .where(CycleReport.started_at >= since)
+        .order_by(CycleReport.started_at.desc())
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Перцентиль по отсортированной копии (ближайший ранг)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import uuid
+from typing import Optional
+
+from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class LockLostError(RuntimeError):
+    """Аренда блокировки истекла или перехвачена, пока работа ещё шла"""
+
+
+class LeaseLock:
+    """
+    Распределённая блокировка в Redis с арендой и продлением по heartbeat.
+
+    Ключ живёт ttl секунд и продлевается фоновой задачей, пока владелец жив.
+    Если процесс упал, блокировка освобождается сама по истечении аренды.
+    """
+
+    _RENEW_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('pexpire', KEYS[1], ARGV[2]) "
+        "else return 0 end"
+    )
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) "
+        "else return 0 end"
+    )
+
+    def __init__(self, redis: Redis, key: str, ttl: float = 60):
+        """
+        :param redis: Асинхронный клиент Redis
+        :param key: Ключ блокировки
+        :param ttl: Длительность аренды в секундах
+        """
+        self.redis = redis
+        self.key = key
+        self.ttl_ms = int(ttl * 1000)
+        self.token = uuid.uuid4().hex
+        self.lost = False
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    async def acquire(self) -> bool:
+        """
+        Попытаться захватить блокировку без ожидания
+
+        :return: True, если блокировка получена
+        """
+        acquired = await self.redis.set(self.key, self.token, nx=True, px=self.ttl_ms)
+        if not acquired:
+            return False
+
+        self.lost = False
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        return True
+
+    async def release(self):
+        """Остановить heartbeat и снять блокировку, если она ещё наша"""
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+
+        try:
+            await self.redis.eval(self._RELEASE_SCRIPT, 1, self.key, self.token)
+        except Exception as e:
+            logger.error(f"Error releasing lock {self.key}: {e}")
+
+    def ensure_held(self):
+        """
+        Проверить, что аренда не потеряна
+
+        :raises LockLostError: Heartbeat не смог продлить аренду
+        """
+        if self.lost:
+            raise LockLostError(f"Lock {self.key} was lost")
+
+    async def holder(self) -> Optional[str]:
+        """Токен текущего владельца блокировки"""
+        value = await self.redis.get(self.key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def _heartbeat(self):
+        interval = self.ttl_ms / 1000 / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                renewed = await self.redis.eval(
+                    self._RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms
+                )
+            except Exception as e:
+                logger.error(f"Error renewing lock {self.key}: {e}")
+                continue
+
+            if not renewed:
+                self.lost = True
+                logger.error(f"Lock {self.key} was lost before the run finished")
+                return
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+from typing import Coroutine, Optional, Set
+
+from aiogram import Bot
+from celery.signals import worker_init, worker_process_init, worker_process_shutdown, worker_shutdown
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from bot.client import create_bot
+from bot.config import settings
+from database.database import create_engine, engine_stats
+from metrics import mark_process_dead, start_metrics_server
+from parser.hh_client import HHClient
+from parser.vacancy_details import VacancyDetailsEnricher
+
+logger = logging.getLogger(__name__)
+
+
+class CheckerRuntime:
+    """Долгоживущие ресурсы проверки вакансий: пул БД, бот, HH-клиент и Redis"""
+
+    def __init__(
+        self,
+        bot: Optional[Bot] = None,
+        engine: Optional[AsyncEngine] = None,
+        use_redis: bool = True,
+        details_queue: Optional[str] = None
+    ):
+        """
+        :param bot: Готовый экземпляр бота (например, бота из процесса aiogram);
+            если не передан, runtime создаёт и закрывает своего
+        :param engine: Готовый engine БД (чтобы процесс бота держал один пул);
+            если не передан, runtime создаёт и закрывает свой
+        :param use_redis: Подключаться ли к Redis для блокировок и статистики
+        :param details_queue: Очередь Celery для загрузки деталей вакансий;
+            без неё детали грузятся фоновой задачей в этом же процессе
+        """
+        self.engine: Optional[AsyncEngine] = engine
+        self.session_maker: Optional[async_sessionmaker] = None
+        self.bot: Optional[Bot] = bot
+        self.hh_client: Optional[HHClient] = None
+        self.details: Optional[VacancyDetailsEnricher] = None
+        self.redis: Optional[Redis] = None
+        self._owns_bot = bot is None
+        self._owns_engine = engine is None
+        self.details_queue = details_queue
+        self._use_redis = use_redis
+        self._background: Set[asyncio.Task] = set()
+        self._started = False
+
+    async def start(self):
+        """Создание пула соединений, бота и HTTP-сессии HH"""
+        if self._started:
+            return
+
+        if self.engine is None:
+            self.engine = create_engine("hh-jobs-worker", pool_size=settings.DB_WORKER_POOL_SIZE)
+        self.session_maker = async_sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+
+        if self.bot is None:
+            self.bot = create_bot()
+
+        self.hh_client = HHClient()
+        await self.hh_client.__aenter__()
+        self.details = VacancyDetailsEnricher(self.hh_client, self.session_maker)
+
+        if self._use_redis:
+            self.redis = Redis.from_url(settings.redis_url)
+
+        self._started = True
+        logger.info("Checker runtime started")
+
+    def spawn(self, coro: Coroutine) -> asyncio.Task:
+        """
+        Запустить необязательную фоновую работу, которую никто не ждёт
+
+        Незавершённые задачи отменяются при закрытии runtime.
+        """
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def close(self):
+        """Освобождение всех ресурсов"""
+        if not self._started:
+            return
+
+        self._started = False
+
+        for task in self._background:
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+
+        try:
+            await self.hh_client.__aexit__(None, None, None)
+        except Exception as e:
+            logger.error(f"Error closing HH client: {e}")
+
+        if self.redis:
+            try:
+                await self.redis.aclose()
+            except Exception as e:
+                logger.error(f"Error closing Redis client: {e}")
+
+        if self._owns_bot and self.bot:
+            try:
+                await self.bot.session.close()
+            except Exception as e:
+                logger.error(f"Error closing bot session: {e}")
+
+        logger.info(f"DB stats: {engine_stats(self.engine)}")
+        if self._owns_engine:
+            try:
+                await self.engine.dispose()
+            except Exception as e:
+                logger.error(f"Error disposing engine: {e}")
+
+        logger.info("Checker runtime closed")
+
+
+class WorkerRuntime:
+    """
+    Постоянный event loop воркера Celery вместе с ресурсами проверки.
+
+    Создаётся один раз на процесс и переиспользуется всеми запусками задач.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.checker = CheckerRuntime(details_queue=settings.DETAILS_QUEUE)
+        self.loop.run_until_complete(self.checker.start())
+
+    def run(self, coro):
+        """Выполнить корутину в event loop воркера"""
+        return self.loop.run_until_complete(coro)
+
+    def shutdown(self):
+        """Корректная остановка ресурсов и закрытие event loop"""
+        try:
+            self.loop.run_until_complete(self.checker.close())
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+        except Exception as e:
+            logger.error(f"Error shutting down worker runtime: {e}", exc_info=True)
+        finally:
+            self.loop.close()
+
+
+_worker_runtime: Optional[WorkerRuntime] = None
+
+
+def get_worker_runtime() -> WorkerRuntime:
+    """
+    Получить runtime текущего процесса воркера.
+
+    При --pool=solo сигнал worker_process_init не отправляется,
+    поэтому runtime также создаётся лениво при первом запуске задачи.
+    """
+    global _worker_runtime
+    if _worker_runtime is None:
+        _worker_runtime = WorkerRuntime()
+    return _worker_runtime
+
+
+def shutdown_worker_runtime():
+    """Остановить runtime текущего процесса, если он был создан"""
+    global _worker_runtime
+    if _worker_runtime is not None:
+        _worker_runtime.shutdown()
+        _worker_runtime = None
+
+
+@worker_init.connect
+def _init_worker(**kwargs):
+    # Эндпоинт поднимается в главном процессе воркера; при prefork
+    # дочерние процессы пишут метрики в PROMETHEUS_MULTIPROC_DIR
+    if settings.METRICS_PORT:
+        start_metrics_server(settings.METRICS_PORT)
+
+
+@worker_process_init.connect
+def _init_worker_process(**kwargs):
+    get_worker_runtime()
+
+
+@worker_process_shutdown.connect
+def _shutdown_worker_process(**kwargs):
+    shutdown_worker_runtime()
+    mark_process_dead(os.getpid())
+
+
+@worker_shutdown.connect
+def _shutdown_worker(**kwargs):
+    shutdown_worker_runtime()
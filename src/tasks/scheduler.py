@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import random
+import signal
+from typing import Optional
+
+from bot.config import settings
+from metrics import start_metrics_server
+from tasks.runtime import CheckerRuntime
+from tasks.vacancy_checker import run_check_cycle
+
+logger = logging.getLogger(__name__)
+
+
+class CheckScheduler:
+    """
+    Периодический запуск цикла проверки внутри asyncio-процесса.
+
+    Заменяет связку Celery beat + worker + брокер на одной ноде:
+    циклы идут строго последовательно, пропущенные тики не накапливаются.
+    """
+
+    def __init__(
+        self,
+        runtime: CheckerRuntime,
+        interval: float = settings.CHECK_INTERVAL_MINUTES * 60,
+        jitter: float = settings.CHECK_JITTER_SECONDS
+    ):
+        """
+        :param runtime: Ресурсы проверки (должны быть запущены до start)
+        :param interval: Интервал между запусками в секундах
+        :param jitter: Максимальная случайная задержка запуска в секундах
+        """
+        self.runtime = runtime
+        self.interval = interval
+        self.jitter = jitter
+        self._stop_event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> asyncio.Task:
+        """Запустить планировщик фоновой задачей"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        """Попросить планировщик остановиться после текущего цикла"""
+        self._stop_event.set()
+
+    async def shutdown(self, timeout: float = settings.SCHEDULER_SHUTDOWN_TIMEOUT):
+        """
+        Корректная остановка: дождаться текущего цикла, но не дольше timeout
+
+        :param timeout: Сколько секунд ждать завершения цикла
+        """
+        self.stop()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Check cycle did not finish in time, cancelling it")
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def run(self):
+        """Основной цикл планировщика"""
+        loop = asyncio.get_running_loop()
+        next_run = loop.time() + random.uniform(0, self.jitter)
+        logger.info(f"Check scheduler started, interval {self.interval}s")
+
+        while not self._stop_event.is_set():
+            delay = next_run - loop.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+
+            started = loop.time()
+            try:
+                await run_check_cycle(self.runtime)
+            except Exception as e:
+                logger.error(f"Error in scheduled check cycle: {e}", exc_info=True)
+
+            next_run = started + self.interval + random.uniform(0, self.jitter)
+            if next_run < loop.time():
+                logger.warning("Check cycle overran its interval, starting the next one now")
+                next_run = loop.time()
+
+        logger.info("Check scheduler stopped")
+
+
+async def main():
+    if settings.METRICS_PORT:
+        start_metrics_server(settings.METRICS_PORT)
+
+    runtime = CheckerRuntime(use_redis=bool(settings.REDIS_HOST))
+    await runtime.start()
+
+    scheduler = CheckScheduler(runtime)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, scheduler.stop)
+
+    try:
+        await scheduler.start()
+    finally:
+        await runtime.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,11 +1,27 @@
 import asyncio
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import html
+import json
+import time
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from redis.asyncio import Redis
+from sqlalchemy import select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from celery_app import celery_app
-from database.models import Subscription, User
+from database.models import Subscription, SubscriptionWatermark, User
 from parser.hh_client import HHClient
 from parser.vacancy_service import VacancyService
+from bot.keyboards.main_kb import get_vacancy_details_keyboard
+from tasks.cycle_report import CycleStats, save_cycle_report
+from tasks.locks import LeaseLock, LockLostError
+from tasks.runtime import CheckerRuntime, get_worker_runtime
+from profiling import record_slowest_spans, run_profiled, span, take_profile_request
+from metrics import (
+    CHECK_CYCLE_SECONDS, NEW_VACANCIES, NOTIFICATIONS_SENT, SEND_FAILURES, TELEGRAM_SEND_SECONDS
+)
 from bot.config import settings
 
 import logging
@@ -13,6 +29,79 @@ from aiogram import Bot
 
 logger = logging.getLogger(__name__)
 
+CHECK_CYCLE_LOCK_KEY = "hh_jobs:lock:check_cycle"
+CHECK_CYCLE_STATS_KEY = "hh_jobs:check_cycle:stats"
+CHECK_TASK_NAME = "tasks.vacancy_checker.check_new_vacancies"
+BACKFILL_TASK_NAME = "tasks.vacancy_checker.backfill_subscription"
+BACKFILL_QUEUE = "backfill"
+DETAILS_TASK_NAME = "tasks.vacancy_checker.enrich_vacancy_details"
+
+# Колонки подписки, нужные циклу проверки
+SUBSCRIPTION_COLUMNS = (
+    Subscription.id,
+    Subscription.user_id,
+    Subscription.keywords,
+    Subscription.city,
+    Subscription.experience,
+    Subscription.salary_from,
+)
+
+
+class PendingNotifications:
+    """
+    Новые вакансии, найденные по подпискам и ещё не отправленные.
+
+    Совпадения собираются по пользователю: вакансия, подошедшая под
+    несколько его подписок, хранится один раз вместе с ключевыми словами
+    всех этих подписок и уходит одним сообщением.
+
+    Подписки одного пользователя могут попасть в разные порции цикла,
+    поэтому уже отправленное ему помнится, пока не начнётся следующий
+    пользователь.
+    """
+
+    def __init__(self):
+        self._by_user: Dict[int, Dict[str, Tuple[dict, List[str]]]] = {}
+        self._sent_user_id: Optional[int] = None
+        self._sent: Set[str] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self._by_user)
+
+    def add(self, user_id: int, vacancy_data: dict, keywords: str):
+        """
+        :param user_id: ID пользователя в БД
+        :param vacancy_data: Вакансия из выдачи HH
+        :param keywords: Ключевые слова подписки, под которую она подошла
+        """
+        matches = self._by_user.setdefault(user_id, {})
+        hh_id = str(vacancy_data.get('id'))
+        if hh_id in matches:
+            matches[hh_id][1].append(keywords)
+        else:
+            matches[hh_id] = (vacancy_data, [keywords])
+
+    def drain(self) -> Iterator[Tuple[int, Dict[str, Tuple[dict, List[str]]]]]:
+        """Забрать накопленные совпадения по пользователям"""
+        by_user, self._by_user = self._by_user, {}
+        return iter(by_user.items())
+
+    def mark_sent(self, user_id: int, hh_id: str) -> bool:
+        """
+        Отметить отправку вакансии пользователю
+
+        :param user_id: ID пользователя в БД
+        :param hh_id: ID вакансии в HH
+        :return: False, если вакансия уже уходила этому пользователю
+        """
+        if user_id != self._sent_user_id:
+            self._sent_user_id = user_id
+            self._sent = set()
+        if hh_id in self._sent:
+            return False
+        self._sent.add(hh_id)
+        return True
+
 
 @celery_app.task(name='tasks.vacancy_checker.check_new_vacancies')
 def check_new_vacancies():
@@ -21,140 +110,584 @@ def check_new_vacancies():
     """
     logger.info("Starting vacancy check task...")
     
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    runtime = get_worker_runtime()
     
     try:
-        loop.run_until_complete(process_all_subscriptions())
+        runtime.run(run_check_cycle(runtime.checker))
         logger.info("Vacancy check task completed successfully")
     except Exception as e:
         logger.error(f"Error in vacancy check task: {e}", exc_info=True)
         raise
+
+
+async def run_check_cycle(runtime: CheckerRuntime, lock_key: str = CHECK_CYCLE_LOCK_KEY) -> bool:
+    """
+    Запуск цикла проверки под распределённой блокировкой
+    
+    Если предыдущий цикл (или цикл того же шарда) ещё идёт, запуск
+    пропускается и фиксируется в статистике, а не выполняется параллельно.
+    
+    :param runtime: Запущенные ресурсы проверки
+    :param lock_key: Ключ блокировки (для шардов - свой ключ на шард)
+    :return: True, если цикл был выполнен
+    """
+    if runtime.redis is None:
+        # Одиночный процесс без Redis: циклы и так идут последовательно
+        await process_cycle(runtime)
+        return True
+    
+    backlog = await measure_backlog(runtime.redis)
+    if backlog:
+        logger.warning(f"{backlog} check runs are waiting in the queue")
+    
+    lock = LeaseLock(runtime.redis, lock_key, ttl=settings.CHECK_LOCK_TTL_SECONDS)
+    if not await lock.acquire():
+        logger.warning(f"Check cycle skipped: {lock_key} is held by a running cycle")
+        await record_cycle_event(runtime.redis, skipped=True, backlog=backlog)
+        return False
+    
+    started = time.monotonic()
+    try:
+        await process_cycle(runtime, lock)
+    except LockLostError:
+        logger.error(f"Check cycle stopped: {lock_key} lease was lost, another worker may run the cycle")
     finally:
+        duration = time.monotonic() - started
+        await lock.release()
+        
+        overrun = duration > settings.CHECK_INTERVAL_MINUTES * 60
+        if overrun:
+            logger.warning(
+                f"Check cycle overran its interval: {duration:.1f}s "
+                f"> {settings.CHECK_INTERVAL_MINUTES * 60}s"
+            )
+        await record_cycle_event(
+            runtime.redis, duration=duration, overrun=overrun,
+            lock_lost=lock.lost, backlog=backlog
+        )
+    
+    return True
+
+
+async def process_cycle(runtime: CheckerRuntime, lock: Optional[LeaseLock] = None):
+    """
+    Один цикл проверки: с записью самых медленных подписок и, если
+    профилирование запрошено (PROFILE_CYCLES или /profile_cycle), под cProfile
+    
+    :param runtime: Запущенные ресурсы проверки
+    :param lock: Блокировка цикла, если он идёт под ней
+    """
+    with record_slowest_spans():
+        if await take_profile_request(runtime.redis):
+            logger.info("Profiling this check cycle")
+            await run_profiled(process_all_subscriptions(runtime, lock), name="check_cycle")
+        else:
+            await process_all_subscriptions(runtime, lock)
+
+
+async def measure_backlog(redis: Redis, queue: str = "celery", limit: int = 1000) -> int:
+    """
+    Количество запусков проверки, ожидающих в очереди брокера
+    
+    :param redis: Клиент Redis брокера
+    :param queue: Имя очереди Celery
+    :param limit: Сколько сообщений просматривать максимум
+    :return: Число ожидающих задач check_new_vacancies
+    """
+    try:
+        messages = await redis.lrange(queue, 0, limit - 1)
+    except Exception as e:
+        logger.error(f"Error measuring queue backlog: {e}")
+        return 0
+    
+    backlog = 0
+    for raw in messages:
         try:
-            pending = asyncio.all_tasks(loop)
-            for task in pending:
-                task.cancel()
-            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-        except Exception:
-            pass
-        finally:
-            loop.close()
+            if json.loads(raw).get("headers", {}).get("task") == CHECK_TASK_NAME:
+                backlog += 1
+        except (ValueError, AttributeError):
+            continue
+    return backlog
 
 
-async def process_all_subscriptions():
+async def record_cycle_event(
+    redis: Redis,
+    duration: Optional[float] = None,
+    skipped: bool = False,
+    overrun: bool = False,
+    lock_lost: bool = False,
+    backlog: int = 0
+):
     """
-    Обработка всех активных подписок
+    Сохранение итогов запуска в хеш статистики циклов
+    
+    :param redis: Клиент Redis
+    :param duration: Длительность цикла в секундах (если он выполнялся)
+    :param skipped: Запуск пропущен из-за занятой блокировки
+    :param overrun: Цикл длился дольше интервала расписания
+    :param lock_lost: Блокировка была потеряна во время цикла
+    :param backlog: Число запусков, ожидавших в очереди
     """
-    engine = create_async_engine(
-        settings.database_url,
-        echo=False,
-        pool_pre_ping=True,
-        pool_recycle=3600,                                                                           
-    )
+    try:
+        pipe = redis.pipeline()
+        pipe.hset(CHECK_CYCLE_STATS_KEY, mapping={
+            "last_event_at": datetime.utcnow().isoformat(),
+            "last_backlog": backlog,
+        })
+        if skipped:
+            pipe.hincrby(CHECK_CYCLE_STATS_KEY, "skipped", 1)
+        else:
+            pipe.hincrby(CHECK_CYCLE_STATS_KEY, "completed", 1)
+            pipe.hset(CHECK_CYCLE_STATS_KEY, "last_duration", f"{duration:.3f}")
+        if overrun:
+            pipe.hincrby(CHECK_CYCLE_STATS_KEY, "overruns", 1)
+        if lock_lost:
+            pipe.hincrby(CHECK_CYCLE_STATS_KEY, "locks_lost", 1)
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Error recording cycle stats: {e}")
+
+
+async def process_all_subscriptions(runtime: CheckerRuntime, lock: Optional[LeaseLock] = None):
+    """
+    Обработка всех активных подписок
     
-    async_session_maker = async_sessionmaker(
-        engine,
-        class_=AsyncSession,
-        expire_on_commit=False
-    )
+    Подписки читаются порциями, поэтому обработка начинается сразу,
+    а память и время удержания соединения не растут вместе с их числом.
+    
+    Перед каждым следующим пользователем проверяется аренда блокировки:
+    если она потеряна, цикл мог взять другой воркер, и этот цикл
+    останавливается, чтобы не отправлять те же уведомления второй раз.
     
-    bot = None
+    :param runtime: Запущенные ресурсы проверки (пул БД, бот, HH-клиент)
+    :param lock: Блокировка цикла, если он идёт под ней
+    :raises LockLostError: Аренда блокировки потеряна до конца цикла
+    """
+    processed = 0
+    previous_user_id = None
+    started = time.perf_counter()
+    cycle = CycleStats()
+    pending = PendingNotifications()
     
     try:
-        async with async_session_maker() as session:
-            result = await session.execute(
-                select(Subscription).where(Subscription.is_active == True)
-            )
-            subscriptions = result.scalars().all()
-            
-            if not subscriptions:
-                logger.info("No active subscriptions found")
-                return
-            
-            logger.info(f"Processing {len(subscriptions)} subscriptions")
-            bot = Bot(token=settings.BOT_TOKEN)
+        async for chunk in iter_active_subscriptions(runtime.session_maker):
+            async with runtime.session_maker() as session:
+                watermarks = await load_watermarks(session, [subscription.id for subscription in chunk])
+                searches = [
+                    (
+                        subscription_query_key(subscription),
+                        build_search_params(subscription, watermarks.get(subscription.id))
+                    )
+                    for subscription in chunk
+                ]
+                cycle.plan_chunk(searches)
+                prefetched = 0
+                for index, subscription in enumerate(chunk):
+                    # Поиски следующих подписок идут параллельно, пока обрабатывается текущая
+                    while prefetched < min(len(chunk), index + 1 + settings.CHECK_PREFETCH_SEARCHES):
+                        query_key, search_params = searches[prefetched]
+                        cycle.prefetch(runtime.hh_client, query_key, **search_params)
+                        prefetched += 1
+                    # Подписки идут по пользователям: предыдущий пользователь собран полностью
+                    if subscription.user_id != previous_user_id:
+                        if pending:
+                            await deliver_notifications(session, runtime, pending, cycle)
+                        if lock is not None:
+                            lock.ensure_held()
+                    previous_user_id = subscription.user_id
+                    try:
+                        await process_subscription(session, runtime, subscription, cycle=cycle, pending=pending)
+                    except Exception as e:
+                        logger.error(f"Error processing subscription {subscription.id}: {e}", exc_info=True)
+                        await session.rollback()
+                        continue
+                await deliver_notifications(session, runtime, pending, cycle)
             
-            try:
-                async with HHClient() as hh_client:
-                    for subscription in subscriptions:
-                        try:
-                            await process_subscription(session, bot, hh_client, subscription)
-                        except Exception as e:
-                            logger.error(f"Error processing subscription {subscription.id}: {e}", exc_info=True)
-                            await session.rollback()
-                            continue
-            finally:
-                if bot:
-                    await bot.session.close()
+            processed += len(chunk)
+            cycle.subscriptions = processed
+            logger.info(f"Processed {processed} subscriptions so far")
+        
+        if not processed:
+            logger.info("No active subscriptions found")
+        
+        CHECK_CYCLE_SECONDS.observe(time.perf_counter() - started)
                     
+    except LockLostError:
+        raise
     except Exception as e:
         logger.error(f"Error in process_all_subscriptions: {e}", exc_info=True)
         raise
     finally:
-        await engine.dispose()
+        cycle.finish_chunk()
+        report = await save_cycle_report(runtime.session_maker, cycle)
+        if report:
+            logger.info(
+                f"Cycle: {report.subscriptions} subscriptions, {report.distinct_queries} queries, "
+                f"{report.hh_calls} HH calls, {report.cache_hits} cache hits, "
+                f"{report.messages_sent} sent, {cycle.deduplicated} deduplicated, {report.failures} failed"
+            )
+
+
+async def iter_active_subscriptions(
+    session_maker: async_sessionmaker,
+    chunk_size: int = settings.SUBSCRIPTION_CHUNK_SIZE
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Активные подписки порциями с keyset-пагинацией по (user_id, id)
+    
+    Каждая порция читается в своей короткой сессии и возвращается
+    лёгкими кортежами колонок, а не ORM-объектами. Подписки одного
+    пользователя идут подряд, чтобы его совпадения можно было объединить.
+    
+    :param session_maker: Фабрика сессий
+    :param chunk_size: Размер порции
+    :return: Асинхронный итератор по порциям строк
+    """
+    last_key = (0, 0)
+    
+    while True:
+        async with session_maker() as session:
+            result = await session.execute(
+                select(*SUBSCRIPTION_COLUMNS)
+                .where(
+                    Subscription.is_active == True,
+                    tuple_(Subscription.user_id, Subscription.id) > tuple_(*last_key)
+                )
+                .order_by(Subscription.user_id, Subscription.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+        
+        if not rows:
+            return
+        
+        yield rows
+        
+        if len(rows) < chunk_size:
+            return
+        last_key = (rows[-1].user_id, rows[-1].id)
+
+
+async def load_watermarks(session: AsyncSession, subscription_ids: List[int]) -> Dict[int, SubscriptionWatermark]:
+    """Водяные знаки подписок порции одним запросом (остаются в сессии для session.get)"""
+    result = await session.execute(
+        select(SubscriptionWatermark).where(SubscriptionWatermark.subscription_id.in_(subscription_ids))
+    )
+    return {watermark.subscription_id: watermark for watermark in result.scalars()}
+
+
+def build_search_params(subscription: Row, watermark: Optional[SubscriptionWatermark]) -> dict:
+    """
+    Аргументы HHClient.search_vacancies для подписки
+    
+    Поиск ограничивается вакансиями не старше водяного знака подписки
+    (с небольшим перекрытием).
+    """
+    date_from = None
+    if watermark and watermark.last_published_at:
+        date_from = watermark.last_published_at - timedelta(minutes=settings.WATERMARK_OVERLAP_MINUTES)
+    
+    return dict(
+        text=subscription.keywords,
+        area=subscription.city,
+        experience=subscription.experience,
+        salary=subscription.salary_from,
+        per_page=50,
+        date_from=date_from
+    )
+
+
+def subscription_query_key(subscription: Row) -> str:
+    """Параметры поиска подписки одной строкой (для логов и спанов)"""
+    return "|".join(
+        str(value) if value is not None else ""
+        for value in (subscription.keywords, subscription.city, subscription.experience, subscription.salary_from)
+    )
 
 
 async def process_subscription(
     session: AsyncSession,
-    bot: Bot,
-    hh_client: HHClient,
-    subscription: Subscription
-):
+    runtime: CheckerRuntime,
+    subscription: Row,
+    backfill: bool = False,
+    cycle: Optional[CycleStats] = None,
+    pending: Optional[PendingNotifications] = None
+) -> int:
     """
     Обработка одной подписки
     
+    Поиск ограничивается вакансиями не старше водяного знака подписки
+    (с небольшим перекрытием), а знак сдвигается только когда выдача
+    обработана полностью. Новые вакансии добавляются в pending и
+    отправляются вместе с совпадениями остальных подписок пользователя;
+    без pending они отправляются сразу.
+    
     :param session: Сессия БД
-    :param bot: Экземпляр бота
-    :param hh_client: Клиент HH API
-    :param subscription: Подписка для обработки
+    :param runtime: Запущенные ресурсы проверки (бот, HH-клиент, Redis)
+    :param subscription: Строка подписки (SUBSCRIPTION_COLUMNS)
+    :param backfill: Первичная загрузка: остаток выдачи после первой
+        порции уведомлений сохраняется как уже известный
+    :param cycle: Статистика и кеш поиска текущего цикла
+    :param pending: Ещё не отправленные совпадения подписок пользователя
+    :return: Количество новых вакансий подписки
     """
-    try:
-        logger.info(f"Processing subscription {subscription.id}: {subscription.keywords}")
-        
-        vacancies_data = await hh_client.search_vacancies(
-            text=subscription.keywords,
-            area=subscription.city,
-            experience=subscription.experience,
-            salary=subscription.salary_from,
-            per_page=50
-        )
-        
-        new_vacancies_count = 0
-        
-        for vacancy_data in vacancies_data.get('items', []):
-            if new_vacancies_count == 5:
-                break
-            try:
-                vacancy = await VacancyService.save_vacancy(session, vacancy_data)
-                
-                if vacancy:
-                    new_vacancies_count += 1
-                    await send_vacancy_notification(
-                        session, bot, subscription.user_id, vacancy_data
+    new_vacancies_count = 0
+    deliver_now = pending is None
+    if deliver_now:
+        pending = PendingNotifications()
+    
+    with span(
+        "process_subscription",
+        subscription_id=subscription.id,
+        query=subscription_query_key(subscription),
+        backfill=backfill
+    ):
+        try:
+            logger.info(f"Processing subscription {subscription.id}: {subscription.keywords}")
+            
+            with span("watermark"):
+                watermark = await session.get(SubscriptionWatermark, subscription.id)
+            search_params = build_search_params(subscription, watermark)
+            with span("hh_search"):
+                if cycle is not None:
+                    vacancies_data = await cycle.search_vacancies(
+                        runtime.hh_client, subscription_query_key(subscription), **search_params
                     )
-                    await asyncio.sleep(0.5)
+                else:
+                    vacancies_data = await runtime.hh_client.search_vacancies(**search_params)
+            
+            items = vacancies_data.get('items', [])
+            capped = False
+            
+            for vacancy_data in items:
+                if new_vacancies_count == 5:
+                    capped = True
+                    break
+                try:
+                    with span("save"):
+                        vacancy, is_new = await VacancyService.save_vacancy(session, vacancy_data)
+                    if is_new:
+                        NEW_VACANCIES.inc()
+                        if cycle is not None:
+                            cycle.new_vacancies += 1
+                            cycle.saved.add(vacancy.id)
+                    elif vacancy is not None and cycle is not None:
+                        # Вакансию уже сохранила другая подписка этого цикла - для этой она тоже новая;
+                        # записанное другими процессами (первичной загрузкой) новым не считается
+                        is_new = vacancy.id in cycle.saved
                     
-            except Exception as e:
-                logger.error(f"Error processing vacancy {vacancy_data.get('id')}: {e}", exc_info=True)
-                await session.rollback()
-                continue
-        
-        logger.info(
-            f"Subscription {subscription.id}: found {new_vacancies_count} new vacancies"
+                    # Первой выдаче новой подписки доставляется всё, даже уже сохранённое
+                    # подписками других пользователей: иначе знак сдвинется за эти вакансии
+                    if is_new or backfill:
+                        new_vacancies_count += 1
+                        pending.add(subscription.user_id, vacancy_data, subscription.keywords)
+                        
+                except Exception as e:
+                    logger.error(f"Error processing vacancy {vacancy_data.get('id')}: {e}", exc_info=True)
+                    await session.rollback()
+                    continue
+            
+            if backfill and capped:
+                with span("seed"):
+                    await VacancyService.seed_vacancies(session, items)
+            
+            # Знак можно сдвинуть, только если ни одна вакансия выдачи не осталась необработанной
+            fully_consumed = backfill or (not capped and len(items) >= vacancies_data.get('found', 0))
+            with span("update_watermark"):
+                await update_watermark(session, subscription.id, items if fully_consumed else [])
+            
+            logger.info(
+                f"Subscription {subscription.id}: found {new_vacancies_count} new vacancies"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error processing subscription {subscription.id}: {e}", exc_info=True)
+            await session.rollback()
+    
+    if deliver_now:
+        await deliver_notifications(session, runtime, pending, cycle)
+    
+    return new_vacancies_count
+
+
+async def deliver_notifications(
+    session: AsyncSession,
+    runtime: CheckerRuntime,
+    pending: PendingNotifications,
+    cycle: Optional[CycleStats] = None
+) -> int:
+    """
+    Отправка накопленных новых вакансий: каждая - одним сообщением на
+    пользователя с перечнем подписок, под которые она подошла
+    
+    Вакансия, уже отправленная пользователю в этом цикле (например, из
+    предыдущей порции подписок), повторно не отправляется.
+    
+    :param session: Сессия БД
+    :param runtime: Запущенные ресурсы проверки
+    :param pending: Совпадения подписок; после вызова пусто
+    :param cycle: Статистика текущего цикла
+    :return: Количество доставленных сообщений
+    """
+    delivered: List[str] = []
+    
+    for user_id, matches in pending.drain():
+        with span("notify", user_id=user_id, vacancies=len(matches)):
+            for hh_id, (vacancy_data, keywords) in matches.items():
+                if cycle is not None:
+                    cycle.deduplicated += len(keywords) - 1
+                if not pending.mark_sent(user_id, hh_id):
+                    if cycle is not None:
+                        cycle.deduplicated += 1
+                    continue
+                
+                sent = await send_vacancy_notification(
+                    session, runtime.bot, user_id, vacancy_data, subscriptions=keywords
+                )
+                if sent:
+                    delivered.append(hh_id)
+                if cycle is not None:
+                    if sent:
+                        cycle.messages_sent += 1
+                    else:
+                        cycle.failures += 1
+                await asyncio.sleep(settings.NOTIFICATION_DELAY_SECONDS)
+    
+    if delivered:
+        await schedule_enrichment(runtime, delivered)
+    
+    return len(delivered)
+
+
+async def schedule_enrichment(runtime: CheckerRuntime, hh_ids: List[str]):
+    """
+    Поставить загрузку деталей доставленных вакансий, не дожидаясь её
+    
+    Загрузка ограничена DETAILS_RATE_PER_SECOND и может идти дольше цикла,
+    поэтому цикл её не ждёт: у воркера Celery она уходит отдельной задачей
+    с низшим приоритетом в DETAILS_QUEUE, без Celery - фоном в процессе.
+    
+    :param runtime: Запущенные ресурсы проверки
+    :param hh_ids: ID HH доставленных вакансий
+    """
+    if not settings.DETAILS_ENRICH:
+        return
+    if runtime.details_queue is None:
+        runtime.spawn(enrich_delivered(runtime, hh_ids))
+        return
+    try:
+        await asyncio.to_thread(
+            celery_app.send_task,
+            DETAILS_TASK_NAME,
+            args=[hh_ids],
+            queue=runtime.details_queue,
+            priority=9,
         )
-        
     except Exception as e:
-        logger.error(f"Error processing subscription {subscription.id}: {e}", exc_info=True)
+        # Детали догрузит кнопка «📄 Подробнее»
+        logger.error(f"Error enqueuing details of {len(hh_ids)} vacancies: {e}")
+
+
+async def enrich_delivered(runtime: CheckerRuntime, hh_ids: List[str]):
+    """
+    Загрузить детали доставленных вакансий для кнопки «📄 Подробнее»
+    
+    Ошибка загрузки ни на что не влияет: кнопка догрузит детали сама.
+    
+    :param runtime: Запущенные ресурсы проверки
+    :param hh_ids: ID HH доставленных вакансий
+    """
+    if runtime.details is None:
+        return
+    try:
+        await runtime.details.enrich(hh_ids)
+    except Exception as e:
+        logger.error(f"Error enriching delivered vacancies: {e}", exc_info=True)
+
+
+async def update_watermark(session: AsyncSession, subscription_id: int, consumed_items: List[dict]):
+    """
+    Отметить проверку подписки и сдвинуть водяной знак по обработанным вакансиям
+    
+    :param session: Сессия БД
+    :param subscription_id: ID подписки
+    :param consumed_items: Полностью обработанные вакансии выдачи
+    """
+    watermark = await session.get(SubscriptionWatermark, subscription_id)
+    if watermark is None:
+        watermark = SubscriptionWatermark(subscription_id=subscription_id)
+        session.add(watermark)
+    
+    watermark.checked_at = datetime.utcnow()
+    
+    if consumed_items:
+        newest = max(
+            VacancyService.parse_published_at(item.get('published_at', ''))
+            for item in consumed_items
+        )
+        if not watermark.last_published_at or newest > watermark.last_published_at:
+            watermark.last_published_at = newest
+    
+    try:
+        await session.commit()
+    except Exception as e:
+        logger.error(f"Error updating watermark for subscription {subscription_id}: {e}")
         await session.rollback()
 
 
+@celery_app.task(name=BACKFILL_TASK_NAME)
+def backfill_subscription(subscription_id: int):
+    """
+    Первичная загрузка новой подписки (очередь backfill)
+    """
+    runtime = get_worker_runtime()
+    runtime.run(run_backfill(runtime.checker, subscription_id))
+
+
+@celery_app.task(name=DETAILS_TASK_NAME)
+def enrich_vacancy_details(hh_ids: List[str]):
+    """
+    Загрузка деталей доставленных вакансий (очередь DETAILS_QUEUE)
+    """
+    runtime = get_worker_runtime()
+    runtime.run(enrich_delivered(runtime.checker, hh_ids))
+
+
+async def run_backfill(runtime: CheckerRuntime, subscription_id: int) -> int:
+    """
+    Первая выдача по новой подписке: отправка первой порции вакансий,
+    сохранение остальных как известных и установка водяного знака
+    
+    :param runtime: Запущенные ресурсы проверки
+    :param subscription_id: ID подписки
+    :return: Количество отправленных вакансий
+    """
+    async with runtime.session_maker() as session:
+        result = await session.execute(
+            select(*SUBSCRIPTION_COLUMNS).where(
+                Subscription.id == subscription_id,
+                Subscription.is_active == True
+            )
+        )
+        subscription = result.one_or_none()
+        
+        if subscription is None:
+            logger.info(f"Backfill skipped: subscription {subscription_id} is gone or paused")
+            return 0
+        
+        sent = await process_subscription(session, runtime, subscription, backfill=True)
+    
+    logger.info(f"Backfill of subscription {subscription_id} sent {sent} vacancies")
+    return sent
+
+
 async def send_vacancy_notification(
     session: AsyncSession,
     bot: Bot,
     user_id: int,
-    vacancy_data: dict
-):
+    vacancy_data: dict,
+    subscriptions: Sequence[str] = ()
+) -> bool:
     """
     Отправка уведомления о новой вакансии пользователю
     
@@ -162,6 +695,8 @@ async def send_vacancy_notification(
     :param bot: Экземпляр бота
     :param user_id: ID пользователя в БД
     :param vacancy_data: Данные вакансии
+    :param subscriptions: Ключевые слова подписок, под которые подошла вакансия
+    :return: True, если сообщение доставлено
     """
     try:
         result = await session.execute(
@@ -171,23 +706,32 @@ async def send_vacancy_notification(
         
         if not user or not user.is_active:
             logger.warning(f"User {user_id} not found or inactive")
-            return
+            return False
         
         message = HHClient.format_vacancy(vacancy_data)  
         notification = f"🆕 <b>Новая вакансия!</b>\n\n{message}"
+        if subscriptions:
+            title = "По подписке" if len(subscriptions) == 1 else "По подпискам"
+            tags = ", ".join(html.escape(keywords) for keywords in subscriptions)
+            notification += f"\n\n🔔 {title}: <i>{tags}</i>"
         
-        await bot.send_message(
-            chat_id=user.telegram_id,
-            text=notification,
-            parse_mode="HTML",
-            disable_web_page_preview=True
-        )
+        with TELEGRAM_SEND_SECONDS.time():
+            await bot.send_message(
+                chat_id=user.telegram_id,
+                text=notification,
+                parse_mode="HTML",
+                disable_web_page_preview=True,
+                reply_markup=get_vacancy_details_keyboard(str(vacancy_data.get('id')))
+            )
+        NOTIFICATIONS_SENT.inc()
         
         logger.info(f"Sent vacancy notification to user {user.telegram_id}")
+        return True
         
     except Exception as e:
         error_str = str(e).lower()
         if "bot was blocked" in error_str or "user is deactivated" in error_str or "chat not found" in error_str:
+            SEND_FAILURES.labels("blocked").inc()
             logger.warning(f"Bot blocked by user {user_id}, marking as inactive")
             try:
                 user.is_active = False
@@ -196,4 +740,6 @@ async def send_vacancy_notification(
                 logger.error(f"Error updating user status: {commit_error}")
                 await session.rollback()
         else:
+            SEND_FAILURES.labels(type(e).__name__).inc()
             logger.error(f"Error sending notification to user {user_id}: {e}", exc_info=True)
+        return False
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+# bot.config читает настройки при импорте: тестам хватает заглушек окружения
+for name, value in {
+    "BOT_TOKEN": "1:test",
+    "ADMIN_ID": "1",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "DB_USER": "test",
+    "DB_PASSWORD": "test",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def anyio_backend():
+    """Асинхронные тесты (pytest.mark.anyio) идут только на asyncio"""
+    return "asyncio"
@@ -0,0 +1,190 @@
+import asyncio
+from contextlib import AsyncExitStack
+
+import pytest
+
+from metrics import HH_IN_FLIGHT
+from parser.aimd import AIMDLimiter, get_limiter
+from parser.hh_client import HHClient
+
+pytestmark = pytest.mark.anyio
+
+
+def limiter(**kwargs):
+    options = dict(initial=4, min_limit=1, max_limit=16, latency_target=60, backoff=0.5)
+    options.update(kwargs)
+    return AIMDLimiter(**options)
+
+
+async def hold(limiter: AIMDLimiter, stack: AsyncExitStack, count: int):
+    """Занять count мест, не выходя из блоков slot()"""
+    return [await stack.enter_async_context(limiter.slot()) for _ in range(count)]
+
+
+async def wait_until_queued(limiter: AIMDLimiter, waiters: int):
+    while len(limiter._waiters) < waiters:
+        await asyncio.sleep(0)
+
+
+async def test_fast_success_at_full_use_adds_one_over_limit():
+    aimd = limiter()
+    stack = AsyncExitStack()
+    await hold(aimd, stack, 4)
+    waiting = asyncio.create_task(hold(aimd, AsyncExitStack(), 1))
+    await wait_until_queued(aimd, 1)
+
+    await stack.aclose()
+    await waiting
+    # Освобождено первое место при очереди: 4 + 1/4; остальные - уже без очереди
+    assert aimd.limit == 4.25
+
+
+async def test_sustained_full_use_raises_limit():
+    aimd = limiter()
+
+    async def request():
+        async with aimd.slot():
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(request() for _ in range(40)))
+    assert aimd.slots > 4
+
+
+async def test_success_below_full_use_keeps_limit():
+    aimd = limiter()
+    async with aimd.slot():
+        pass
+    assert aimd.limit == 4
+
+
+class StatusTransport:
+    """Ответ HH с заданным статусом вместо сети"""
+
+    def __init__(self, status: int):
+        self.status = status
+
+    async def get(self, path, params=None):
+        return self.status, {"items": []} if self.status == 200 else None
+
+
+@pytest.mark.parametrize("status, slots", [(200, 8), (404, 8), (429, 4), (500, 4), (503, 4)])
+async def test_hh_429_and_5xx_halve_limit(status, slots):
+    aimd = limiter(initial=8)
+    client = HHClient(transport=StatusTransport(status), limiter=aimd)
+
+    await client._get("search", "/vacancies")
+
+    assert aimd.slots == slots
+
+
+async def test_slow_response_halves_limit():
+    aimd = limiter(initial=8, latency_target=0)
+    async with aimd.slot():
+        await asyncio.sleep(0.01)
+    assert aimd.slots == 4
+
+
+async def test_one_wave_of_errors_decreases_once():
+    aimd = limiter(initial=8)
+    async with AsyncExitStack() as stack:
+        slots = await hold(aimd, stack, 3)
+        for slot in slots:
+            slot.overloaded = True
+    assert aimd.slots == 4
+
+    # Запрос, начатый после снижения, снижает лимит снова
+    async with aimd.slot() as slot:
+        slot.overloaded = True
+    assert aimd.slots == 2
+
+
+async def test_limit_stays_within_floor_and_ceiling():
+    assert limiter(initial=100, max_limit=6).slots == 6
+    assert limiter(initial=0, min_limit=2).slots == 2
+
+    aimd = limiter(initial=2, min_limit=2)
+    async with aimd.slot() as slot:
+        slot.overloaded = True
+    assert aimd.slots == 2
+
+    aimd = limiter(initial=3, max_limit=3)
+    for _ in range(20):
+        async with AsyncExitStack() as stack:
+            await hold(aimd, stack, 3)
+    assert aimd.limit == 3
+
+
+async def test_exception_releases_slot_and_counts_as_overload():
+    aimd = limiter(initial=2)
+    async with AsyncExitStack() as stack:
+        await hold(aimd, stack, 1)
+        with pytest.raises(RuntimeError):
+            async with aimd.slot():
+                raise RuntimeError("connection reset")
+        assert aimd.in_flight == 1
+        assert aimd.slots == 1
+    assert aimd.in_flight == 0
+
+
+async def test_exception_wakes_waiting_request():
+    aimd = limiter(initial=1)
+
+    async def failing():
+        async with aimd.slot():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+    async def waiting():
+        async with aimd.slot():
+            return aimd.in_flight
+
+    results = await asyncio.gather(failing(), waiting(), return_exceptions=True)
+    assert isinstance(results[0], RuntimeError)
+    assert results[1] == 1
+    assert aimd.in_flight == 0
+
+
+async def test_cancellation_releases_slot_without_decrease():
+    aimd = limiter()
+    entered = asyncio.Event()
+
+    async def request():
+        async with aimd.slot():
+            entered.set()
+            await asyncio.sleep(60)
+
+    task = asyncio.create_task(request())
+    await entered.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert aimd.in_flight == 0
+    assert aimd.limit == 4
+
+
+async def test_cancelled_waiter_passes_its_turn_on():
+    aimd = limiter(initial=1)
+    async with AsyncExitStack() as stack:
+        await hold(aimd, stack, 1)
+        cancelled = asyncio.create_task(hold(aimd, AsyncExitStack(), 1))
+        second = asyncio.create_task(hold(aimd, AsyncExitStack(), 1))
+        await wait_until_queued(aimd, 2)
+        cancelled.cancel()
+    await asyncio.wait_for(second, timeout=1)
+    assert aimd.in_flight == 1
+
+
+async def test_clients_share_process_limiter():
+    first, second = HHClient(), HHClient()
+    assert first.limiter is second.limiter is get_limiter()
+
+    shared = get_limiter()
+    stack = AsyncExitStack()
+    async with stack:
+        # Места, занятые одним клиентом, недоступны другому
+        await hold(first.limiter, stack, shared.slots)
+        waiter = asyncio.ensure_future(stack.enter_async_context(second.limiter.slot()))
+        await wait_until_queued(shared, 1)
+        assert not waiter.done()
+        assert HH_IN_FLIGHT._value.get() == shared.slots
+        waiter.cancel()
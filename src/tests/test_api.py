@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from api.cache import ResponseCache
+from api.pagination import decode_cursor, encode_cursor
+from database.models import Base, Vacancy
+
+httpx = pytest.importorskip("httpx")
+
+from api.main import create_app  # noqa: E402
+
+pytestmark = pytest.mark.anyio
+
+PUBLISHED = datetime(2024, 3, 1, 12, 0)
+
+
+@pytest.fixture
+async def client(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'api.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        # Две вакансии с одним временем публикации: курсор различает их по id
+        for number, minutes in enumerate([0, 10, 10, 20, 30], 1):
+            session.add(Vacancy(
+                hh_id=str(number), title=f"Вакансия {number}", url=f"https://hh.ru/vacancy/{number}",
+                published_at=PUBLISHED + timedelta(minutes=minutes)
+            ))
+        await session.commit()
+
+    app = create_app(async_sessionmaker(engine, expire_on_commit=False))
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://api") as client:
+            yield client
+    await engine.dispose()
+
+
+def test_cursor_round_trip():
+    values = [PUBLISHED, 42]
+    assert decode_cursor(encode_cursor(values), [datetime, int]) == values
+
+
+async def test_cursor_pages_through_all_rows_once(client):
+    hh_ids, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/vacancies", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        hh_ids += [item["hh_id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert hh_ids == ["5", "4", "3", "2", "1"]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor([1]), encode_cursor(["yesterday", 1])])
+async def test_invalid_cursor_is_bad_request(client, cursor):
+    response = await client.get("/vacancies", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert "Invalid cursor" in response.json()["detail"]
+
+
+async def test_matching_etag_returns_not_modified(client):
+    first = await client.get("/vacancies", params={"limit": 2})
+    etag = first.headers["etag"]
+
+    cached = await client.get("/vacancies", params={"limit": 2}, headers={"If-None-Match": etag})
+    weak = await client.get("/vacancies", params={"limit": 2}, headers={"If-None-Match": f'"other", W/{etag}'})
+    other_page = await client.get("/vacancies", params={"limit": 3}, headers={"If-None-Match": etag})
+
+    assert (cached.status_code, cached.content, cached.headers["etag"]) == (304, b"", etag)
+    assert weak.status_code == 304
+    assert other_page.status_code == 200 and other_page.headers["etag"] != etag
+
+
+class Body(BaseModel):
+    value: int
+
+
+async def test_concurrent_requests_share_one_load_and_errors_are_not_cached():
+    cache = ResponseCache(ttl=60)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return Body(value=len(loads))
+
+    results = await asyncio.gather(*(cache.get("/x", load) for _ in range(5)))
+    assert len(loads) == 1 and len(set(results)) == 1
+
+    async def failing():
+        raise RuntimeError("db down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get("/y", failing)
+    body, _ = await cache.get("/y", load)
+    assert body == b'{"value":2}'
@@ -0,0 +1,56 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from tasks import backfill
+from tasks.vacancy_checker import BACKFILL_QUEUE
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def workers(monkeypatch):
+    """Ответ inspect().active_queues() воркеров Celery"""
+    replies = {}
+    inspect = SimpleNamespace(active_queues=lambda: replies)
+    monkeypatch.setattr(backfill.celery_app.control, "inspect", lambda timeout: inspect)
+    monkeypatch.setattr(backfill, "_queue_consumers", None)
+    return replies
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    tasks = []
+    monkeypatch.setattr(backfill.celery_app, "send_task", lambda name, **options: tasks.append(options))
+    return tasks
+
+
+def test_counts_only_workers_on_backfill_queue(workers):
+    workers["worker@a"] = [{"name": "celery"}]
+    workers["worker@b"] = [{"name": "celery"}, {"name": BACKFILL_QUEUE}]
+
+    assert backfill.count_queue_consumers() == 1
+
+
+async def test_warns_when_nothing_consumes_backfill_queue(workers, sent, caplog):
+    workers["worker@a"] = [{"name": "celery"}]
+
+    with caplog.at_level(logging.WARNING, logger=backfill.logger.name):
+        await backfill.check_queue_consumers()
+        await backfill.enqueue_backfill(7)
+
+    assert sent and sent[0]["queue"] == BACKFILL_QUEUE
+    assert "BACKFILL_IN_PROCESS" in caplog.text
+    assert "subscription 7 is queued, but no worker" in caplog.text
+
+
+async def test_no_warning_with_backfill_worker(workers, sent, caplog):
+    workers["worker@b"] = [{"name": BACKFILL_QUEUE}]
+
+    with caplog.at_level(logging.WARNING, logger=backfill.logger.name):
+        await backfill.check_queue_consumers()
+        await backfill.enqueue_backfill(7)
+
+    assert sent
+    assert caplog.text == ""
@@ -0,0 +1,81 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from tasks.cycle_report import CycleStats
+
+pytestmark = pytest.mark.anyio
+
+EARLY = datetime(2024, 1, 1)
+LATE = datetime(2024, 1, 2)
+
+
+class FakeHHClient:
+    def __init__(self, items=("vacancy",)):
+        self.items = list(items)
+        self.calls = []
+
+    async def search_vacancies(self, **params):
+        self.calls.append(params)
+        await asyncio.sleep(0)
+        return {"items": self.items, "found": len(self.items)}
+
+
+def search(text, date_from):
+    return text, {"text": text, "date_from": date_from}
+
+
+async def test_prefetched_search_is_shared_and_evicted_per_watermark():
+    hh_client = FakeHHClient()
+    searches = [search("python", EARLY), search("python", LATE), search("python", EARLY)]
+    cycle = CycleStats()
+    cycle.plan_chunk(searches)
+
+    for query_key, params in searches:
+        cycle.prefetch(hh_client, query_key, **params)
+    assert cycle.hh_calls == 2
+    assert cycle.queries == {"python"}
+
+    query_key, params = searches[0]
+    await cycle.search_vacancies(hh_client, query_key, **params)
+    # Выдача EARLY нужна ещё одной подписке, LATE - одной
+    assert set(cycle._searches) == {("python", EARLY), ("python", LATE)}
+
+    query_key, params = searches[1]
+    await cycle.search_vacancies(hh_client, query_key, **params)
+    assert set(cycle._searches) == {("python", EARLY)}
+
+    query_key, params = searches[2]
+    await cycle.search_vacancies(hh_client, query_key, **params)
+    assert cycle._searches == {}
+    assert (cycle.hh_calls, cycle.cache_hits) == (2, 1)
+    assert len(hh_client.calls) == 2
+
+
+async def test_empty_result_is_not_reused():
+    hh_client = FakeHHClient(items=())
+    searches = [search("rust", None), search("rust", None)]
+    cycle = CycleStats()
+    cycle.plan_chunk(searches)
+
+    for query_key, params in searches:
+        await cycle.search_vacancies(hh_client, query_key, **params)
+
+    assert len(hh_client.calls) == 2
+    assert cycle.cache_hits == 0
+
+
+async def test_finish_chunk_cancels_unused_prefetch():
+    hh_client = FakeHHClient()
+    cycle = CycleStats()
+    query_key, params = search("go", None)
+    cycle.plan_chunk([(query_key, params)])
+    cycle.prefetch(hh_client, query_key, **params)
+    task = cycle._searches[("go", None)]
+
+    cycle.finish_chunk()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert task.cancelled()
+    assert cycle._searches == {}
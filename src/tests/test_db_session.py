@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bot.middlewares.db_session import LazySession
+from database.models import Base, Subscription, SubscriptionWatermark
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'session.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSession(engine) as session:
+        session.add(Subscription(id=1, user_id=1, keywords="python"))
+        session.add(SubscriptionWatermark(subscription_id=1))
+        await session.commit()
+    yield async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+async def count(session_maker, model) -> int:
+    async with session_maker() as session:
+        return await session.scalar(select(func.count()).select_from(model))
+
+
+async def test_read_releases_transaction(session_maker):
+    session = LazySession(session_maker)
+
+    assert await session.get(Subscription, 1) is not None
+    assert not session.in_transaction()
+    await session.close()
+
+
+async def test_dml_is_not_committed_on_its_own(session_maker):
+    session = LazySession(session_maker)
+    subscription = await session.get(Subscription, 1)
+
+    await session.delete(subscription)
+    await session.execute(delete(SubscriptionWatermark).where(SubscriptionWatermark.subscription_id == 1))
+    # Следующее чтение не фиксирует начатую запись
+    await session.scalar(select(func.count()).select_from(Subscription))
+    assert session.in_transaction()
+
+    # Обработчик упал до commit: обе записи откатываются вместе
+    await session.close()
+    assert await count(session_maker, Subscription) == 1
+    assert await count(session_maker, SubscriptionWatermark) == 1
+
+
+async def test_commit_resumes_releasing_after_reads(session_maker):
+    session = LazySession(session_maker)
+    await session.execute(delete(SubscriptionWatermark))
+    await session.commit()
+
+    await session.get(Subscription, 1)
+    assert not session.in_transaction()
+    assert await count(session_maker, SubscriptionWatermark) == 0
+    await session.close()
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from bot.config import settings
+from tasks import vacancy_checker
+from tasks.runtime import CheckerRuntime
+from tasks.vacancy_checker import DETAILS_TASK_NAME, schedule_enrichment
+
+pytestmark = pytest.mark.anyio
+
+
+class BlockedDetails:
+    """Загрузка деталей, которая не завершается, пока её не отпустят"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.loaded = []
+
+    async def enrich(self, hh_ids):
+        await self.release.wait()
+        self.loaded.extend(hh_ids)
+        return len(hh_ids)
+
+
+async def test_enrichment_is_off_by_default():
+    runtime = CheckerRuntime()
+    runtime.details = BlockedDetails()
+
+    await schedule_enrichment(runtime, ["1"])
+
+    assert not settings.DETAILS_ENRICH
+    assert not runtime._background
+
+
+async def test_enrichment_without_celery_runs_in_background(monkeypatch):
+    monkeypatch.setattr(settings, "DETAILS_ENRICH", True)
+    runtime = CheckerRuntime()
+    runtime.details = BlockedDetails()
+
+    # Возврат сразу: загрузка ещё заблокирована, но цикл её не ждёт
+    await asyncio.wait_for(schedule_enrichment(runtime, ["1", "2"]), timeout=1)
+    assert len(runtime._background) == 1
+
+    runtime.details.release.set()
+    await asyncio.gather(*runtime._background)
+    assert runtime.details.loaded == ["1", "2"]
+
+
+async def test_enrichment_in_worker_goes_to_low_priority_queue(monkeypatch):
+    monkeypatch.setattr(settings, "DETAILS_ENRICH", True)
+    sent = []
+    monkeypatch.setattr(
+        vacancy_checker.celery_app, "send_task", lambda name, **options: sent.append((name, options))
+    )
+    runtime = CheckerRuntime(details_queue="backfill")
+    runtime.details = BlockedDetails()
+
+    await schedule_enrichment(runtime, ["1"])
+
+    assert sent == [(DETAILS_TASK_NAME, {"args": [["1"]], "queue": "backfill", "priority": 9})]
+    assert not runtime._background
@@ -0,0 +1,33 @@
+import pytest
+from aiogram import Bot
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from bot import main as bot_main
+from bot.config import settings
+from database.models import Base, CycleReport
+from tasks.vacancy_checker import run_check_cycle
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_embedded_runtime_runs_cycle_without_redis(monkeypatch, tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'embedded.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    monkeypatch.setattr(bot_main, "engine", engine)
+    monkeypatch.setattr(settings, "REDIS_HOST", None)
+
+    bot = Bot(token="1:test")
+    runtime = bot_main.create_embedded_runtime(bot)
+    await runtime.start()
+    try:
+        assert runtime.redis is None
+        assert await run_check_cycle(runtime)
+    finally:
+        await runtime.close()
+        await bot.session.close()
+
+    async with AsyncSession(engine) as session:
+        assert await session.scalar(select(func.count()).select_from(CycleReport)) == 1
+    await engine.dispose()
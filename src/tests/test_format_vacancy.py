@@ -0,0 +1,39 @@
+from bot.handlers.subscription import MESSAGE_MAX_LENGTH, truncate_vacancy
+from parser.hh_client import HHClient
+
+VACANCY = {
+    "id": "1",
+    "name": "C++ <Senior> & Lead",
+    "employer": {"name": "Рога & Копыта"},
+    "salary": {"from": 100000, "to": None, "currency": "RUR"},
+    "area": {"name": "Москва"},
+    "experience": {"name": "От 3 до 6 лет"},
+    "alternate_url": "https://hh.ru/vacancy/1?a=1&b='2'",
+    "published_at": "2024-05-01T10:00:00+0300",
+}
+
+
+def test_format_vacancy_escapes_hh_text():
+    formatted = HHClient.format_vacancy(VACANCY)
+
+    assert "<b>C++ &lt;Senior&gt; &amp; Lead</b>" in formatted
+    assert "<b>Рога &amp; Копыта</b>" in formatted
+    assert "href='https://hh.ru/vacancy/1?a=1&amp;b=&#x27;2&#x27;'" in formatted
+
+
+def test_format_vacancy_tolerates_missing_fields():
+    formatted = HHClient.format_vacancy({"name": None, "employer": None, "area": None})
+
+    assert "Без названия" in formatted
+    assert "Не указано" in formatted
+
+
+def test_truncate_vacancy_fits_oversized_item():
+    vacancy = dict(VACANCY, name="Python & " * 1000)
+
+    formatted = truncate_vacancy(vacancy, MESSAGE_MAX_LENGTH - 100)
+
+    assert len(formatted) <= MESSAGE_MAX_LENGTH - 100
+    assert formatted.startswith("💼 <b>Python &amp; ")
+    assert "…</b>" in formatted
+    assert "Открыть вакансию</a>" in formatted
@@ -0,0 +1,93 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from benchmarks import micro
+from parser.hh_client import HHClient
+from parser.hh_recording import HHRecorder, HHReplayTransport
+
+pytestmark = pytest.mark.anyio
+
+ITEMS = json.loads((Path(__file__).resolve().parents[1] / "benchmarks/data/hh_items_synthetic.json").read_text())
+
+
+class LiveTransport:
+    """Заглушка живого API: выдача по тексту запроса, каждый ответ - новая версия"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, path, params=None):
+        self.calls += 1
+        if path == "/vacancies":
+            items = [item for item in ITEMS if params["text"].lower() in item["name"].lower()]
+            return 200, {"items": items, "found": len(items), "page": params["page"], "version": self.calls}
+        if path == f"/vacancies/{ITEMS[0]['id']}":
+            return 200, {**ITEMS[0], "description": "<p>Описание</p>"}
+        return 404, None
+
+
+async def record(path, searches):
+    recorder = HHRecorder(str(path))
+    async with HHClient(recorder=recorder, transport=LiveTransport()) as client:
+        responses = [await client.search_vacancies(**params) for params in searches]
+        responses.append(await client.get_vacancy_details(ITEMS[0]["id"]))
+    recorder.close()
+    return responses
+
+
+async def replay(path, searches):
+    async with HHClient(transport=HHReplayTransport(str(path), speed=0)) as client:
+        responses = [await client.search_vacancies(**params) for params in searches]
+        responses.append(await client.get_vacancy_details(ITEMS[0]["id"]))
+    return responses
+
+
+async def test_replay_returns_recorded_responses_in_order(tmp_path):
+    path = tmp_path / "hh.jsonl"
+    searches = [
+        {"text": "python", "date_from": datetime(2024, 1, 1)},
+        {"text": "python", "date_from": datetime(2024, 1, 1)},
+        {"text": "java", "area": "Москва", "salary": 100000},
+    ]
+    recorded = await record(path, searches)
+
+    # date_from водяного знака при воспроизведении другой, но запрос тот же
+    replayed = await replay(path, [
+        {**params, "date_from": datetime(2025, 1, 1)} if "date_from" in params else params
+        for params in searches
+    ])
+
+    assert replayed == recorded
+    assert [response["version"] for response in replayed[:2]] == [1, 2]
+    assert len(path.read_text().splitlines()) == 4
+
+
+async def test_replay_repeats_last_response_and_misses_unknown_requests(tmp_path):
+    path = tmp_path / "hh.jsonl"
+    recorded = await record(path, [{"text": "python"}])
+
+    transport = HHReplayTransport(str(path), speed=0)
+    async with HHClient(transport=transport) as client:
+        assert await client.search_vacancies(text="python") == recorded[0]
+        assert await client.search_vacancies(text="python") == recorded[0]
+        assert await client.search_vacancies(text="rust") == {"items": [], "found": 0}
+    assert (transport.served, transport.misses) == (2, 1)
+    assert list(transport.searches()) == [
+        {"only_with_salary": "false", "page": "0", "per_page": "20", "text": "python"}
+    ]
+
+
+async def test_micro_corpus_reads_recorded_searches(tmp_path, monkeypatch):
+    path = tmp_path / "hh_corpus.jsonl"
+    await record(path, [{"text": "python"}, {"text": "python"}, {"text": "java"}])
+    monkeypatch.setattr(micro, "CORPUS_PATH", path)
+
+    items, source = micro.load_corpus()
+
+    expected = {item["id"] for item in ITEMS if "python" in item["name"].lower() or "java" in item["name"].lower()}
+    assert source == path
+    assert {item["id"] for item in items} == expected
+    assert len(items) == len(expected)
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from tasks.locks import LeaseLock, LockLostError
+
+fakeredis = pytest.importorskip("fakeredis")
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.FakeAsyncRedis()
+
+
+async def test_second_acquire_fails_while_held(redis):
+    first = LeaseLock(redis, "lock", ttl=5)
+    second = LeaseLock(redis, "lock", ttl=5)
+
+    assert await first.acquire()
+    assert not await second.acquire()
+    assert await first.holder() == first.token
+
+    await first.release()
+    assert await second.acquire()
+    await second.release()
+
+
+async def test_heartbeat_renews_lease_every_third_of_ttl(redis):
+    lock = LeaseLock(redis, "lock", ttl=0.3)
+    assert await lock.acquire()
+
+    # Без продления аренда истекла бы через 0.3 с
+    await asyncio.sleep(0.5)
+    assert await lock.holder() == lock.token
+    assert 0 < await redis.pttl("lock") <= 300
+    assert not lock.lost
+
+    await lock.release()
+    assert await redis.get("lock") is None
+
+
+async def test_heartbeat_marks_lost_lease(redis):
+    lock = LeaseLock(redis, "lock", ttl=0.3)
+    assert await lock.acquire()
+
+    await redis.set("lock", "someone-else")
+    await asyncio.sleep(0.2)
+
+    assert lock.lost
+    with pytest.raises(LockLostError):
+        lock.ensure_held()
+    await lock.release()
+
+
+async def test_release_does_not_delete_foreign_lock(redis):
+    lock = LeaseLock(redis, "lock", ttl=0.3)
+    assert await lock.acquire()
+    await lock.release()
+
+    other = LeaseLock(redis, "lock", ttl=5)
+    assert await other.acquire()
+
+    # Повторное снятие старым владельцем не трогает чужую блокировку
+    await lock.release()
+    assert await other.holder() == other.token
+    await other.release()
@@ -0,0 +1,49 @@
+import sqlite3
+from argparse import Namespace
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+ALEMBIC_INI = Path(__file__).resolve().parents[1] / "alembic.ini"
+
+
+def upgrade(db_path):
+    options = Namespace(x=[f"url=sqlite+aiosqlite:///{db_path}"])
+    command.upgrade(Config(str(ALEMBIC_INI), cmd_opts=options), "head")
+
+
+def test_upgrade_adds_columns_and_indexes_to_existing_tables(tmp_path):
+    db_path = tmp_path / "old.db"
+    with sqlite3.connect(db_path) as conn:
+        # Схема до появления структурных полей вакансий
+        conn.executescript("""
+            CREATE TABLE vacancies (
+                id INTEGER PRIMARY KEY, hh_id VARCHAR(50) UNIQUE NOT NULL, title VARCHAR(500) NOT NULL,
+                company VARCHAR(255), salary VARCHAR(255), url TEXT NOT NULL, published_at DATETIME NOT NULL
+            );
+            CREATE TABLE subscriptions (
+                id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, keywords TEXT NOT NULL,
+                city VARCHAR(255), experience VARCHAR(50), salary_from INTEGER, is_active BOOLEAN
+            );
+            INSERT INTO vacancies VALUES (1, '1', 'Python', 'ООО', 'Не указана', 'u', '2024-01-01');
+        """)
+
+    upgrade(db_path)
+    # Повторный запуск на уже обновлённой схеме ничего не ломает
+    upgrade(db_path)
+
+    with sqlite3.connect(db_path) as conn:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(vacancies)")}
+        indexes = {row[1] for row in conn.execute("SELECT * FROM sqlite_master WHERE type = 'index'")}
+        assert conn.execute("SELECT area_id FROM vacancies").fetchall() == [(None,)]
+    assert {"area_id", "experience", "salary_from", "salary_to", "currency"} <= columns
+    assert {"ix_vacancies_published_at_id", "ix_subscriptions_user_id_id"} <= indexes
+
+
+def test_upgrade_on_empty_database_leaves_tables_to_create_all(tmp_path):
+    db_path = tmp_path / "empty.db"
+    upgrade(db_path)
+    with sqlite3.connect(db_path) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert tables == {"alembic_version"}
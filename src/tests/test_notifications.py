@@ -0,0 +1,141 @@
+import json
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from bot.config import settings
+from database.models import Base, Subscription, User
+from tasks import vacancy_checker
+from tasks.locks import LeaseLock, LockLostError
+from parser.vacancy_service import VacancyService
+from tasks.vacancy_checker import process_all_subscriptions, run_backfill
+
+pytestmark = pytest.mark.anyio
+
+ITEM = json.loads((Path(__file__).resolve().parents[1] / "benchmarks/data/hh_items_synthetic.json").read_text())[0]
+
+
+class FakeHHClient:
+    def __init__(self):
+        self.on_search = None
+
+    async def search_vacancies(self, **params):
+        if self.on_search is not None:
+            await self.on_search()
+        return {"items": [ITEM], "found": 1}
+
+
+class FakeBot:
+    def __init__(self, on_send=None):
+        self.messages = []
+        self.on_send = on_send
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((chat_id, text))
+        if self.on_send is not None:
+            self.on_send()
+
+
+async def create_runtime(tmp_path, subscriptions, bot=None):
+    """БД на SQLite с подписками [(telegram_id, keywords)] и ресурсы проверки на заглушках"""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'cycle.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_maker() as session:
+        users = {}
+        for telegram_id, keywords in subscriptions:
+            if telegram_id not in users:
+                users[telegram_id] = User(telegram_id=telegram_id, is_active=True)
+                session.add(users[telegram_id])
+                await session.flush()
+            session.add(Subscription(user_id=users[telegram_id].id, keywords=keywords, is_active=True))
+        await session.commit()
+
+    return SimpleNamespace(
+        engine=engine, session_maker=session_maker, hh_client=FakeHHClient(), bot=bot or FakeBot(),
+        redis=None, details=None, details_queue=None
+    )
+
+
+async def run_cycle(tmp_path, subscriptions, bot=None, lock=None):
+    """Один цикл проверки по подпискам [(telegram_id, keywords)]; сообщения бота"""
+    runtime = await create_runtime(tmp_path, subscriptions, bot)
+    try:
+        await process_all_subscriptions(runtime, lock)
+    finally:
+        await runtime.engine.dispose()
+    return runtime.bot.messages
+
+
+@pytest.fixture(autouse=True)
+def no_notification_delay(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_DELAY_SECONDS", 0)
+
+
+async def test_vacancy_matching_two_subscriptions_is_sent_once(tmp_path):
+    messages = await run_cycle(tmp_path, [(100, "python"), (100, "python backend")])
+
+    assert len(messages) == 1
+    assert "По подпискам" in messages[0][1]
+
+
+async def test_user_split_across_chunks_gets_one_message(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        vacancy_checker, "iter_active_subscriptions",
+        partial(vacancy_checker.iter_active_subscriptions, chunk_size=1)
+    )
+
+    messages = await run_cycle(tmp_path, [(100, "python"), (100, "python backend"), (200, "django")])
+
+    # Вакансия, сохранённая подпиской первого пользователя, нова и для второго
+    assert [chat_id for chat_id, _ in messages] == [100, 200]
+
+
+async def test_cycle_stops_delivering_once_lease_is_lost(tmp_path):
+    lock = LeaseLock(redis=None, key="lock")
+
+    def lose_lease():
+        lock.lost = True
+
+    bot = FakeBot(on_send=lose_lease)
+    with pytest.raises(LockLostError):
+        await run_cycle(tmp_path, [(100, "python"), (200, "django"), (300, "go")], bot=bot, lock=lock)
+
+    # Первый пользователь получил сообщение до потери аренды, остальных ведёт уже другой воркер
+    assert [chat_id for chat_id, _ in bot.messages] == [100]
+
+
+async def test_backfill_delivers_vacancies_already_stored_by_other_users(tmp_path):
+    runtime = await create_runtime(tmp_path, [(100, "python")])
+    async with runtime.session_maker() as session:
+        # Вакансию уже сохранила подписка другого пользователя
+        await VacancyService.seed_vacancies(session, [ITEM])
+        subscription_id = await session.scalar(select(Subscription.id))
+
+    try:
+        assert await run_backfill(runtime, subscription_id) == 1
+    finally:
+        await runtime.engine.dispose()
+    assert [chat_id for chat_id, _ in runtime.bot.messages] == [100]
+
+
+async def test_vacancy_stored_by_concurrent_backfill_is_not_new_for_cycle(tmp_path):
+    runtime = await create_runtime(tmp_path, [(100, "python")])
+
+    async def concurrent_backfill():
+        # Первичная загрузка другой подписки сохранила вакансию уже после начала цикла
+        async with runtime.session_maker() as session:
+            await VacancyService.seed_vacancies(session, [ITEM])
+
+    runtime.hh_client.on_search = concurrent_backfill
+    try:
+        await process_all_subscriptions(runtime)
+    finally:
+        await runtime.engine.dispose()
+    assert runtime.bot.messages == []
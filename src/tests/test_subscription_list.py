@@ -0,0 +1,22 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from bot.handlers.subscription import render_subscriptions_page
+from database.models import Base, Subscription
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_subscription_list_escapes_keywords_and_city(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'list.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        session.add(Subscription(user_id=1, keywords="C++ & <Qt>", city="Москва & МО", is_active=True))
+        await session.commit()
+        text, _ = await render_subscriptions_page(session, 1, 0)
+    await engine.dispose()
+
+    assert "<code>C++ &amp; &lt;Qt&gt;</code>" in text
+    assert "Москва &amp; МО" in text
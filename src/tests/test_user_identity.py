@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from bot.middlewares.user_identity import UserIdentity, UserIdentityCache, user_identity_key
+
+fakeredis = pytest.importorskip("fakeredis")
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cache_keeps_only_immutable_identity():
+    redis = fakeredis.FakeAsyncRedis()
+    cache = UserIdentityCache(redis=redis)
+
+    await cache.set(UserIdentity(id=7, telegram_id=700))
+
+    assert json.loads(await redis.get(user_identity_key(700))) == {"id": 7, "telegram_id": 700}
+    assert not hasattr(await cache.get(700), "is_active")
+
+
+async def test_other_replica_reads_identity_from_redis():
+    redis = fakeredis.FakeAsyncRedis()
+    await UserIdentityCache(redis=redis).set(UserIdentity(id=7, telegram_id=700))
+
+    assert await UserIdentityCache(redis=redis).get(700) == UserIdentity(id=7, telegram_id=700)
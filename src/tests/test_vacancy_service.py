@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.models import Base, Vacancy
+from parser.vacancy_service import VacancyService
+
+pytestmark = pytest.mark.anyio
+
+ITEMS = json.loads((Path(__file__).resolve().parents[1] / "benchmarks/data/hh_items_synthetic.json").read_text())
+
+
+async def test_seeded_vacancies_keep_all_built_fields(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'vacancies.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    item = next(item for item in ITEMS if (item.get("salary") or {}).get("to"))
+    async with AsyncSession(engine) as session:
+        assert await VacancyService.seed_vacancies(session, [item]) == 1
+
+    async with AsyncSession(engine) as session:
+        stored = await session.scalar(select(Vacancy).where(Vacancy.hh_id == item["id"]))
+    built = VacancyService.build_vacancy(item)
+    for column in Vacancy.__table__.columns:
+        if column.name != "id":
+            assert getattr(stored, column.name) == getattr(built, column.name), column.name
+    assert stored.area_name == item["area"]["name"]
+    assert stored.salary_to == item["salary"]["to"]
+    await engine.dispose()
+
+
+def test_build_vacancy_tolerates_null_employer_and_salary():
+    item = {**ITEMS[0], "employer": None, "salary": None, "area": None, "experience": None}
+
+    vacancy = VacancyService.build_vacancy(item)
+
+    assert vacancy.company == "Не указано"
+    assert vacancy.salary == "Не указана"
+    assert (vacancy.area_id, vacancy.experience, vacancy.salary_from) == (None, None, None)